@@ -1,15 +1,27 @@
 from __future__ import annotations
 import streamlit as st
-from atis.data_loader import DataStore
+from atis.data_loader import shared_datastore
 from atis.policy import Policy
-from atis.watcher_demo import next_demo_event, try_live_feed
-from atis.orchestrator import handle_event, AUDIT_LOG, get_review_queue, approve_hts
+from atis.watcher_demo import next_demo_event, poll_live_feed
+from atis.metrics import PROFILER, REGISTRY
+from atis.orchestrator import handle_event, audit_log, get_review_queue, approve_hts
 
 st.set_page_config(page_title="ATIS – Tariff Intelligence", layout="wide")
 st.title("ATIS – Agentic Tariff Intelligence System (Demo)")
 
-if "last_event" not in st.session_state:
-    st.session_state["last_event"] = None
+@st.cache_resource
+def get_policy() -> Policy:
+    return Policy("./data/policy.yaml", auto_reload=True)
+
+if "events" not in st.session_state:
+    st.session_state["events"] = []
+    st.session_state["run"] = 0             # bumped per watcher click; reruns of the script reuse its decisions
+    st.session_state["decisions"] = {}      # (run, event index, price) -> decisions already recorded
+
+def set_events(events) -> None:
+    st.session_state["events"] = events
+    st.session_state["run"] += 1
+    st.session_state["decisions"] = {}
 
 colL, colC, colR = st.columns([1.2, 1.6, 1.2])
 
@@ -20,38 +32,44 @@ with colL:
     c1, c2 = st.columns(2)
     with c1:
         if st.button("Run Watcher ▶ (Demo)"):
-            st.session_state["last_event"] = next_demo_event(DataStore("./data"), scenario_id)
+            set_events([next_demo_event(shared_datastore("./data"), scenario_id)])
     with c2:
         if st.button("Try Live 🌐 (fallback)"):
-            ev = try_live_feed(dest="US")
-            if ev is not None:
-                st.success("Live-lite watcher found a tariff-like bulletin.")
-                st.session_state["last_event"] = ev
+            events = poll_live_feed(dest="US")
+            if events:
+                st.success(f"Live-lite watcher found {len(events)} tariff-like bulletin(s).")
+                set_events(events)
             else:
                 st.warning("No confident live event — using demo scenario.")
-                st.session_state["last_event"] = next_demo_event(DataStore("./data"), scenario_id)
+                set_events([next_demo_event(shared_datastore("./data"), scenario_id)])
     st.caption("Story 1: CN 870830 +15pp • Story 2: duty-on-duty • Story 3: HTS review")
 
 with colC:
     st.subheader("Before / After & Decisions")
-    if st.session_state["last_event"] is None:
+    if not st.session_state["events"]:
         st.info("Click **Run Watcher** or **Try Live** to simulate a tariff bulletin.")
     else:
-        ds = DataStore("./data")
-        pol = Policy("./data/policy.yaml")
-        ev = st.session_state["last_event"]
-        decisions = handle_event(ds, pol, ev, base_route="R-CN-US", price_usd=price)
-
-        for d in decisions:
-            chosen = d.chosen.route_id if d.chosen else "(no option)"
-            st.write(f"**SKU**: {d.sku} • **Route chosen**: `{chosen}` • **Auto**: `{d.auto_executed}` • _{d.reason}_")
+        ds = shared_datastore("./data")
+        pol = get_policy()
+        events, decided = st.session_state["events"], st.session_state["decisions"]
+        for i, ev in enumerate(events):
+            # Streamlit reruns this script on every widget change: decide (and audit) each event once
+            key = (st.session_state["run"], i, price)
+            if key not in decided:
+                decided[key] = handle_event(ds, pol, ev, base_route="R-CN-US", price_usd=price)
+            decisions = decided[key]
+            if len(events) > 1:
+                st.markdown(f"**HS {ev.hs_code} • {ev.origin}→{ev.destination} @ {ev.new_rate_pct:g}%**")
+            for d in decisions:
+                chosen = d.chosen.route_id if d.chosen else "(no option)"
+                st.write(f"**SKU**: {d.sku} • **Route chosen**: `{chosen}` • **Auto**: `{d.auto_executed}` • _{d.reason}_")
         st.success("Run complete. See Top Options & Compliance at right.")
 
 with colR:
     st.subheader("Compliance Queue (HTS Review)")
     queue = get_review_queue()
     if not queue:
-        st.write("✅ No items require HTS review (≥ 0.90 confidence).")
+        st.write(f"✅ No items require HTS review (≥ {get_policy().hts_confidence_lt:.2f} confidence).")
     else:
         for item in queue:
             with st.expander(f"{item.sku} • HTS {item.hts_code} • conf {item.confidence:.2f}"):
@@ -63,5 +81,28 @@ with colR:
 
 st.divider()
 st.subheader("Audit Log (latest)")
-for rec in AUDIT_LOG[-12:]:
+for rec in audit_log().tail(12):
     st.code(f"{rec.sku} | auto={rec.auto_executed} | reason={rec.reason}")
+
+st.divider()
+st.subheader("Instrumentation")
+m1, m2 = st.columns(2)
+with m1:
+    if st.toggle("Stage timers", value=REGISTRY.enabled):
+        REGISTRY.enable()
+    else:
+        REGISTRY.disable()
+with m2:
+    if st.toggle("Sampling profiler", value=PROFILER.running):
+        PROFILER.start()
+    else:
+        PROFILER.stop()
+if REGISTRY.traces:
+    st.caption("Per-event stage breakdown (ms), most recent first")
+    st.dataframe([{"event": t["label"], "total": round(t["total_ms"], 2),
+                   **{k: round(v, 2) for k, v in t["stages"].items()}} for t in reversed(REGISTRY.traces)])
+if PROFILER.samples:
+    st.caption("Profiler: hottest functions (self samples)")
+    st.dataframe([{"function": f, "samples": n} for f, n in PROFILER.top(15)])
+st.download_button("Export Prometheus", REGISTRY.to_prometheus(), file_name="atis_metrics.prom")
+st.download_button("Export JSON", REGISTRY.to_json(), file_name="atis_metrics.json")
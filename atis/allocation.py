@@ -0,0 +1,260 @@
+from __future__ import annotations
+from dataclasses import dataclass
+from typing import Dict, List, Mapping, Optional, Sequence, Tuple
+import numpy as np
+import pandas as pd
+from .cost_engine import compute_costs_batch
+from .data_loader import DataStore
+from .models import SourcingOption, TariffChangeEvent
+from .sourcing import _load_weights
+
+@dataclass
+class Allocation:
+    skus: List[str]
+    supplier_ids: np.ndarray        # object; None where no supplier had room
+    route_ids: np.ndarray           # object; None where unassigned
+    score: np.ndarray               # weighted cost/lead/risk score of the chosen option (nan if unassigned)
+    cost_delta: np.ndarray
+    lead_time_delta: np.ndarray
+    risk: np.ndarray
+    load: Dict[str, float]
+    capacity: Dict[str, float]
+    prices: Dict[str, float]        # supplier prices at the end of the auction; pass back as warm_start
+    rounds: int = 0
+    placed_greedily: int = 0        # SKUs the auction left unplaced within max_rounds that the greedy pass placed
+
+    @property
+    def unassigned(self) -> List[str]:
+        return [s for s, sup in zip(self.skus, self.supplier_ids) if sup is None]
+
+    @property
+    def total_score(self) -> float:
+        return float(np.nansum(self.score))
+
+    def to_frame(self) -> pd.DataFrame:
+        return pd.DataFrame({"sku": self.skus, "supplier_id": self.supplier_ids, "route_id": self.route_ids,
+                             "score": self.score, "cost_delta": self.cost_delta,
+                             "lead_time_delta": self.lead_time_delta, "risk_score": self.risk})
+
+    def options(self) -> List[Optional[SourcingOption]]:
+        out: List[Optional[SourcingOption]] = []
+        for i, sku in enumerate(self.skus):
+            sup = self.supplier_ids[i]
+            if sup is None:
+                out.append(None)
+                continue
+            cd, eta = float(self.cost_delta[i]), float(self.lead_time_delta[i])
+            out.append(SourcingOption(
+                sku=sku, supplier_id=sup, route_id=self.route_ids[i], cost_delta=cd, lead_time_delta=eta,
+                risk_score=float(self.risk[i]),
+                explanation=f"Cost penalty≈{cd:.2f}pp, LeadΔ={eta:.1f}d, Supplier={sup} (capacity-allocated)"))
+        return out
+
+class CapacityAllocator:
+    """Catalog-wide assignment of SKUs to (supplier, route) under supplier capacity.
+
+    Each SKU takes one supplier and one route from that supplier's country. The objective
+    is the SourcingEngine score (cost/lead-time/risk weights from policy.yaml), with lead
+    time and risk taken from the real supplier (risk = 100 - compliance_score, plus an
+    optional "quality" weight on 100 - quality_score), subject to capacity_units_mo.
+
+    Solved as an epsilon-auction (Bertsekas) for the transportation problem: unplaced
+    SKUs bid for their cheapest supplier at current prices, each supplier keeps its
+    highest bidders that fit its capacity and raises its price to the lowest kept bid.
+    The route only depends on the supplier's country, so a bidding round costs
+    O(SKUs x countries), not O(SKUs x suppliers). Anything still unplaced after
+    max_rounds goes to the cheapest supplier with room. Prices from a previous
+    Allocation (warm_start) make re-allocation after an event converge in few rounds.
+    """
+
+    def __init__(self, ds: DataStore, weights: Optional[Dict[str, float]] = None,
+                 policy_yaml_path: str = "./data/policy.yaml"):
+        self.ds = ds
+        self.weights = dict(weights) if weights else _load_weights(policy_yaml_path)
+        sup = ds.suppliers
+        self.supplier_ids = sup["supplier_id"].astype(str).to_numpy(dtype=object)
+        self.capacity = sup["capacity_units_mo"].to_numpy(dtype=float)
+        self.lead = sup["lead_time_days"].to_numpy(dtype=float)
+        self.risk = 100.0 - sup["compliance_score"].to_numpy(dtype=float)
+        self.quality_gap = 100.0 - sup["quality_score"].to_numpy(dtype=float)
+        country = sup["country"].astype(str).to_numpy(dtype=object)
+        self.country_ids, self.country_of = np.unique(country, return_inverse=True)
+        self.lead_by_country = sup.groupby("country")["lead_time_days"].mean()
+
+        graph = ds.route_graph
+        g_pos = {c: g for g, c in enumerate(self.country_ids)}
+        self.route_ids = [r for r in graph.route_ids if graph.origin[r] in g_pos]
+        self.route_country = np.array([g_pos[graph.origin[r]] for r in self.route_ids], dtype=np.intp)
+
+    def _supplier_terms(self, base_route: str) -> Tuple[np.ndarray, np.ndarray]:
+        base_lead = float(self.lead_by_country.get(self.ds.route_graph.origin[base_route], np.nan))
+        eta = self.lead - base_lead
+        w = self.weights
+        a = (w["lead_time_delta"] * np.abs(eta) + w["compliance_risk"] * (self.risk / 10.0)
+             + w.get("quality", 0.0) * (self.quality_gap / 10.0))
+        return a, eta
+
+    def _route_terms(self, skus: List[str], base_route: str, event: TariffChangeEvent | None,
+                     price_usd: float) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Cost penalty per (sku, route), and the best route term and column per (sku, country)."""
+        # per (sku, route) cost penalty, exactly as SourcingEngine.top_k computes it
+        cm = compute_costs_batch(self.ds, skus, [base_route] + self.route_ids, event)
+        cogs = cm.cogs
+        margin_pp_delta = ((price_usd - cogs[:, 1:]) / price_usd - ((price_usd - cogs[:, :1]) / price_usd)) * 100.0
+        cost_delta = np.maximum(0.0, -margin_pp_delta) + 0.0
+        route_term = self.weights["cost_delta"] * cost_delta
+
+        # the route choice only depends on the supplier's country
+        n = len(skus)
+        best = np.full((n, len(self.country_ids)), np.inf)
+        best_route = np.zeros(best.shape, dtype=np.intp)
+        for g in range(len(self.country_ids)):
+            cols = np.flatnonzero(self.route_country == g)
+            if len(cols):
+                j = np.argmin(route_term[:, cols], axis=1)
+                best_route[:, g] = cols[j]
+                best[:, g] = route_term[np.arange(n), cols[j]]
+        return cost_delta, best, best_route
+
+    def score_matrix(self, skus: Sequence[str], base_route: str = "R-CN-US", event: TariffChangeEvent | None = None,
+                     price_usd: float = 25.0) -> np.ndarray:
+        """Unconstrained score of every (sku, supplier) pair, each on its best route; dense, for small inputs."""
+        _, best, _ = self._route_terms(list(skus), base_route, event, price_usd)
+        return best[:, self.country_of] + self._supplier_terms(base_route)[0][None, :]
+
+    def allocate(self, skus: Sequence[str], base_route: str = "R-CN-US", event: TariffChangeEvent | None = None,
+                 price_usd: float = 25.0, demand: Optional[Mapping[str, float] | Sequence[float]] = None,
+                 default_demand: float = 100.0, warm_start: Optional[Allocation] = None, max_rounds: int = 200,
+                 eps_rel: float = 1e-2) -> Allocation:
+        skus = list(skus)
+        n, n_sup = len(skus), len(self.supplier_ids)
+        if demand is None:
+            d = np.full(n, float(default_demand))
+        elif isinstance(demand, Mapping):
+            d = np.array([float(demand.get(s, default_demand)) for s in skus])
+        else:
+            d = np.asarray(demand, dtype=float)
+
+        cost_delta, best, best_route = self._route_terms(skus, base_route, event, price_usd)
+        a, eta = self._supplier_terms(base_route)
+        finite = best[np.isfinite(best)]
+        spread = float(np.ptp(finite) + np.ptp(a)) if len(finite) else 1.0
+        eps = (spread or 1.0) * eps_rel
+        prices = np.zeros(n_sup)
+        chosen = np.full(n, -1, dtype=np.intp)
+        if warm_start is not None:
+            prices = np.array([warm_start.prices.get(s, 0.0) for s in self.supplier_ids])
+            chosen = self._carry_over(warm_start, skus, best, a, d, prices, eps)
+
+        chosen, prices, rounds = self._auction(best, a, d, chosen, prices, eps, spread, max_rounds)
+        leftover = np.flatnonzero(chosen < 0)
+        chosen = self._place_greedily(chosen, leftover, d, best, a)
+
+        rows = np.arange(n)
+        ok = chosen >= 0
+        safe = np.where(ok, chosen, 0)
+        g_of = self.country_of[safe]
+        route_col = best_route[rows, g_of]
+        load = np.bincount(chosen[ok], weights=d[ok], minlength=n_sup)
+        return Allocation(
+            skus=skus,
+            supplier_ids=np.where(ok, self.supplier_ids[safe], None),
+            route_ids=np.where(ok, np.array(self.route_ids, dtype=object)[route_col], None),
+            score=np.where(ok, best[rows, g_of] + a[safe], np.nan),
+            cost_delta=np.where(ok, cost_delta[rows, route_col], np.nan),
+            lead_time_delta=np.where(ok, eta[safe], np.nan),
+            risk=np.where(ok, self.risk[safe], np.nan),
+            load=dict(zip(self.supplier_ids.tolist(), load.tolist())),
+            capacity=dict(zip(self.supplier_ids.tolist(), self.capacity.tolist())),
+            prices=dict(zip(self.supplier_ids.tolist(), prices.tolist())),
+            rounds=rounds, placed_greedily=int(ok[leftover].sum()),
+        )
+
+    def _carry_over(self, prev: Allocation, skus: List[str], best: np.ndarray, a: np.ndarray, d: np.ndarray,
+                    prices: np.ndarray, eps: float) -> np.ndarray:
+        """Previous assignments that are still within eps of the best option at the previous prices."""
+        sup_pos = {s: k for k, s in enumerate(self.supplier_ids)}
+        prev_of = dict(zip(prev.skus, prev.supplier_ids))
+        chosen = np.array([sup_pos.get(prev_of.get(s), -1) for s in skus], dtype=np.intp)
+        held = np.flatnonzero(chosen >= 0)
+        total = a + prices
+        cheapest = np.full(len(self.country_ids), np.inf)
+        np.minimum.at(cheapest, self.country_of, total)
+        k = chosen[held]
+        current = best[held, self.country_of[k]] + total[k]
+        chosen[held[current > (best[held] + cheapest[None, :]).min(axis=1) + eps]] = -1
+        # demand may have grown: release everything on suppliers now over capacity
+        load = np.bincount(chosen[chosen >= 0], weights=d[chosen >= 0], minlength=len(a))
+        chosen[np.isin(chosen, np.flatnonzero(load > self.capacity))] = -1
+        return chosen
+
+    def _auction(self, best: np.ndarray, a: np.ndarray, d: np.ndarray, chosen: np.ndarray, prices: np.ndarray,
+                 eps: float, spread: float, max_rounds: int) -> Tuple[np.ndarray, np.ndarray, int]:
+        n, n_cty = best.shape
+        n_sup, cap, country_of = len(a), self.capacity, self.country_of
+        chosen = chosen.copy()
+        prices = prices.copy()
+        held_bid = np.where(chosen >= 0, prices[np.maximum(chosen, 0)], 0.0)
+        # SKUs with no candidate route, or bigger than every supplier, never bid
+        hopeless = ~np.isfinite(best).any(axis=1) | (d > cap.max(initial=0.0))
+        rounds = 0
+        for rounds in range(1, max_rounds + 1):
+            bidders = np.flatnonzero((chosen < 0) & ~hopeless)
+            if not len(bidders):
+                break
+            # cheapest and second-cheapest supplier per country at current prices
+            c1, c2 = np.full(n_cty, np.inf), np.full(n_cty, np.inf)
+            s1 = np.zeros(n_cty, dtype=np.intp)
+            total = a + prices
+            for g in range(n_cty):
+                members = np.flatnonzero(country_of == g)
+                if len(members):
+                    order = members[np.argsort(total[members], kind="stable")[:2]]
+                    c1[g], s1[g] = total[order[0]], order[0]
+                    if len(order) > 1:
+                        c2[g] = total[order[1]]
+            value = best[bidders] + c1[None, :]
+            g_best = np.argmin(value, axis=1)
+            v1 = value[np.arange(len(bidders)), g_best]
+            value[np.arange(len(bidders)), g_best] = best[bidders, g_best] + c2[g_best]
+            v2 = value.min(axis=1)
+            target = s1[g_best]
+            margin = np.where(np.isfinite(v2), v2 - v1, spread)
+            bid = prices[target] + margin + eps
+
+            # each targeted supplier keeps its highest bids (holders included) that fit its capacity
+            targeted = np.unique(target)
+            holders = np.flatnonzero(np.isin(chosen, targeted))
+            cand = np.r_[holders, bidders]
+            cand_sup = np.r_[chosen[holders], target]
+            cand_bid = np.r_[held_bid[holders], bid]
+            order = np.lexsort((-cand_bid, cand_sup))
+            cand, cand_sup, cand_bid = cand[order], cand_sup[order], cand_bid[order]
+            cum = np.cumsum(d[cand])
+            group_start = np.r_[0, np.flatnonzero(cand_sup[1:] != cand_sup[:-1]) + 1]
+            offset = np.repeat(cum[group_start] - d[cand[group_start]], np.diff(np.r_[group_start, len(cand)]))
+            keep = cum - offset <= cap[cand_sup]
+
+            chosen[cand[~keep]] = -1
+            chosen[cand[keep]] = cand_sup[keep]
+            held_bid[cand[keep]] = cand_bid[keep]
+            full = np.unique(cand_sup[~keep])
+            if len(full):
+                kept_min = np.full(n_sup, np.inf)
+                np.minimum.at(kept_min, cand_sup[keep], cand_bid[keep])
+                prices[full] = np.where(np.isfinite(kept_min[full]), kept_min[full], prices[full])
+        return chosen, prices, rounds
+
+    def _place_greedily(self, chosen: np.ndarray, rows: np.ndarray, d: np.ndarray, best: np.ndarray,
+                        a: np.ndarray) -> np.ndarray:
+        """Put each leftover SKU on its cheapest supplier with room (largest demand first); -1 if none."""
+        chosen = chosen.copy()
+        placed = chosen >= 0
+        load = np.bincount(chosen[placed], weights=d[placed], minlength=len(a))
+        for i in rows[np.argsort(-d[rows], kind="stable")]:
+            cost = np.where(load + d[i] <= self.capacity, best[i, self.country_of] + a, np.inf)
+            k = int(np.argmin(cost))
+            if np.isfinite(cost[k]):
+                chosen[i] = k
+                load[k] += d[i]
+        return chosen
@@ -0,0 +1,172 @@
+from __future__ import annotations
+import json, os, sqlite3, threading, time
+from typing import Dict, List, Optional, Sequence
+from .models import DecisionRecord, SourcingOption, TariffChangeEvent
+
+class AuditEntry:
+    """One decision as stored: the event is referenced by id, not embedded."""
+    __slots__ = ("seq", "ts", "sku", "event_id", "route_id", "supplier_id", "cost_delta", "lead_time_delta",
+                 "risk_score", "explanation", "auto_executed", "reason")
+
+    def __init__(self, seq, ts, sku, event_id, route_id, supplier_id, cost_delta, lead_time_delta, risk_score,
+                 explanation, auto_executed, reason):
+        self.seq, self.ts, self.sku, self.event_id = seq, ts, sku, event_id
+        self.route_id, self.supplier_id = route_id, supplier_id
+        self.cost_delta, self.lead_time_delta, self.risk_score = cost_delta, lead_time_delta, risk_score
+        self.explanation, self.auto_executed, self.reason = explanation, bool(auto_executed), reason
+
+    def __repr__(self) -> str:
+        return f"AuditEntry(seq={self.seq}, sku={self.sku!r}, event_id={self.event_id}, auto={self.auto_executed})"
+
+_SELECT = ("SELECT d.seq, d.ts, d.sku, d.event_id, d.route_id, d.supplier_id, d.cost_delta, d.lead_time_delta,"
+           " d.risk_score, d.explanation, d.auto, r.text FROM decisions d JOIN reasons r ON r.id = d.reason_id")
+
+class AuditStore:
+    """Append-only decision log backed by SQLite (WAL).
+
+    Events and reason strings are interned into their own tables, so a run that
+    decides 10k SKUs for one event stores the event once. Each append() is a single
+    transaction; queries hit indexes on sku, event, time and auto_executed.
+    The connection is opened on first use.
+    """
+
+    def __init__(self, path: str = "./cache/audit.sqlite"):
+        self.path = path
+        self._lock = threading.Lock()
+        self._db: Optional[sqlite3.Connection] = None
+        self._event_ids: Dict[str, int] = {}
+        self._events: Dict[int, TariffChangeEvent] = {}
+        self._reason_ids: Dict[str, int] = {}
+
+    def _conn(self) -> sqlite3.Connection:
+        if self._db is None:
+            if self.path != ":memory:":
+                os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            db = sqlite3.connect(self.path, check_same_thread=False)
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("PRAGMA synchronous=NORMAL")
+            db.executescript("""
+                CREATE TABLE IF NOT EXISTS events (id INTEGER PRIMARY KEY, key TEXT UNIQUE NOT NULL);
+                CREATE TABLE IF NOT EXISTS reasons (id INTEGER PRIMARY KEY, text TEXT UNIQUE NOT NULL);
+                CREATE TABLE IF NOT EXISTS decisions (
+                    seq INTEGER PRIMARY KEY, ts REAL NOT NULL, sku TEXT NOT NULL, event_id INTEGER NOT NULL,
+                    route_id TEXT, supplier_id TEXT, cost_delta REAL, lead_time_delta REAL, risk_score REAL,
+                    explanation TEXT, auto INTEGER NOT NULL, reason_id INTEGER NOT NULL);
+                CREATE INDEX IF NOT EXISTS decisions_sku ON decisions(sku, seq);
+                CREATE INDEX IF NOT EXISTS decisions_event ON decisions(event_id, seq);
+                CREATE INDEX IF NOT EXISTS decisions_ts ON decisions(ts);
+                CREATE INDEX IF NOT EXISTS decisions_auto ON decisions(auto, seq);
+            """)
+            db.commit()
+            self._reason_ids = {t: i for i, t in db.execute("SELECT id, text FROM reasons")}
+            self._db = db
+        return self._db
+
+    def __enter__(self) -> "AuditStore":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn().execute("SELECT COUNT(*) FROM decisions").fetchone()[0]
+
+    def _intern_event(self, db: sqlite3.Connection, ev: TariffChangeEvent) -> int:
+        key = json.dumps(ev.model_dump(), sort_keys=True)
+        eid = self._event_ids.get(key)
+        if eid is None:
+            db.execute("INSERT OR IGNORE INTO events (key) VALUES (?)", (key,))
+            eid = self._event_ids[key] = db.execute("SELECT id FROM events WHERE key = ?", (key,)).fetchone()[0]
+            self._events[eid] = ev
+        return eid
+
+    def _intern_reason(self, db: sqlite3.Connection, text: str) -> int:
+        rid = self._reason_ids.get(text)
+        if rid is None:
+            db.execute("INSERT OR IGNORE INTO reasons (text) VALUES (?)", (text,))
+            rid = self._reason_ids[text] = db.execute("SELECT id FROM reasons WHERE text = ?", (text,)).fetchone()[0]
+        return rid
+
+    def append(self, decisions: Sequence[DecisionRecord], ts: Optional[float] = None) -> int:
+        """Write a batch of decisions in one transaction; returns the number written."""
+        if not decisions:
+            return 0
+        ts = time.time() if ts is None else ts
+        with self._lock:
+            db = self._conn()
+            known_events, known_reasons = set(self._event_ids), set(self._reason_ids)
+            try:
+                with db:
+                    rows = []
+                    for d in decisions:
+                        c = d.chosen
+                        rows.append((ts, d.sku, self._intern_event(db, d.event),
+                                     *((c.route_id, c.supplier_id, c.cost_delta, c.lead_time_delta, c.risk_score,
+                                        c.explanation) if c is not None else (None,) * 6),
+                                     int(d.auto_executed), self._intern_reason(db, d.reason)))
+                    db.executemany(
+                        "INSERT INTO decisions (ts, sku, event_id, route_id, supplier_id, cost_delta, lead_time_delta,"
+                        " risk_score, explanation, auto, reason_id) VALUES (?,?,?,?,?,?,?,?,?,?,?)", rows)
+            except BaseException:
+                # the rollback discarded the rows interned above; forget their ids so a retry re-inserts them
+                for key in set(self._event_ids) - known_events:
+                    self._events.pop(self._event_ids.pop(key), None)
+                for text in set(self._reason_ids) - known_reasons:
+                    del self._reason_ids[text]
+                raise
+        return len(rows)
+
+    def query(self, sku: Optional[str] = None, event_id: Optional[int] = None, since: Optional[float] = None,
+              until: Optional[float] = None, auto_executed: Optional[bool] = None,
+              limit: Optional[int] = None) -> List[AuditEntry]:
+        """Entries matching every given filter, oldest first; `limit` keeps the newest ones."""
+        where, args = [], []
+        for clause, value in (("d.sku = ?", sku), ("d.event_id = ?", event_id), ("d.ts >= ?", since),
+                              ("d.ts < ?", until), ("d.auto = ?", None if auto_executed is None else int(auto_executed))):
+            if value is not None:
+                where.append(clause)
+                args.append(value)
+        sql = _SELECT + (" WHERE " + " AND ".join(where) if where else "") + " ORDER BY d.seq DESC"
+        if limit is not None:
+            sql += " LIMIT ?"
+            args.append(int(limit))
+        with self._lock:
+            rows = self._conn().execute(sql, args).fetchall()
+        return [AuditEntry(*r) for r in reversed(rows)]
+
+    def tail(self, n: int = 12) -> List[AuditEntry]:
+        """The last n entries, oldest first; reads only those rows."""
+        return self.query(limit=n)
+
+    def event(self, event_id: int) -> TariffChangeEvent:
+        ev = self._events.get(event_id)
+        if ev is None:
+            with self._lock:
+                key = self._conn().execute("SELECT key FROM events WHERE id = ?", (event_id,)).fetchone()[0]
+            ev = self._events[event_id] = TariffChangeEvent(**json.loads(key))
+        return ev
+
+    def event_id(self, event: TariffChangeEvent) -> Optional[int]:
+        key = json.dumps(event.model_dump(), sort_keys=True)
+        if key not in self._event_ids:
+            with self._lock:
+                row = self._conn().execute("SELECT id FROM events WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            self._event_ids[key] = row[0]
+        return self._event_ids[key]
+
+    def record(self, e: AuditEntry) -> DecisionRecord:
+        """Rehydrate the full pydantic record; events are shared between records of the same event."""
+        chosen = None if e.route_id is None else SourcingOption(
+            sku=e.sku, supplier_id=e.supplier_id, route_id=e.route_id, cost_delta=e.cost_delta,
+            lead_time_delta=e.lead_time_delta, risk_score=e.risk_score, explanation=e.explanation)
+        return DecisionRecord(sku=e.sku, event=self.event(e.event_id), chosen=chosen,
+                              auto_executed=e.auto_executed, reason=e.reason)
+
+    def close(self) -> None:
+        with self._lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
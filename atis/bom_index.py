@@ -0,0 +1,77 @@
+from __future__ import annotations
+from typing import Dict, List, Optional, Sequence
+import numpy as np
+import pandas as pd
+
+class BomIndex:
+    """Array-backed per-SKU BOM aggregates plus an HS -> SKU inverted index.
+
+    SKUs are numbered in order of first appearance in the BOM. Components of SKU i are
+    rows order[starts[i]:starts[i] + counts[i]] of the BOM, and SKUs carrying HS code j are
+    sku_ids[hs_skus[hs_offsets[j]:hs_offsets[j + 1]]], also in first-appearance order.
+    Every field is a flat array, so the whole index can be persisted and memory-mapped.
+    """
+
+    FIELDS = ("sku_ids", "materials", "primary_hts", "order", "starts", "counts", "hs_ids", "hs_offsets", "hs_skus")
+
+    def __init__(self, sku_ids: np.ndarray, materials: np.ndarray, primary_hts: np.ndarray, order: np.ndarray,
+                 starts: np.ndarray, counts: np.ndarray, hs_ids: np.ndarray, hs_offsets: np.ndarray, hs_skus: np.ndarray):
+        self.sku_ids, self.materials, self.primary_hts = sku_ids, materials, primary_hts
+        self.order, self.starts, self.counts = order, starts, counts
+        self.hs_ids, self.hs_offsets, self.hs_skus = hs_ids, hs_offsets, hs_skus
+        self._pos: Dict[str, int] = dict(zip(sku_ids.tolist(), range(len(sku_ids))))
+        self._hs_pos: Dict[str, int] = dict(zip(hs_ids.tolist(), range(len(hs_ids))))
+
+    @classmethod
+    def from_frame(cls, bom: pd.DataFrame) -> "BomIndex":
+        sku_codes, sku_ids = pd.factorize(bom["sku"].to_numpy(dtype=object))
+        n = len(sku_ids)
+        line = (bom["qty_per"] * bom["unit_cost_usd"]).to_numpy(dtype=float)
+        materials = pd.Series(line).groupby(sku_codes, sort=True).sum().to_numpy()
+        hts = bom["hts_code"].astype(str).to_numpy(dtype=object)
+        _, first_row = np.unique(sku_codes, return_index=True)
+        counts = np.bincount(sku_codes, minlength=n)
+        starts = np.cumsum(counts) - counts
+
+        pairs = pd.DataFrame({"hs": hts, "sku": sku_codes}).drop_duplicates()
+        hs_codes, hs_ids = pd.factorize(pairs["hs"].to_numpy(dtype=object))
+        by_hs = np.argsort(hs_codes, kind="stable")
+        hs_counts = np.bincount(hs_codes, minlength=len(hs_ids))
+        return cls(
+            sku_ids=np.asarray(sku_ids, dtype=object), materials=materials, primary_hts=hts[first_row],
+            order=np.argsort(sku_codes, kind="stable"), starts=starts, counts=counts,
+            hs_ids=np.asarray(hs_ids, dtype=object), hs_offsets=np.r_[0, np.cumsum(hs_counts)],
+            hs_skus=pairs["sku"].to_numpy()[by_hs],
+        )
+
+    def arrays(self) -> Dict[str, np.ndarray]:
+        return {f: getattr(self, f) for f in self.FIELDS}
+
+    def __len__(self) -> int:
+        return len(self.sku_ids)
+
+    def __contains__(self, sku: str) -> bool:
+        return sku in self._pos
+
+    def position(self, sku: str) -> int:
+        return self._pos[sku]
+
+    def positions(self, skus: Sequence[str]) -> np.ndarray:
+        missing = [s for s in skus if s not in self._pos]
+        if missing:
+            raise KeyError(f"SKUs not in BOM: {sorted(set(missing))}")
+        return np.fromiter((self._pos[s] for s in skus), dtype=np.intp, count=len(skus))
+
+    def rows(self, sku: str) -> Optional[slice]:
+        """Positions (into `order`) of the SKU's components, or None for an unknown SKU."""
+        i = self._pos.get(sku)
+        if i is None:
+            return None
+        a = int(self.starts[i])
+        return slice(a, a + int(self.counts[i]))
+
+    def skus_by_hs(self, hs_code: str) -> List[str]:
+        j = self._hs_pos.get(hs_code)
+        if j is None:
+            return []
+        return self.sku_ids[self.hs_skus[self.hs_offsets[j]:self.hs_offsets[j + 1]]].tolist()
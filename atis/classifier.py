@@ -0,0 +1,97 @@
+from __future__ import annotations
+import threading, time
+from collections import OrderedDict
+from concurrent.futures import Executor
+from typing import Callable, Dict, List, NamedTuple, Optional, Protocol, Sequence, Tuple
+import numpy as np
+from .data_loader import DataStore
+from .models import HTSClassification
+
+class ClassifyRequest(NamedTuple):
+    sku: str
+    hts_code: str
+    description: str
+    bom_hash: int = 0           # DataStore.bom_hashes; any BOM edit to the SKU changes it
+
+class HTSClassifier(Protocol):
+    def classify_batch(self, items: Sequence[ClassifyRequest]) -> List[HTSClassification]: ...
+
+class NaiveClassifier:
+    """The demo heuristic: six-plus digit codes are trusted, shorter ones are sent to review."""
+
+    def classify_batch(self, items: Sequence[ClassifyRequest]) -> List[HTSClassification]:
+        return [HTSClassification(sku=it.sku, hts_code=it.hts_code,
+                                  confidence=0.93 if it.hts_code and len(it.hts_code) >= 6 else 0.82,
+                                  rationale="few-shot match (demo)") for it in items]
+
+def classify_requests(ds: DataStore, skus: Sequence[str]) -> List[ClassifyRequest]:
+    """One request per SKU from its primary (first) BOM component."""
+    idx = ds.bom_index
+    pos = idx.positions(skus)
+    first = idx.order[idx.starts[pos]]
+    desc = ds.bom["description"].to_numpy(dtype=object)[first]
+    return [ClassifyRequest(s, h, str(d), int(b))
+            for s, h, d, b in zip(skus, idx.primary_hts[pos], desc, ds.bom_hashes[pos].tolist())]
+
+class CachedClassifier:
+    """LRU + TTL memo in front of an HTSClassifier, keyed by (sku, bom_hash).
+
+    Misses are split into batches of `batch_size` and sent to `executor` (a thread or
+    process pool; inline when None). With a process pool the inner classifier must pickle.
+    """
+
+    def __init__(self, inner: HTSClassifier, maxsize: int = 100_000, ttl_s: Optional[float] = None,
+                 executor: Optional[Executor] = None, batch_size: int = 256,
+                 clock: Callable[[], float] = time.monotonic):
+        self.inner, self.maxsize, self.ttl_s = inner, maxsize, ttl_s
+        self.executor, self.batch_size, self.clock = executor, batch_size, clock
+        self._cache: "OrderedDict[Tuple[str, int], Tuple[float, HTSClassification]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._cache)
+
+    def stats(self) -> Dict[str, int]:
+        return {"entries": len(self._cache), "hits": self.hits, "misses": self.misses}
+
+    def clear(self) -> None:
+        with self._lock:
+            self._cache.clear()
+
+    def classify(self, items: Sequence[ClassifyRequest]) -> List[HTSClassification]:
+        now = self.clock()
+        out: List[Optional[HTSClassification]] = [None] * len(items)
+        todo: Dict[Tuple[str, int], List[int]] = {}
+        with self._lock:
+            for i, it in enumerate(items):
+                key = (it.sku, it.bom_hash)
+                hit = self._cache.get(key)
+                if hit is not None and hit[0] > now:
+                    self._cache.move_to_end(key)
+                    out[i] = hit[1]
+                else:
+                    todo.setdefault(key, []).append(i)
+            self.hits += len(items) - sum(len(v) for v in todo.values())
+            self.misses += len(todo)
+        if not todo:
+            return out
+
+        pending = [items[v[0]] for v in todo.values()]
+        batches = [pending[i:i + self.batch_size] for i in range(0, len(pending), self.batch_size)]
+        if self.executor is None or len(batches) == 1:
+            results = [self.inner.classify_batch(b) for b in batches]
+        else:
+            results = list(self.executor.map(self.inner.classify_batch, batches))
+
+        expires = np.inf if self.ttl_s is None else now + self.ttl_s
+        with self._lock:
+            for it, cls in zip(pending, (c for batch in results for c in batch)):
+                key = (it.sku, it.bom_hash)
+                self._cache[key] = (expires, cls)
+                self._cache.move_to_end(key)
+                for i in todo[key]:
+                    out[i] = cls
+            while len(self._cache) > self.maxsize:
+                self._cache.popitem(last=False)
+        return out
@@ -0,0 +1,69 @@
+from __future__ import annotations
+from typing import Dict, Optional, Sequence, Tuple
+import numpy as np
+import pandas as pd
+from .cost_engine import CostMatrix
+from .data_loader import DataStore
+from .models import TariffChangeEvent
+from .tariff_index import TariffIndex, overlay_events
+
+def component_rows(ds: DataStore, skus: Sequence[str]) -> Tuple[np.ndarray, np.ndarray]:
+    """BOM row numbers of the SKUs' components, grouped by SKU in `skus` order, and each SKU's first offset."""
+    idx = ds.bom_index
+    pos = idx.positions(skus)
+    counts, starts = idx.counts[pos], idx.starts[pos]
+    seg = np.cumsum(counts) - counts
+    offs = np.repeat(starts - seg, counts) + np.arange(int(counts.sum()))
+    return idx.order[offs], seg
+
+def compute_component_costs_batch(ds: DataStore, skus: Sequence[str], route_ids: Sequence[str],
+                                  event: TariffChangeEvent | None = None, as_of=None,
+                                  tariffs: Optional[TariffIndex] = None, component_origin: bool = True) -> CostMatrix:
+    """Duties per component (own HTS code, own origin), stacked leg by leg, summed per SKU.
+
+    Each component carries its line value plus the same 5% freight as the SKU-level model.
+    With component_origin, the first leg is rated from the component's origin_country
+    rather than the route's origin; later legs are re-exports from the hub. An event is
+    applied as a what-if overlay on the tariff index rather than replacing every HS code.
+    Rates are gathered per distinct (hs, leg) pair, never per component.
+    """
+    skus, route_ids = list(skus), list(route_ids)
+    index = ds.tariff_index if tariffs is None else tariffs
+    if event is not None:
+        index = overlay_events(index, [event])
+
+    rows, seg = component_rows(ds, skus)
+    bom = ds.bom
+    line = bom["qty_per"].to_numpy(dtype=float)[rows] * bom["unit_cost_usd"].to_numpy(dtype=float)[rows]
+    hs_c, hs_codes = pd.factorize(bom["hts_code"].to_numpy(dtype=object)[rows])
+    org_c, origins = pd.factorize(bom["origin_country"].to_numpy(dtype=object)[rows])
+    landed = line + 0.05 * line
+
+    by_pair: Dict[Tuple[str, str], np.ndarray] = {}        # (o, d) -> rate per HS code
+    by_dest: Dict[str, np.ndarray] = {}                    # d -> rate per (HS code, component origin)
+
+    def pair_rates(o: str, d: str) -> np.ndarray:
+        if (o, d) not in by_pair:
+            by_pair[(o, d)] = np.array([index.rate(str(h), o, d, as_of) for h in hs_codes], dtype=float)
+        return by_pair[(o, d)]
+
+    def origin_rates(d: str) -> np.ndarray:
+        if d not in by_dest:
+            by_dest[d] = np.array([[index.rate(str(h), str(o), d, as_of) for o in origins] for h in hs_codes],
+                                  dtype=float).reshape(len(hs_codes), len(origins))
+        return by_dest[d]
+
+    duties = np.zeros((len(skus), len(route_ids)))
+    for r, route in enumerate(route_ids):
+        value = landed.copy()
+        comp_duties = np.zeros_like(value)
+        for j, (o, d) in enumerate(ds.route_graph.legs[route]):
+            rate = origin_rates(d)[hs_c, org_c] if j == 0 and component_origin else pair_rates(o, d)[hs_c]
+            duty = value * (rate / 100.0)
+            comp_duties += duty
+            value += duty
+        if len(rows):
+            duties[:, r] = np.add.reduceat(comp_duties, seg)
+
+    materials = ds.bom_index.materials[ds.bom_index.positions(skus)]
+    return CostMatrix(skus=skus, route_ids=route_ids, materials=materials, freight=0.05 * materials, duties=duties)
@@ -1,28 +1,29 @@
 from __future__ import annotations
-from typing import Dict
-import json
+import threading, weakref
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Sequence, Set, Tuple
+import numpy as np
+import pandas as pd
 from .data_loader import DataStore
+from .tariff_index import TariffIndex, TariffKey
 from .models import CostBreakdown, TariffChangeEvent
 
 def _duty_on_value(value_usd: float, rate_pct: float) -> float:
     return value_usd * (rate_pct/100.0)
 
 def compute_cost_for_route(ds: DataStore, sku: str, route_id: str, event: TariffChangeEvent | None) -> Dict[str, float]:
-    comps = ds.get_components(sku)
-    materials = float((comps["qty_per"] * comps["unit_cost_usd"]).sum())
+    materials = ds.sku_materials(sku)
     freight = 0.05 * materials  # toy assumption; replace with your own model
     duties = 0.0
 
-    legs = ds.routes.set_index("route_id").loc[route_id, "legs"]
-    if isinstance(legs, str):
-        legs = json.loads(legs)
+    legs = ds.route_graph.legs[route_id]
 
     value = materials + freight
     # Use affected HS from event or first component HS
-    hs = str(event.hs_code) if event else str(comps.iloc[0]["hts_code"])
+    hs = str(event.hs_code) if event else ds.primary_hts(sku)
 
-    for leg in legs:
-        origin, dest = leg.split("->")
+    for origin, dest in legs:
         rate = ds.latest_tariff(hs, origin, dest)
         duty = _duty_on_value(value, rate)
         duties += duty
@@ -40,13 +41,8 @@ def compare_base_vs_option(ds: DataStore, sku: str, base_route: str, opt_route:
     margin_pp_delta = (margin_opt - margin_base) * 100.0
 
     # Lead-time proxy: use origin country’s mean lead time
-    base_legs = ds.routes.set_index("route_id").loc[base_route, "legs"]
-    if isinstance(base_legs, str): base_legs = json.loads(base_legs)
-    base_origin = base_legs[0].split("->")[0]
-
-    opt_legs = ds.routes.set_index("route_id").loc[opt_route, "legs"]
-    if isinstance(opt_legs, str): opt_legs = json.loads(opt_legs)
-    opt_origin = opt_legs[0].split("->")[0]
+    base_origin = ds.route_graph.origin[base_route]
+    opt_origin = ds.route_graph.origin[opt_route]
 
     lt_base = float(ds.suppliers[ds.suppliers["country"] == base_origin]["lead_time_days"].mean())
     lt_opt  = float(ds.suppliers[ds.suppliers["country"] == opt_origin]["lead_time_days"].mean())
@@ -56,3 +52,191 @@ def compare_base_vs_option(ds: DataStore, sku: str, base_route: str, opt_route:
         sku=sku, cogs_usd=opt["cogs"], margin_pp_delta=margin_pp_delta,
         eta_days_delta=eta_delta, components=opt
     )
+
+# --- Batch engine: all SKUs x routes in a handful of array ops ---
+@dataclass
+class CostMatrix:
+    skus: List[str]
+    route_ids: List[str]
+    materials: np.ndarray       # (n_sku,)
+    freight: np.ndarray         # (n_sku,)
+    duties: np.ndarray          # (n_sku, n_route)
+
+    @property
+    def cogs(self) -> np.ndarray:
+        return (self.materials + self.freight)[:, None] + self.duties
+
+    def row(self, sku: str, route_id: str) -> Dict[str, float]:
+        i, j = self.skus.index(sku), self.route_ids.index(route_id)
+        return {"materials": float(self.materials[i]), "freight": float(self.freight[i]),
+                "duties": float(self.duties[i, j]), "cogs": float(self.cogs[i, j])}
+
+    def to_frame(self) -> pd.DataFrame:
+        n_sku, n_route = self.duties.shape
+        return pd.DataFrame({
+            "sku": np.repeat(self.skus, n_route),
+            "route_id": np.tile(self.route_ids, n_sku),
+            "materials": np.repeat(self.materials, n_route),
+            "freight": np.repeat(self.freight, n_route),
+            "duties": self.duties.ravel(),
+            "cogs": self.cogs.ravel(),
+        })
+
+def leg_rate_tensor(ds: DataStore, hs_codes: Sequence[str], route_ids: Sequence[str], as_of=None,
+                    tariffs: Optional[TariffIndex] = None) -> np.ndarray:
+    """Rates (pct) per (hs, route, leg position); routes shorter than the longest are padded with 0.
+
+    `tariffs` overrides ds.tariff_index, e.g. with a what-if TariffOverlay.
+    """
+    legs = [ds.route_graph.legs[r] for r in route_ids]
+    depth = max((len(l) for l in legs), default=0)
+    rates = np.zeros((len(hs_codes), len(route_ids), depth))
+    idx = ds.tariff_index if tariffs is None else tariffs
+    for h, hs in enumerate(hs_codes):
+        for r, route_legs in enumerate(legs):
+            for j, (origin, dest) in enumerate(route_legs):
+                rates[h, r, j] = idx.rate(hs, origin, dest, as_of)
+    return rates
+
+def compute_costs_batch(ds: DataStore, skus: Sequence[str], route_ids: Sequence[str],
+                        event: TariffChangeEvent | None = None, as_of=None,
+                        tariffs: Optional[TariffIndex] = None) -> CostMatrix:
+    skus, route_ids = list(skus), list(route_ids)
+    idx = ds.bom_index
+    pos = idx.positions(skus)
+    materials = idx.materials[pos]
+    freight = 0.05 * materials  # toy assumption; replace with your own model
+
+    # Use affected HS from event or first component HS
+    if event:
+        hs_codes, hs_idx = [str(event.hs_code)], np.zeros(len(skus), dtype=np.intp)
+    else:
+        codes, uniques = pd.factorize(idx.primary_hts[pos])
+        hs_codes, hs_idx = list(uniques), codes
+
+    rates = leg_rate_tensor(ds, hs_codes, route_ids, as_of, tariffs)
+    # duty-on-duty: walk leg positions, each leg taxes the value carried so far
+    value = np.repeat((materials + freight)[:, None], len(route_ids), axis=1)
+    duties = np.zeros_like(value)
+    for j in range(rates.shape[2]):
+        duty = value * (rates[hs_idx, :, j] / 100.0)
+        duties += duty
+        value += duty
+    return CostMatrix(skus=skus, route_ids=route_ids, materials=materials, freight=freight, duties=duties)
+
+# --- Incremental repricing: cached (sku, route) cells with a tariff-key dependency index ---
+CellKey = Tuple[str, str, str]      # (sku, route_id, hs_code used for duties)
+
+class CostCache:
+    """Cost cells per (sku, route, hs) for latest-rate costing.
+
+    Each cell records the (hs_code, origin, destination) leg keys it read, so a tariff
+    change only evicts the cells that consumed the changed keys. BOM changes evict everything.
+    Beyond maxsize cells the least recently used are dropped, dependency entries included.
+    """
+
+    def __init__(self, maxsize: int = 250_000):
+        self.maxsize = maxsize
+        self._cells: "OrderedDict[CellKey, Tuple[Tuple[float, float, float, float], Tuple[TariffKey, ...]]]" = OrderedDict()
+        self._deps: Dict[TariffKey, Set[CellKey]] = {}
+        self._lock = threading.Lock()
+        self._generation = 0            # bumped by every invalidation; cells priced across one are not stored
+        self.hits = self.misses = self.invalidations = self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self._cells)
+
+    def stats(self) -> Dict[str, int]:
+        return {"cells": len(self._cells), "hits": self.hits, "misses": self.misses,
+                "invalidations": self.invalidations, "evictions": self.evictions,
+                "dep_keys": len(self._deps)}
+
+    def on_change(self, kind: str, keys: Optional[List[TariffKey]]) -> None:
+        if kind == "tariffs":
+            self.invalidate(keys or [])
+        else:
+            self.clear()
+
+    def _drop(self, cell: CellKey) -> bool:
+        """Remove a cell and its entries in every dependency set it joined (caller holds the lock)."""
+        entry = self._cells.pop(cell, None)
+        if entry is None:
+            return False
+        for key in entry[1]:
+            dependents = self._deps.get(key)
+            if dependents is not None:
+                dependents.discard(cell)
+                if not dependents:
+                    del self._deps[key]
+        return True
+
+    def invalidate(self, keys: Iterable[TariffKey]) -> int:
+        removed = 0
+        with self._lock:
+            self._generation += 1
+            for key in keys:
+                for cell in list(self._deps.get(key, ())):
+                    removed += self._drop(cell)
+            self.invalidations += removed
+        return removed
+
+    def clear(self) -> None:
+        with self._lock:
+            self._generation += 1
+            self.invalidations += len(self._cells)
+            self._cells.clear()
+            self._deps.clear()
+
+    def costs(self, ds: DataStore, sku: str, route_ids: Sequence[str], event: TariffChangeEvent | None) -> np.ndarray:
+        """(n_route, 4) array of materials, freight, duties, cogs; only missing cells are priced."""
+        hs = str(event.hs_code) if event else ds.primary_hts(sku)
+        out = np.empty((len(route_ids), 4))
+        missing: List[int] = []
+        cells = self._cells
+        with self._lock:
+            for j, r in enumerate(route_ids):
+                key = (sku, r, hs)
+                entry = cells.get(key)
+                if entry is None:
+                    missing.append(j)
+                else:
+                    cells.move_to_end(key)
+                    out[j] = entry[0]
+            self.hits += len(route_ids) - len(missing)
+            self.misses += len(missing)
+            generation = self._generation
+        if not missing:
+            return out
+
+        miss_routes = [route_ids[j] for j in missing]
+        cm = compute_costs_batch(ds, [sku], miss_routes, event)
+        cogs = cm.cogs[0]
+        m, f = float(cm.materials[0]), float(cm.freight[0])
+        legs = ds.route_graph.legs
+        with self._lock:
+            # an invalidation while we priced may have changed the rates we read: answer, but don't cache
+            store = generation == self._generation
+            for pos, (j, r) in enumerate(zip(missing, miss_routes)):
+                cell = (m, f, float(cm.duties[0, pos]), float(cogs[pos]))
+                out[j] = cell
+                if not store:
+                    continue
+                key = (sku, r, hs)
+                self._drop(key)         # another thread may have stored it meanwhile
+                deps = tuple((hs, o, d) for o, d in legs[r])
+                cells[key] = (cell, deps)
+                for dep in deps:
+                    self._deps.setdefault(dep, set()).add(key)
+            while len(cells) > self.maxsize:
+                self._drop(next(iter(cells)))
+                self.evictions += 1
+        return out
+
+_CACHES: "weakref.WeakKeyDictionary[DataStore, CostCache]" = weakref.WeakKeyDictionary()
+
+def cost_cache_for(ds: DataStore) -> CostCache:
+    cache = _CACHES.get(ds)
+    if cache is None:
+        cache = _CACHES[ds] = CostCache()
+        ds.subscribe(cache.on_change)
+    return cache
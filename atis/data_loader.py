@@ -1,28 +1,174 @@
 from __future__ import annotations
+import threading
+import numpy as np
 import pandas as pd
 from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+from .bom_index import BomIndex
+from .route_graph import RouteGraph
+from .tariff_index import TariffIndex, TariffKey
+
+TARIFF_BATCH_CHUNK = 64         # buffered append_tariffs batches merged into one frame at this count
+
+SOURCES = {"bom": "bom.csv", "suppliers": "suppliers.csv", "routes": "routes.csv",
+           "tariffs": "tariffs.csv", "scenarios": "scenarios.csv"}
+
+def read_csv_tables(root: str) -> Dict[str, pd.DataFrame]:
+    p = Path(root)
+    tables = {name: pd.read_csv(p / fname) for name, fname in SOURCES.items() if name != "tariffs"}
+    tables["tariffs"] = pd.read_csv(p / "tariffs.csv", parse_dates=["effective_date"])
+    return tables
 
 class DataStore:
-    def __init__(self, root: str = "./data"):
-        p = Path(root)
-        self.bom = pd.read_csv(p / "bom.csv")
-        self.suppliers = pd.read_csv(p / "suppliers.csv")
-        self.routes = pd.read_csv(p / "routes.csv")
-        self.tariffs = pd.read_csv(p / "tariffs.csv", parse_dates=["effective_date"])
-        self.scenarios = pd.read_csv(p / "scenarios.csv")
+    def __init__(self, root: str = "./data", snapshot: bool = False):
+        """snapshot=True loads a memory-mapped columnar snapshot (atis.snapshot), rebuilding it if the CSVs changed."""
+        self.root, self.snapshot = root, snapshot
+        self._listeners: List[Callable[[str, Optional[List[TariffKey]]], None]] = []
+        if snapshot:
+            from .snapshot import load_snapshot
+            tables, self.tariff_index, bom_index = load_snapshot(root)
+        else:
+            tables, self.tariff_index, bom_index = read_csv_tables(root), None, None
+        self.bom = tables["bom"]
+        self.suppliers = tables["suppliers"]
+        self.routes = tables["routes"]
+        self._tariffs = tables["tariffs"]
+        self._tariff_batches: List[pd.DataFrame] = []      # appended rows not yet concatenated into _tariffs
+        self.scenarios = tables["scenarios"]
         # normalize types
         self.bom["hts_code"] = self.bom["hts_code"].astype(str)
+        self._index_bom(bom_index)
+        if not isinstance(self._tariffs["hs_code"].dtype, pd.CategoricalDtype):
+            self._tariffs["hs_code"] = self._tariffs["hs_code"].astype(str)
+        if self.tariff_index is None:
+            self.tariff_index = TariffIndex.from_frame(self._tariffs)
+        self._loaded_tariffs = len(self._tariffs)
+        self.route_graph = RouteGraph.from_frame(self.routes)
+
+    # --- BOM: per-SKU aggregates and an HS -> SKU inverted index, rebuilt whenever the BOM changes ---
+    def _index_bom(self, index: Optional[BomIndex] = None) -> None:
+        self.bom_index = index if index is not None else BomIndex.from_frame(self.bom)
+        # rows grouped by SKU (file order kept within a SKU) so components are a contiguous slice
+        self._bom_by_sku = self.bom.iloc[self.bom_index.order]
+        self._sku_agg = None
+        self._bom_hashes = None
+        self.bom_version = getattr(self, "bom_version", -1) + 1
+
+    @property
+    def sku_agg(self) -> pd.DataFrame:
+        """Per-SKU table: materials_usd, primary_hts, hts_codes and origins (component sets), built on first use."""
+        if self._sku_agg is None:
+            idx = self.bom_index
+            bounds = idx.starts[1:]
+
+            def sets(col: str) -> List[frozenset]:
+                vals = self._bom_by_sku[col].astype(str).to_numpy(dtype=object)
+                return [frozenset(part) for part in np.split(vals, bounds)] if len(idx) else []
+
+            self._sku_agg = pd.DataFrame({"materials_usd": idx.materials, "primary_hts": idx.primary_hts,
+                                          "hts_codes": sets("hts_code"), "origins": sets("origin_country")},
+                                         index=pd.Index(idx.sku_ids, name="sku"))
+        return self._sku_agg
+
+    @property
+    def bom_hashes(self) -> np.ndarray:
+        """uint64 content hash of each SKU's component rows, aligned with bom_index.sku_ids."""
+        if self._bom_hashes is None:
+            idx = self.bom_index
+            rows = pd.util.hash_pandas_object(self._bom_by_sku, index=False).to_numpy()
+            # order-sensitive combine: odd per-position multipliers, wrapping uint64 sums per SKU
+            rank = (np.arange(len(rows)) - np.repeat(idx.starts, idx.counts)).astype(np.uint64)
+            mixed = rows * (2 * rank + np.uint64(1))
+            self._bom_hashes = np.add.reduceat(mixed, idx.starts) if len(idx) else np.zeros(0, np.uint64)
+        return self._bom_hashes
+
+    def update_bom(self, bom: pd.DataFrame) -> None:
+        """Replace the BOM and invalidate every derived aggregate."""
+        self.bom = bom.copy()
+        self.bom["hts_code"] = self.bom["hts_code"].astype(str)
+        self._index_bom()
+        self._notify("bom", None)
+
+    # --- change notifications for derived caches: ("tariffs", touched keys) or ("bom", None) ---
+    def subscribe(self, fn: Callable[[str, Optional[List[TariffKey]]], None]) -> None:
+        self._listeners.append(fn)
+
+    def _notify(self, kind: str, keys: Optional[List[TariffKey]]) -> None:
+        for fn in self._listeners:
+            fn(kind, keys)
 
     def get_skus_by_hs(self, hs_code: str):
-        return self.bom[self.bom["hts_code"] == str(hs_code)]["sku"].unique().tolist()
+        return self.bom_index.skus_by_hs(str(hs_code))
 
     def get_components(self, sku: str):
-        return self.bom[self.bom["sku"] == sku].copy()
+        # a copy, as before: callers may mutate it, and pandas < 3 gives no copy-on-write guarantee
+        rows = self.bom_index.rows(sku)
+        return (self._bom_by_sku.iloc[rows] if rows is not None else self.bom.iloc[0:0]).copy()
+
+    def sku_materials(self, sku: str) -> float:
+        return float(self.bom_index.materials[self.bom_index.position(sku)])
+
+    def primary_hts(self, sku: str) -> str:
+        return self.bom_index.primary_hts[self.bom_index.position(sku)]
 
     def latest_tariff(self, hs_code: str, origin: str, dest: str = "US") -> float:
-        df = self.tariffs
-        df = df[(df["hs_code"].astype(str) == str(hs_code)) & (df["origin"] == origin) & (df["destination"] == dest)]
-        if df.empty:
-            return 0.0
-        row = df.sort_values("effective_date").iloc[-1]
-        return float(row["rate_pct"])
+        return self.tariff_index.latest(str(hs_code), origin, dest)
+
+    def tariff_as_of(self, hs_code: str, origin: str, dest: str, date) -> float:
+        return self.tariff_index.as_of(str(hs_code), origin, dest, date)
+
+    @property
+    def tariffs(self) -> pd.DataFrame:
+        """The tariff table. Appended rows are concatenated on read, so appends do not copy the table."""
+        if self._tariff_batches:
+            self._tariffs = pd.concat([self._tariffs, *self._tariff_batches], ignore_index=True)
+            self._tariff_batches = []
+        return self._tariffs
+
+    def append_tariffs(self, rows: pd.DataFrame):
+        """Append tariff rows (same columns as tariffs.csv) and update the index in place.
+
+        Lookups go through tariff_index, so the rows are only buffered for the table; every
+        TARIFF_BATCH_CHUNK batches are merged among themselves, never with the whole table.
+        """
+        rows = rows.copy()
+        rows["hs_code"] = rows["hs_code"].astype(str)
+        rows["effective_date"] = pd.to_datetime(rows["effective_date"])
+        self._tariff_batches.append(rows)
+        if len(self._tariff_batches) >= TARIFF_BATCH_CHUNK:
+            self._tariff_batches = [pd.concat(self._tariff_batches, ignore_index=True)]
+        touched = self.tariff_index.extend(rows)
+        self._notify("tariffs", touched)
+        return touched
+
+    # --- rebuilding the store in a worker process (see orchestrator._init_worker) ---
+    def worker_state(self) -> Tuple[str, bool, Optional[pd.DataFrame], Optional[pd.DataFrame]]:
+        """Picklable recipe for an equivalent store: where it was loaded from, plus the tariff rows
+        appended and the BOM set since then (None if unchanged)."""
+        appended = self.tariffs.iloc[self._loaded_tariffs:] if len(self.tariffs) > self._loaded_tariffs else None
+        return self.root, self.snapshot, appended, (self.bom if self.bom_version else None)
+
+    @classmethod
+    def from_worker_state(cls, state: Tuple[str, bool, Optional[pd.DataFrame], Optional[pd.DataFrame]]) -> "DataStore":
+        root, snapshot, appended, bom = state
+        ds = cls(root, snapshot=snapshot)
+        if bom is not None:
+            ds.update_bom(bom)
+        if appended is not None:
+            ds.append_tariffs(appended)
+        return ds
+
+_SHARED: Dict[Tuple[str, bool], Tuple[Tuple[int, ...], DataStore]] = {}
+_SHARED_LOCK = threading.Lock()
+
+def shared_datastore(root: str = "./data", snapshot: bool = True) -> DataStore:
+    """Process-wide DataStore per root, reloaded only when a source CSV's mtime changes."""
+    stamp = tuple((Path(root) / fname).stat().st_mtime_ns for fname in SOURCES.values())
+    key = (str(Path(root).resolve()), snapshot)
+    with _SHARED_LOCK:
+        cached = _SHARED.get(key)
+        if cached is not None and cached[0] == stamp:
+            return cached[1]
+        ds = DataStore(root, snapshot=snapshot)
+        _SHARED[key] = (stamp, ds)
+        return ds
@@ -0,0 +1,222 @@
+"""Opt-in timers, counters and a sampling profiler for the decision pipeline.
+
+Disabled (the default), stage() returns a shared no-op context and lookup methods are
+the originals. enable() swaps instrumented wrappers onto the hook points below and
+disable() puts the originals back. Timings from pool workers are not collected;
+their work shows up as the parent's "fan_out" stage.
+"""
+from __future__ import annotations
+import collections, functools, json, os, re, sys, threading, time
+from contextlib import nullcontext
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple
+
+_NULL = nullcontext()
+_local = threading.local()
+
+class _Timer:
+    __slots__ = ("calls", "total_s", "max_s")
+
+    def __init__(self):
+        self.calls, self.total_s, self.max_s = 0, 0.0, 0.0
+
+class Registry:
+    def __init__(self, keep_traces: int = 50):
+        self.enabled = False
+        self._lock = threading.Lock()
+        self.timers: Dict[str, _Timer] = {}
+        self.counters: Dict[str, int] = {}
+        self.traces: Deque[Dict[str, Any]] = collections.deque(maxlen=keep_traces)
+        self._originals: Dict[Tuple[Any, str], Callable] = {}
+
+    def observe(self, name: str, seconds: float) -> None:
+        with self._lock:
+            t = self.timers.get(name)
+            if t is None:
+                t = self.timers[name] = _Timer()
+            t.calls += 1
+            t.total_s += seconds
+            t.max_s = max(t.max_s, seconds)
+        trace = getattr(_local, "trace", None)
+        if trace is not None:
+            trace["stages"][name] = trace["stages"].get(name, 0.0) + seconds * 1e3
+
+    def incr(self, name: str, n: int = 1) -> None:
+        if self.enabled:
+            with self._lock:
+                self.counters[name] = self.counters.get(name, 0) + n
+
+    def reset(self) -> None:
+        with self._lock:
+            self.timers.clear()
+            self.counters.clear()
+            self.traces.clear()
+
+    # --- hook points: method/function replaced by a timed wrapper while enabled ---
+    def enable(self) -> None:
+        with self._lock:
+            if self.enabled:
+                return
+            for owner, attr, name in _hook_points():
+                original = getattr(owner, attr)
+                self._originals[(owner, attr)] = original
+                setattr(owner, attr, _timed(self, name, original))
+            self.enabled = True
+
+    def disable(self) -> None:
+        with self._lock:
+            for (owner, attr), original in self._originals.items():
+                setattr(owner, attr, original)
+            self._originals.clear()
+            self.enabled = False
+
+    # --- export ---
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "enabled": self.enabled,
+                "timers": {k: {"calls": t.calls, "total_ms": t.total_s * 1e3, "max_ms": t.max_s * 1e3}
+                           for k, t in sorted(self.timers.items())},
+                "counters": dict(sorted(self.counters.items())),
+                "traces": list(self.traces),
+            }
+
+    def to_json(self) -> str:
+        return json.dumps(self.snapshot(), indent=1)
+
+    def to_prometheus(self) -> str:
+        snap = self.snapshot()
+        lines = ["# TYPE atis_stage_calls_total counter", "# TYPE atis_stage_seconds_total counter",
+                 "# TYPE atis_stage_seconds_max gauge"]
+        for name, t in snap["timers"].items():
+            lines.append(f'atis_stage_calls_total{{stage="{name}"}} {t["calls"]}')
+            lines.append(f'atis_stage_seconds_total{{stage="{name}"}} {t["total_ms"] / 1e3:.9f}')
+            lines.append(f'atis_stage_seconds_max{{stage="{name}"}} {t["max_ms"] / 1e3:.9f}')
+        for name, n in snap["counters"].items():
+            metric = f"atis_{_METRIC_CHARS.sub('_', name)}_total"      # one counter metric per name
+            lines += [f"# TYPE {metric} counter", f"{metric} {n}"]
+        return "\n".join(lines) + "\n"
+
+_METRIC_CHARS = re.compile(r"[^a-zA-Z0-9_]")
+
+REGISTRY = Registry(keep_traces=int(os.environ.get("ATIS_METRICS_TRACES", "50")))
+
+class _Stage:
+    __slots__ = ("name", "t0")
+
+    def __init__(self, name: str):
+        self.name = name
+
+    def __enter__(self):
+        self.t0 = time.perf_counter()
+
+    def __exit__(self, *exc):
+        REGISTRY.observe(self.name, time.perf_counter() - self.t0)
+
+def stage(name: str):
+    """`with stage("policy"):` -- timed when enabled, a shared no-op otherwise."""
+    return _Stage(name) if REGISTRY.enabled else _NULL
+
+class _Trace:
+    def __init__(self, label: str):
+        self.label = label
+
+    def __enter__(self):
+        self.prev = getattr(_local, "trace", None)
+        _local.trace = self.trace = {"label": self.label, "ts": time.time(), "stages": {}}
+        self.t0 = time.perf_counter()
+
+    def __exit__(self, *exc):
+        self.trace["total_ms"] = (time.perf_counter() - self.t0) * 1e3
+        _local.trace = self.prev
+        REGISTRY.traces.append(self.trace)
+
+def trace(label: str):
+    """Group the stages timed on this thread under one entry in REGISTRY.traces (e.g. one event)."""
+    return _Trace(label) if REGISTRY.enabled else _NULL
+
+def _timed(registry: Registry, name: str, fn: Callable) -> Callable:
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        t0 = time.perf_counter()
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            registry.observe(name, time.perf_counter() - t0)
+    return wrapper
+
+def _hook_points() -> List[Tuple[Any, str, str]]:
+    from . import cost_engine
+    from .classifier import CachedClassifier
+    from .data_loader import DataStore
+    from .policy import Policy
+    from .sourcing import SourcingEngine
+    from .tariff_index import TariffIndex
+    points = [(DataStore, m, f"datastore.{m}") for m in
+              ("get_skus_by_hs", "get_components", "sku_materials", "primary_hts", "latest_tariff", "tariff_as_of")]
+    points += [(cost_engine, f, f"cost.{f}") for f in ("compute_cost_for_route", "compute_costs_batch")]
+    points += [(cost_engine.CostCache, "costs", "cost.cache_costs"), (TariffIndex, "rate", "tariff_index.rate"),
+               (SourcingEngine, "top_k", "sourcing.top_k"), (Policy, "policy_check", "policy.policy_check"),
+               (Policy, "check_batch", "policy.check_batch"), (CachedClassifier, "classify", "classifier.classify")]
+    return points
+
+class SamplingProfiler:
+    """Samples the Python stacks of running threads every `interval_s` from a daemon thread.
+
+    Cheap enough to toggle on a live process; stop() keeps the samples for top()/collapsed().
+    """
+
+    def __init__(self, interval_s: float = 0.005, max_depth: int = 64):
+        self.interval_s, self.max_depth = interval_s, max_depth
+        self.samples: collections.Counter = collections.Counter()
+        self._lock = threading.Lock()             # the sampler thread adds while readers iterate
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self) -> None:
+        if self.running:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="atis-profiler", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _run(self) -> None:
+        me = threading.get_ident()
+        while not self._stop.wait(self.interval_s):
+            for tid, frame in sys._current_frames().items():
+                if tid == me:
+                    continue
+                stack = []
+                while frame is not None and len(stack) < self.max_depth:
+                    code = frame.f_code
+                    stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})")
+                    frame = frame.f_back
+                with self._lock:
+                    self.samples[tuple(reversed(stack))] += 1
+
+    def _snapshot(self) -> collections.Counter:
+        with self._lock:
+            return collections.Counter(self.samples)
+
+    def top(self, n: int = 20) -> List[Tuple[str, int]]:
+        """Functions by self samples (innermost frame)."""
+        own: collections.Counter = collections.Counter()
+        for stack, count in self._snapshot().items():
+            if stack:
+                own[stack[-1]] += count
+        return own.most_common(n)
+
+    def collapsed(self) -> str:
+        """Brendan Gregg's folded-stack format, ready for flamegraph.pl / speedscope."""
+        return "\n".join(f"{';'.join(stack)} {count}" for stack, count in self._snapshot().most_common())
+
+PROFILER = SamplingProfiler()
@@ -1,61 +1,151 @@
 from __future__ import annotations
-from typing import List, Dict
+import multiprocessing as mp
+import os, threading
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Dict, Optional, Tuple
+from .audit_store import AuditStore
+from .classifier import CachedClassifier, ClassifyRequest, NaiveClassifier, classify_requests
 from .models import DecisionRecord, HTSClassification, SourcingOption, TariffChangeEvent
 from .data_loader import DataStore
+from .metrics import REGISTRY, stage, trace
 from .policy import Policy
+from .review_state import ReviewState, event_scope
 from .sourcing import top3_options
 
-AUDIT_LOG: List[DecisionRecord] = []
-REVIEW_QUEUE: Dict[str, HTSClassification] = {}      # sku -> classification needing review
-APPROVED_HTS_CONF: Dict[str, float] = {}             # sku -> approved confidence override
+CLASSIFIER = CachedClassifier(NaiveClassifier())     # swap in a model-backed HTSClassifier here
+
+DEFAULT_WORKERS = int(os.environ.get("ATIS_WORKERS", "1"))   # >1 shards SKUs across a process pool
+PARALLEL_MIN_SKUS = 256                                       # below this, worker start-up outweighs the gain
+
+# process-wide stores, opened on first use from $ATIS_AUDIT_DB / $ATIS_REVIEW_DB (read at that point)
+_AUDIT_LOG: Optional[AuditStore] = None
+_REVIEW_STATE: Optional[ReviewState] = None
+_STORES_LOCK = threading.Lock()
+
+def audit_log() -> AuditStore:
+    global _AUDIT_LOG
+    if _AUDIT_LOG is None:
+        with _STORES_LOCK:
+            if _AUDIT_LOG is None:
+                _AUDIT_LOG = AuditStore(os.environ.get("ATIS_AUDIT_DB", "./cache/audit.sqlite"))
+    return _AUDIT_LOG
+
+def review_state() -> ReviewState:
+    global _REVIEW_STATE
+    if _REVIEW_STATE is None:
+        with _STORES_LOCK:
+            if _REVIEW_STATE is None:
+                _REVIEW_STATE = ReviewState(os.environ.get("ATIS_REVIEW_DB", "./cache/review_state.sqlite"))
+    return _REVIEW_STATE
+
+def use_stores(audit: Optional[AuditStore] = None, review: Optional[ReviewState] = None) -> None:
+    """Close the current stores and use these instead; None reopens from the environment on next use."""
+    global _AUDIT_LOG, _REVIEW_STATE
+    with _STORES_LOCK:
+        for store in (_AUDIT_LOG, _REVIEW_STATE):
+            if store is not None:
+                store.close()
+        _AUDIT_LOG, _REVIEW_STATE = audit, review
+
+def _with_approvals(classes: List[HTSClassification]) -> List[HTSClassification]:
+    # reviewer approvals override the model; they are applied after the cache, never stored in it
+    out = []
+    for c in classes:
+        approved = review_state().approved_confidence(c.sku)
+        out.append(c if approved is None else
+                   HTSClassification(sku=c.sku, hts_code=c.hts_code, confidence=approved, rationale="Approved by reviewer"))
+    return out
 
 def naive_classifier(sku: str, hts_code: str) -> HTSClassification:
-    # override if user approved previously
-    if sku in APPROVED_HTS_CONF:
-        return HTSClassification(sku=sku, hts_code=hts_code, confidence=APPROVED_HTS_CONF[sku], rationale="Approved by reviewer")
+    return _with_approvals(NaiveClassifier().classify_batch([ClassifyRequest(sku, hts_code, "")]))[0]
 
-    # toy heuristic: known-length codes get higher conf
-    conf = 0.93 if hts_code and len(hts_code) >= 6 else 0.82
-    return HTSClassification(sku=sku, hts_code=hts_code, confidence=conf, rationale="few-shot match (demo)")
+def classify_skus(ds: DataStore, skus: List[str]) -> List[HTSClassification]:
+    return _with_approvals(CLASSIFIER.classify(classify_requests(ds, skus)))
 
 def get_review_queue() -> List[HTSClassification]:
-    return list(REVIEW_QUEUE.values())
+    return review_state().queue()
 
 def approve_hts(sku: str, new_conf: float = 0.95) -> None:
-    APPROVED_HTS_CONF[sku] = new_conf
-    if sku in REVIEW_QUEUE:
-        del REVIEW_QUEUE[sku]
-
-def handle_event(ds: DataStore, pol: Policy, event: TariffChangeEvent, base_route="R-CN-US", price_usd=25.0) -> List[DecisionRecord]:
-    skus = ds.get_skus_by_hs(event.hs_code)
-    decisions: List[DecisionRecord] = []
-
-    # clear old queue; it will be repopulated this run
-    REVIEW_QUEUE.clear()
-
-    for sku in skus:
-        comps = ds.get_components(sku)
-        cls = naive_classifier(sku, str(comps.iloc[0]["hts_code"]))
-        if cls.confidence < 0.9:
-            REVIEW_QUEUE[sku] = cls
-
-        options = top3_options(ds, sku, base_route, event, price_usd)
-        best: SourcingOption | None = options[0] if options else None
-
-        action = {
-            "sku": sku,
-            "delta_margin_pp": (0.0 if best is None else ( -best.cost_delta )), # convert penalty back to Δmargin (approx)
-            "lead_time_days": 0.0 if best is None else best.lead_time_delta,
-            "risk_score": 100.0 if best is None else best.risk_score,
-            "hts_confidence": cls.confidence,
-            "regulatory_change_type": event.regulatory_change_type,
-        }
-        outcome = pol.policy_check(action)
-
-        if outcome.allowed and best:
-            decisions.append(DecisionRecord(sku=sku, event=event, chosen=best, auto_executed=True, reason=outcome.reason))
+    review_state().approve(sku, new_conf)
+
+def _decide_many(ds: DataStore, pol: Policy, skus: List[str], event: TariffChangeEvent, base_route: str, price_usd: float,
+                 classes: Optional[List[HTSClassification]] = None) -> List[Tuple[DecisionRecord, Optional[HTSClassification]]]:
+    if classes is None:
+        classes = classify_skus(ds, skus)
+    bests: List[Optional[SourcingOption]] = []
+    with stage("source"):
+        for sku in skus:
+            options = top3_options(ds, sku, base_route, event, price_usd)
+            bests.append(options[0] if options else None)
+
+    # one vectorized policy pass over the whole batch
+    with stage("policy"):
+        allowed, codes = pol.check_batch(
+            delta_margin_pp=[0.0 if b is None else -b.cost_delta for b in bests],   # convert penalty back to Δmargin (approx)
+            lead_time_days=[0.0 if b is None else b.lead_time_delta for b in bests],
+            risk_score=[100.0 if b is None else b.risk_score for b in bests],
+            hts_confidence=[c.confidence for c in classes],
+            regulatory_change_type=event.regulatory_change_type,
+        )
+    reasons, review_below = pol.reasons, pol.hts_confidence_lt
+
+    out = []
+    for sku, cls, best, ok, code in zip(skus, classes, bests, allowed, codes):
+        auto = bool(ok) and best is not None
+        rec = DecisionRecord(sku=sku, event=event, chosen=best, auto_executed=auto, reason=reasons[code])
+        out.append((rec, cls if cls.confidence < review_below else None))
+    return out
+
+# --- Parallel fan-out over a forkserver (or spawn) pool ---
+# Never forked from this process: handle_event runs on app session threads, and a fork copies
+# whatever lock (CostCache, metrics, ...) another thread holds at that moment, forever held in the
+# child. Workers rebuild the store from ds.worker_state() instead (mmap'd when ds is a snapshot
+# store), so they start with their own caches and locks.
+_POOL_CONTEXT = mp.get_context("forkserver" if "forkserver" in mp.get_all_start_methods() else "spawn")
+_WORKER_STATE: Optional[Tuple[DataStore, Policy]] = None      # set in pool workers only, by _init_worker
+
+def _init_worker(ds_state, pol: Policy) -> None:
+    global _WORKER_STATE
+    _WORKER_STATE = (DataStore.from_worker_state(ds_state), pol)
+
+def _decide_shard(args) -> List[Tuple[DecisionRecord, Optional[HTSClassification]]]:
+    skus, classes, event, base_route, price_usd = args
+    ds, pol = _WORKER_STATE
+    return _decide_many(ds, pol, skus, event, base_route, price_usd, classes)
+
+def _fan_out(ds: DataStore, pol: Policy, skus: List[str], classes: List[HTSClassification], event: TariffChangeEvent,
+             base_route: str, price_usd: float, workers: int) -> List[Tuple[DecisionRecord, Optional[HTSClassification]]]:
+    n_shards = min(len(skus), workers * 4)
+    size = -(-len(skus) // n_shards)
+    shards = [(skus[i:i + size], classes[i:i + size], event, base_route, price_usd) for i in range(0, len(skus), size)]
+    with ProcessPoolExecutor(max_workers=workers, mp_context=_POOL_CONTEXT,
+                             initializer=_init_worker, initargs=(ds.worker_state(), pol)) as ex:
+        # map() yields in submission order, so output order matches the serial path
+        return [res for shard in ex.map(_decide_shard, shards) for res in shard]
+
+def handle_event(ds: DataStore, pol: Policy, event: TariffChangeEvent, base_route="R-CN-US", price_usd=25.0,
+                 workers: Optional[int] = None) -> List[DecisionRecord]:
+    with trace(f"{event.hs_code} {event.origin}->{event.destination} @ {event.new_rate_pct:g}%"):
+        skus = ds.get_skus_by_hs(event.hs_code)
+        workers = DEFAULT_WORKERS if workers is None else workers
+        pol.maybe_reload()
+        # classify in this process so the classifier cache survives the run, whichever path prices it
+        with stage("classify"):
+            classes = classify_skus(ds, skus)
+
+        if workers > 1 and len(skus) >= PARALLEL_MIN_SKUS:
+            with stage("fan_out"):
+                results = _fan_out(ds, pol, skus, classes, event, base_route, price_usd, workers)
         else:
-            decisions.append(DecisionRecord(sku=sku, event=event, chosen=best, auto_executed=False, reason=outcome.reason))
+            results = _decide_many(ds, pol, skus, event, base_route, price_usd, classes)
+        decisions: List[DecisionRecord] = [d for d, _ in results]
 
-    AUDIT_LOG.extend(decisions)
+        with stage("record"):
+            # this event's review items replace only its own earlier ones
+            reviews = {d.sku: review for d, review in results if review is not None}
+            review_state().replace(event_scope(event), reviews)
+            audit_log().append(decisions)
+        REGISTRY.incr("events")
+        REGISTRY.incr("decisions", len(decisions))
+        REGISTRY.incr("review_items", len(reviews))
     return decisions
@@ -0,0 +1,112 @@
+from __future__ import annotations
+import asyncio
+from dataclasses import dataclass
+from typing import AsyncIterator, Dict, Iterable, Iterator, List, Optional, Tuple
+import pandas as pd
+from .models import DecisionRecord, TariffChangeEvent
+from .data_loader import DataStore
+from .policy import Policy
+from .orchestrator import handle_event
+from .tariff_index import event_effective_date
+
+EventKey = Tuple[str, str, str]     # (hs_code, origin, destination)
+
+def event_key(ev: TariffChangeEvent) -> EventKey:
+    return (str(ev.hs_code), ev.origin, ev.destination)
+
+def coalesce(events: Iterable[TariffChangeEvent]) -> List[TariffChangeEvent]:
+    """Keep the last event per key, in order of first appearance."""
+    latest: Dict[EventKey, TariffChangeEvent] = {}
+    for ev in events:
+        latest[event_key(ev)] = ev
+    return list(latest.values())
+
+def apply_events(ds: DataStore, events: List[TariffChangeEvent]) -> List[EventKey]:
+    """Write event rates into the DataStore's tariff table/index; returns the keys touched."""
+    if not events:
+        return []
+    rows = pd.DataFrame({
+        "hs_code": [str(ev.hs_code) for ev in events],
+        "origin": [ev.origin for ev in events],
+        "destination": [ev.destination for ev in events],
+        "rate_pct": [float(ev.new_rate_pct) for ev in events],
+        "effective_date": [event_effective_date(ev) for ev in events],
+    })
+    return ds.append_tariffs(rows)
+
+@dataclass
+class PipelineStats:
+    events_in: int = 0
+    events_coalesced: int = 0
+    batches: int = 0
+    decisions: int = 0
+
+class EventPipeline:
+    """Long-running consumer of TariffChangeEvents.
+
+    Events arriving within `window_s` of each other are batched, coalesced per
+    (hs_code, origin, destination), applied to the tariff index, and only the SKUs
+    carrying each affected HS code are repriced. Decisions are yielded as they are made.
+    """
+
+    def __init__(self, ds: DataStore, pol: Policy, window_s: float = 0.5, max_batch: int = 1000,
+                 base_route: str = "R-CN-US", price_usd: float = 25.0, workers: Optional[int] = None):
+        self.ds, self.pol = ds, pol
+        self.window_s, self.max_batch = window_s, max_batch
+        self.base_route, self.price_usd, self.workers = base_route, price_usd, workers
+        self.stats = PipelineStats()
+
+    def _prepare(self, batch: List[TariffChangeEvent]) -> List[TariffChangeEvent]:
+        events = coalesce(batch)
+        self.stats.events_in += len(batch)
+        self.stats.events_coalesced += len(batch) - len(events)
+        self.stats.batches += 1
+        apply_events(self.ds, events)
+        return events
+
+    def _handle(self, ev: TariffChangeEvent) -> List[DecisionRecord]:
+        decisions = handle_event(self.ds, self.pol, ev, base_route=self.base_route,
+                                 price_usd=self.price_usd, workers=self.workers)
+        self.stats.decisions += len(decisions)
+        return decisions
+
+    def run_sync(self, events: Iterable[TariffChangeEvent]) -> Iterator[DecisionRecord]:
+        """Generator flavour: coalesces every `max_batch` consecutive events."""
+        batch: List[TariffChangeEvent] = []
+        for ev in events:
+            batch.append(ev)
+            if len(batch) >= self.max_batch:
+                for e in self._prepare(batch):
+                    yield from self._handle(e)
+                batch = []
+        if batch:
+            for e in self._prepare(batch):
+                yield from self._handle(e)
+
+    async def run(self, queue: "asyncio.Queue[Optional[TariffChangeEvent]]") -> AsyncIterator[DecisionRecord]:
+        """Consume `queue` until a None sentinel arrives."""
+        loop = asyncio.get_running_loop()
+        closed = False
+        while not closed:
+            first = await queue.get()
+            if first is None:
+                break
+            batch = [first]
+            deadline = loop.time() + self.window_s
+            while len(batch) < self.max_batch:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                try:
+                    ev = await asyncio.wait_for(queue.get(), remaining)
+                except asyncio.TimeoutError:
+                    break
+                if ev is None:
+                    closed = True
+                    break
+                batch.append(ev)
+
+            for ev in self._prepare(batch):
+                # pricing is CPU-bound; keep the loop free to accept new events meanwhile
+                for d in await asyncio.to_thread(self._handle, ev):
+                    yield d
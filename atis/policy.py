@@ -1,27 +1,139 @@
 from __future__ import annotations
-from typing import Dict, Any
+import logging, os, time
+from dataclasses import dataclass
+from typing import Dict, Any, FrozenSet, Sequence, Tuple
+import numpy as np
 import yaml
 from .models import PolicyOutcome
 
+log = logging.getLogger(__name__)
+
+# reason codes returned by check_batch; index into Policy.reasons
+ALLOW_WITHIN_THRESHOLDS, DENY_CHANGE_TYPE, DENY_HTS_CONFIDENCE, DENY_OUTSIDE_THRESHOLDS = range(4)
+
+@dataclass(frozen=True)
+class _Rules:
+    margin_hit_pp_lt: float
+    lead_time_increase_days_lt: float
+    supplier_switch_risk_score_lt: float
+    hts_confidence_lt: float
+    approval_change_types: FrozenSet[str]
+    reasons: Tuple[str, ...]
+    outcomes: Tuple[PolicyOutcome, ...]
+
+def _compile(cfg: Dict[str, Any]) -> _Rules:
+    auto = cfg["auto_execute_if"]
+    req  = cfg["requires_approval_if"]
+    hts_lt = float(req.get("hts_confidence_lt", 0.9))
+    reasons = (
+        "Within auto-exec thresholds",
+        "Structural/ambiguous change requires approval",
+        f"HTS confidence below {hts_lt:g}",
+        "Outside auto thresholds — approval needed",
+    )
+    return _Rules(
+        margin_hit_pp_lt=float(auto["margin_hit_pp_lt"]),
+        lead_time_increase_days_lt=float(auto["lead_time_increase_days_lt"]),
+        supplier_switch_risk_score_lt=float(auto["supplier_switch_risk_score_lt"]),
+        hts_confidence_lt=hts_lt,
+        approval_change_types=frozenset(req.get("regulatory_change_type", []) or []),
+        reasons=reasons,
+        outcomes=tuple(PolicyOutcome(allowed=(i == ALLOW_WITHIN_THRESHOLDS), reason=r) for i, r in enumerate(reasons)),
+    )
+
 class Policy:
-    def __init__(self, path: str = "./data/policy.yaml"):
-        with open(path, "r") as f:
-            self.cfg = yaml.safe_load(f)
+    """policy.yaml compiled once into thresholds; re-compiled when the file changes if auto_reload is on."""
+
+    def __init__(self, path: str = "./data/policy.yaml", auto_reload: bool = False, reload_interval_s: float = 1.0):
+        self.path = path
+        self.auto_reload = auto_reload
+        self.reload_interval_s = reload_interval_s
+        self._mtime_ns = -1
+        self._next_check = 0.0
+        self.reload()
+
+    def reload(self) -> None:
+        """Parse and compile the file, then swap it in; raises ValueError (or OSError/YAMLError) and keeps the old rules."""
+        mtime_ns = os.stat(self.path).st_mtime_ns
+        with open(self.path, "r") as f:
+            cfg = yaml.safe_load(f)
+        if not isinstance(cfg, dict):
+            raise ValueError(f"{self.path}: expected a mapping, got {type(cfg).__name__}")
+        try:
+            rules = _compile(cfg)       # compile before swapping so readers never see a half-built policy
+        except (AttributeError, KeyError, TypeError, ValueError) as e:
+            raise ValueError(f"{self.path}: invalid policy: {e!r}") from e
+        self.cfg, self._rules, self._mtime_ns = cfg, rules, mtime_ns
+
+    def reload_if_changed(self) -> bool:
+        try:
+            mtime_ns = os.stat(self.path).st_mtime_ns
+        except FileNotFoundError:
+            return False
+        if mtime_ns == self._mtime_ns:
+            return False
+        try:
+            self.reload()
+        except (OSError, yaml.YAMLError, ValueError) as e:
+            # half-written or malformed: keep the current rules, try again when the file next changes
+            self._mtime_ns = mtime_ns
+            log.warning("policy reload failed, keeping previous rules: %s", e)
+            return False
+        return True
+
+    def maybe_reload(self) -> None:
+        if self.auto_reload and time.monotonic() >= self._next_check:
+            self._next_check = time.monotonic() + self.reload_interval_s
+            self.reload_if_changed()
+
+    @property
+    def reasons(self) -> Tuple[str, ...]:
+        return self._rules.reasons
+
+    @property
+    def hts_confidence_lt(self) -> float:
+        """Classifications below this confidence need approval (and go to the review queue)."""
+        return self._rules.hts_confidence_lt
 
     def policy_check(self, action: Dict[str, Any]) -> PolicyOutcome:
         # action: {delta_margin_pp, lead_time_days, risk_score, hts_confidence, regulatory_change_type}
-        auto = self.cfg["auto_execute_if"]
-        req  = self.cfg["requires_approval_if"]
+        self.maybe_reload()
+        r = self._rules
+
+        if action.get("regulatory_change_type") in r.approval_change_types:
+            return r.outcomes[DENY_CHANGE_TYPE]
+
+        if action.get("hts_confidence") is not None and action["hts_confidence"] < r.hts_confidence_lt:
+            return r.outcomes[DENY_HTS_CONFIDENCE]
+
+        if (abs(action.get("delta_margin_pp", 0)) <= r.margin_hit_pp_lt
+            and abs(action.get("lead_time_days", 0)) <= r.lead_time_increase_days_lt
+            and action.get("risk_score", 100) <= r.supplier_switch_risk_score_lt):
+            return r.outcomes[ALLOW_WITHIN_THRESHOLDS]
+
+        return r.outcomes[DENY_OUTSIDE_THRESHOLDS]
 
-        if action.get("regulatory_change_type") in set(req.get("regulatory_change_type", [])):
-            return PolicyOutcome(allowed=False, reason="Structural/ambiguous change requires approval")
+    def check_batch(self, delta_margin_pp: Sequence[float], lead_time_days: Sequence[float], risk_score: Sequence[float],
+                    hts_confidence: Sequence[float], regulatory_change_type: Sequence[str] | str
+                    ) -> Tuple[np.ndarray, np.ndarray]:
+        """Vectorized policy_check. NaN hts_confidence means "not provided".
 
-        if action.get("hts_confidence") is not None and action["hts_confidence"] < 0.9:
-            return PolicyOutcome(allowed=False, reason="HTS confidence below 0.9")
+        Returns (allowed: bool[n], reason_code: int8[n]); reason text is self.reasons[code].
+        """
+        self.maybe_reload()
+        r = self._rules
+        margin = np.abs(np.asarray(delta_margin_pp, dtype=float))
+        lead = np.abs(np.asarray(lead_time_days, dtype=float))
+        risk = np.asarray(risk_score, dtype=float)
+        conf = np.asarray(hts_confidence, dtype=float)
+        ctype = np.broadcast_to(np.asarray(regulatory_change_type, dtype=object), margin.shape)
 
-        if (abs(action.get("delta_margin_pp", 0)) <= auto["margin_hit_pp_lt"]
-            and abs(action.get("lead_time_days", 0)) <= auto["lead_time_increase_days_lt"]
-            and action.get("risk_score", 100) <= auto["supplier_switch_risk_score_lt"]):
-            return PolicyOutcome(allowed=True, reason="Within auto-exec thresholds")
+        needs_approval = np.isin(ctype, list(r.approval_change_types))
+        low_conf = conf < r.hts_confidence_lt          # NaN compares False, like a missing value
+        within = ((margin <= r.margin_hit_pp_lt) & (lead <= r.lead_time_increase_days_lt)
+                  & (risk <= r.supplier_switch_risk_score_lt))
 
-        return PolicyOutcome(allowed=False, reason="Outside auto thresholds — approval needed")
+        code = np.select([needs_approval, low_conf, within],
+                         [DENY_CHANGE_TYPE, DENY_HTS_CONFIDENCE, ALLOW_WITHIN_THRESHOLDS],
+                         DENY_OUTSIDE_THRESHOLDS).astype(np.int8)
+        return code == ALLOW_WITHIN_THRESHOLDS, code
@@ -0,0 +1,105 @@
+from __future__ import annotations
+import os, sqlite3, threading, time
+from types import MappingProxyType
+from typing import Dict, List, Mapping, Optional, Tuple
+from .models import HTSClassification, TariffChangeEvent
+
+Scope = Tuple[str, str, str]        # (hs_code, origin, destination) of the event that raised the items
+
+def event_scope(ev: TariffChangeEvent) -> Scope:
+    return (str(ev.hs_code), ev.origin, ev.destination)
+
+_EMPTY: Mapping = MappingProxyType({})
+
+class ReviewState:
+    """HTS review items scoped per event, plus reviewer approvals persisted to SQLite.
+
+    Readers never lock: they read an immutable snapshot that writers replace
+    wholesale (copy-on-write) under a short lock. A run only replaces its own
+    event's scope, so concurrent events no longer wipe each other's items.
+    """
+
+    def __init__(self, path: str = "./cache/review_state.sqlite"):
+        self.path = path
+        self._lock = threading.Lock()
+        self._db: Optional[sqlite3.Connection] = None
+        self._scopes: Mapping[Scope, Mapping[str, HTSClassification]] = _EMPTY
+        self._approved: Optional[Mapping[str, float]] = None
+
+    def _conn(self) -> sqlite3.Connection:
+        if self._db is None:
+            if self.path != ":memory:":
+                os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            db = sqlite3.connect(self.path, check_same_thread=False)
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("CREATE TABLE IF NOT EXISTS approvals (sku TEXT PRIMARY KEY, confidence REAL NOT NULL, ts REAL NOT NULL)")
+            db.commit()
+            self._db = db
+        return self._db
+
+    # --- approvals ---
+    @property
+    def approved(self) -> Mapping[str, float]:
+        approved = self._approved
+        if approved is None:
+            with self._lock:
+                if self._approved is None:
+                    rows = self._conn().execute("SELECT sku, confidence FROM approvals").fetchall()
+                    self._approved = MappingProxyType(dict(rows))
+                approved = self._approved
+        return approved
+
+    def approved_confidence(self, sku: str) -> Optional[float]:
+        return self.approved.get(sku)
+
+    def approve(self, sku: str, confidence: float = 0.95) -> None:
+        """Record the approval durably, then drop the SKU from every open review scope."""
+        current = self.approved
+        with self._lock:
+            with self._conn() as db:
+                db.execute("INSERT OR REPLACE INTO approvals (sku, confidence, ts) VALUES (?, ?, ?)",
+                           (sku, float(confidence), time.time()))
+            self._approved = MappingProxyType({**(self._approved or current), sku: float(confidence)})
+            self._scopes = MappingProxyType({
+                scope: items if sku not in items else MappingProxyType({k: v for k, v in items.items() if k != sku})
+                for scope, items in self._scopes.items()})
+
+    # --- review queue ---
+    def replace(self, scope: Scope, items: Dict[str, HTSClassification]) -> None:
+        """Set the open review items for one event scope (an empty dict closes the scope).
+
+        SKUs approved while the run was in flight are dropped, so a slow run cannot re-open them.
+        """
+        self.approved                   # make sure durable approvals are loaded
+        with self._lock:
+            frozen = MappingProxyType({k: v for k, v in items.items() if k not in self._approved})
+            scopes = dict(self._scopes)
+            if frozen:
+                scopes[scope] = frozen
+            else:
+                scopes.pop(scope, None)
+            self._scopes = MappingProxyType(scopes)
+
+    def queue(self, scope: Optional[Scope] = None) -> List[HTSClassification]:
+        """Open items for one scope, or across scopes with one entry per SKU (oldest scope first)."""
+        scopes = self._scopes
+        if scope is not None:
+            return list(scopes.get(scope, _EMPTY).values())
+        out: Dict[str, HTSClassification] = {}
+        for items in scopes.values():
+            for sku, item in items.items():
+                out.setdefault(sku, item)
+        return list(out.values())
+
+    def scopes(self) -> List[Scope]:
+        return list(self._scopes)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._scopes = _EMPTY
+
+    def close(self) -> None:
+        with self._lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
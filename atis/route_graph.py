@@ -0,0 +1,61 @@
+from __future__ import annotations
+import json, sys
+from dataclasses import dataclass
+from types import MappingProxyType
+from typing import Dict, List, Mapping, Tuple
+import pandas as pd
+
+Leg = Tuple[str, str]               # (origin, destination)
+
+@dataclass(frozen=True)
+class RouteGraph:
+    """Immutable, pre-parsed view of routes.csv shared by every caller of a DataStore."""
+    route_ids: Tuple[str, ...]
+    legs: Mapping[str, Tuple[Leg, ...]]             # route_id -> legs in travel order
+    origin: Mapping[str, str]                       # route_id -> first origin
+    by_pair: Mapping[Leg, Tuple[str, ...]]          # (origin, dest) -> routes using that leg
+
+    @classmethod
+    def from_frame(cls, routes: pd.DataFrame) -> "RouteGraph":
+        legs: Dict[str, Tuple[Leg, ...]] = {}
+        by_pair: Dict[Leg, List[str]] = {}
+        for route_id, raw in zip(routes["route_id"], routes["legs"]):
+            route_id = sys.intern(str(route_id))
+            parsed = json.loads(raw) if isinstance(raw, str) else raw
+            route_legs = tuple(tuple(sys.intern(c.strip()) for c in leg.split("->")) for leg in parsed)
+            legs[route_id] = route_legs
+            for pair in dict.fromkeys(route_legs):
+                by_pair.setdefault(pair, []).append(route_id)
+        return cls(
+            route_ids=tuple(legs),
+            legs=MappingProxyType(legs),
+            origin=MappingProxyType({r: l[0][0] for r, l in legs.items() if l}),
+            by_pair=MappingProxyType({k: tuple(v) for k, v in by_pair.items()}),
+        )
+
+    def routes_with_leg(self, origin: str, dest: str) -> Tuple[str, ...]:
+        return self.by_pair.get((origin, dest), ())
+
+    def countries(self) -> Tuple[str, ...]:
+        return tuple(sorted({c for pair in self.by_pair for c in pair}))
+
+    def candidate_paths(self, origin: str, dest: str, max_hops: int = 3) -> List[Tuple[Leg, ...]]:
+        """Simple paths origin -> dest built from known legs, including ones no listed route uses."""
+        nxt: Dict[str, List[str]] = {}
+        for o, d in self.by_pair:
+            nxt.setdefault(o, []).append(d)
+        out: List[Tuple[Leg, ...]] = []
+        stack: List[Tuple[str, Tuple[Leg, ...]]] = [(origin, ())]
+        while stack:
+            node, path = stack.pop()
+            if node == dest and path:
+                out.append(path)
+                continue
+            if len(path) >= max_hops:
+                continue
+            visited = {origin} | {d for _, d in path}
+            for d in nxt.get(node, ()):
+                if d not in visited:
+                    stack.append((d, path + ((node, d),)))
+        out.sort(key=lambda p: (len(p), p))
+        return out
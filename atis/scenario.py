@@ -0,0 +1,189 @@
+from __future__ import annotations
+import multiprocessing as mp
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+import numpy as np
+import pandas as pd
+from .cost_engine import compute_costs_batch, leg_rate_tensor
+from .data_loader import DataStore
+from .models import TariffChangeEvent
+from .tariff_index import TariffOverlay, event_effective_date, overlay_events
+
+@dataclass
+class Scenario:
+    name: str
+    events: List[TariffChangeEvent]
+
+@dataclass
+class ScenarioImpact:
+    """Per-SKU cost change under one scenario; only SKUs whose costing HS code was touched are listed.
+
+    A touched HS code changes nothing for a SKU when the event's leg is not on the route, so
+    skus_affected counts the listed SKUs whose COGS actually moved.
+    """
+    name: str
+    rows: np.ndarray            # positions into sku_ids
+    sku_ids: np.ndarray
+    cogs_base: np.ndarray
+    cogs_new: np.ndarray
+    price_usd: float
+    as_of: Optional[pd.Timestamp] = None        # date both sides were costed at (None: latest rates)
+
+    @property
+    def skus(self) -> List[str]:
+        return self.sku_ids[self.rows].tolist()
+
+    @property
+    def n_catalog(self) -> int:
+        return len(self.sku_ids)
+
+    @property
+    def cogs_delta(self) -> np.ndarray:
+        return self.cogs_new - self.cogs_base
+
+    @property
+    def margin_pp_delta(self) -> np.ndarray:
+        return -self.cogs_delta / self.price_usd * 100.0
+
+    def summary(self) -> Dict[str, Any]:
+        delta, margin = self.cogs_delta, self.margin_pp_delta
+        return {
+            "scenario": self.name,
+            "skus_affected": int(np.count_nonzero(delta)),
+            "catalog_skus": self.n_catalog,
+            "cogs_delta_usd": float(delta.sum()),
+            "cogs_delta_max_usd": float(delta.max()) if len(delta) else 0.0,
+            "margin_pp_delta_mean": float(margin.sum() / self.n_catalog) if self.n_catalog else 0.0,
+            "margin_pp_delta_min": float(margin.min()) if len(margin) else 0.0,
+            "as_of": None if self.as_of is None else str(pd.Timestamp(self.as_of).date()),
+        }
+
+def scenarios_from_frame(df: pd.DataFrame, destination: str = "US") -> List[Scenario]:
+    """One single-event Scenario per scenarios.csv row."""
+    return [Scenario(name=str(r["name"]), events=[TariffChangeEvent(
+        hs_code=str(r["affected_hs"]), origin=r["origin"], destination=destination,
+        new_rate_pct=float(r["new_rate_pct"]), effective_date=str(r["start_date"]), source="scenario")])
+        for _, r in df.iterrows()]
+
+def rate_sweep(event: TariffChangeEvent, rates: Iterable[float]) -> List[Scenario]:
+    """The same event re-rated at each of `rates` (pct), e.g. np.arange(0, 100, 0.1)."""
+    return [Scenario(name=f"{event.hs_code} {event.origin}->{event.destination} @ {float(r):g}%",
+                     events=[event.model_copy(update={"new_rate_pct": float(r)})]) for r in rates]
+
+class ScenarioEngine:
+    """What-if costing of the whole catalog on one route under hypothetical tariff events.
+
+    Events are written to a copy-on-write TariffOverlay, never to the DataStore. A scenario
+    only re-prices SKUs whose costing HS code it touches. With as_of=None each scenario is
+    costed, before and after, as of its latest event date, so an event dated before a
+    later row for the same key still shows its effect instead of being shadowed by it.
+    """
+
+    chunk_cells = 4_000_000         # scenarios x SKUs per stacked re-pricing pass (~32 MB per float array)
+
+    def __init__(self, ds: DataStore, route_id: str = "R-CN-US", price_usd: float = 25.0, as_of=None):
+        self.ds, self.route_id, self.price_usd, self.as_of = ds, route_id, price_usd, as_of
+        idx = ds.bom_index
+        self.skus = idx.sku_ids
+        base = compute_costs_batch(ds, idx.sku_ids.tolist(), [route_id], as_of=as_of)
+        self._landed = base.materials + base.freight
+        self.cogs_base = base.cogs[:, 0]
+        codes, uniques = pd.factorize(idx.primary_hts)
+        order = np.argsort(codes, kind="stable")
+        bounds = np.r_[0, np.cumsum(np.bincount(codes, minlength=len(uniques)))]
+        self._skus_of_hs: Dict[str, np.ndarray] = {
+            str(hs): order[bounds[i]:bounds[i + 1]] for i, hs in enumerate(uniques)}
+
+    def overlay(self, events: Sequence[TariffChangeEvent]) -> TariffOverlay:
+        return overlay_events(self.ds.tariff_index, events)
+
+    def _as_of(self, scenario: Scenario):
+        if self.as_of is not None or not scenario.events:
+            return self.as_of
+        return max(event_effective_date(ev) for ev in scenario.events)
+
+    def _plan(self, scenario: Scenario) -> Tuple[Tuple[str, ...], Any, np.ndarray]:
+        """Costing HS codes the scenario touches, its costing date, and their (hs, leg) rates under the overlay."""
+        ov = self.overlay(scenario.events)
+        hs_codes = tuple(sorted({k[0] for k in ov.changed_keys()} & self._skus_of_hs.keys()))
+        as_of = self._as_of(scenario)
+        return hs_codes, as_of, leg_rate_tensor(self.ds, hs_codes, [self.route_id], as_of, ov)[:, 0, :]
+
+    def _baseline(self, hs_codes: Tuple[str, ...], as_of) -> np.ndarray:
+        """COGS of the affected rows without the scenario, on the same date the scenario is costed at."""
+        if as_of is self.as_of:
+            return self.cogs_base[self._rows(hs_codes)[0]]
+        rates = leg_rate_tensor(self.ds, hs_codes, [self.route_id], as_of)[:, 0, :]
+        return self._reprice(hs_codes, rates[None])[1][0]
+
+    def _rows(self, hs_codes: Tuple[str, ...]) -> Tuple[np.ndarray, np.ndarray]:
+        """SKU rows costed under `hs_codes`, and each row's position in hs_codes."""
+        pos = [self._skus_of_hs[hs] for hs in hs_codes]
+        rows = np.concatenate(pos) if pos else np.zeros(0, dtype=np.intp)
+        return rows, np.repeat(np.arange(len(hs_codes)), [len(p) for p in pos])
+
+    def _reprice(self, hs_codes: Tuple[str, ...], rates: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """rates is (n_scenario, hs, leg); returns the affected SKU rows and their (n_scenario, n_row) COGS."""
+        rows, hs_idx = self._rows(hs_codes)
+        landed = self._landed[rows]
+        # same duty-on-duty walk as compute_costs_batch, so unaffected legs reproduce the baseline bitwise
+        value = np.repeat(landed[None, :], len(rates), axis=0)
+        duties = np.zeros_like(value)
+        for j in range(rates.shape[2]):
+            duty = value * (rates[:, hs_idx, j] / 100.0)
+            duties += duty
+            value += duty
+        return rows, landed + duties
+
+    def evaluate(self, scenario: Scenario) -> ScenarioImpact:
+        hs_codes, as_of, rates = self._plan(scenario)
+        rows, cogs = self._reprice(hs_codes, rates[None])
+        return ScenarioImpact(scenario.name, rows, self.skus, self._baseline(hs_codes, as_of), cogs[0],
+                              self.price_usd, as_of)
+
+    def summaries(self, scenarios: Sequence[Scenario]) -> List[Dict[str, Any]]:
+        """Scenarios touching the same HS codes on the same date (e.g. a rate sweep) are re-priced as one 2-D pass."""
+        groups: Dict[Tuple[Tuple[str, ...], Any], List[Tuple[int, np.ndarray]]] = {}
+        for i, s in enumerate(scenarios):
+            hs_codes, as_of, rates = self._plan(s)
+            groups.setdefault((hs_codes, as_of), []).append((i, rates))
+        out: List[Dict[str, Any]] = [{}] * len(scenarios)
+        for (hs_codes, as_of), members in groups.items():
+            base = self._baseline(hs_codes, as_of)
+            n_rows = len(base)
+            step = max(1, self.chunk_cells // max(n_rows, 1))
+            for a in range(0, len(members), step):
+                part = members[a:a + step]
+                rows, cogs = self._reprice(hs_codes, np.stack([r for _, r in part]))
+                for (i, _), c in zip(part, cogs):
+                    out[i] = ScenarioImpact(scenarios[i].name, rows, self.skus, base, c, self.price_usd,
+                                            as_of).summary()
+        return out
+
+    def run(self, scenarios: Sequence[Scenario], workers: int = 1) -> pd.DataFrame:
+        """Summary row per scenario (the sensitivity surface for a sweep), in input order."""
+        scenarios = list(scenarios)
+        if workers <= 1 or len(scenarios) < 2 * workers:
+            return pd.DataFrame(self.summaries(scenarios))
+        return pd.DataFrame(_fan_out(self, scenarios, workers))
+
+# --- Parallel sweeps over a forkserver (or spawn) pool; see orchestrator._fan_out for why not fork ---
+_POOL_CONTEXT = mp.get_context("forkserver" if "forkserver" in mp.get_all_start_methods() else "spawn")
+_WORKER_ENGINE: Optional[ScenarioEngine] = None      # set in pool workers only, by _init_worker
+
+def _init_worker(ds_state, route_id: str, price_usd: float, as_of, chunk_cells: int) -> None:
+    global _WORKER_ENGINE
+    _WORKER_ENGINE = ScenarioEngine(DataStore.from_worker_state(ds_state), route_id, price_usd, as_of)
+    _WORKER_ENGINE.chunk_cells = chunk_cells
+
+def _run_chunk(chunk: List[Scenario]) -> List[Dict[str, Any]]:
+    return _WORKER_ENGINE.summaries(chunk)
+
+def _fan_out(engine: ScenarioEngine, scenarios: List[Scenario], workers: int) -> List[Dict[str, Any]]:
+    size = -(-len(scenarios) // (workers * 4))
+    chunks = [scenarios[i:i + size] for i in range(0, len(scenarios), size)]
+    initargs = (engine.ds.worker_state(), engine.route_id, engine.price_usd, engine.as_of, engine.chunk_cells)
+    with ProcessPoolExecutor(max_workers=workers, mp_context=_POOL_CONTEXT,
+                             initializer=_init_worker, initargs=initargs) as ex:
+        return [row for rows in ex.map(_run_chunk, chunks) for row in rows]
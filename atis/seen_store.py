@@ -0,0 +1,109 @@
+from __future__ import annotations
+import json, os, sqlite3, threading, time
+from typing import Iterable, Optional, Set
+
+class SeenStore:
+    """Persistent dedupe set for watcher items, backed by SQLite (WAL).
+
+    Membership is a primary-key lookup, new ids are buffered and written in one
+    transaction per flush, and compact() bounds the store by age and/or size.
+    """
+
+    def __init__(self, path: str, max_items: Optional[int] = None, ttl_s: Optional[float] = None):
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.path, self.max_items, self.ttl_s = path, max_items, ttl_s
+        self._lock = threading.Lock()
+        self._pending: dict[str, float] = {}
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute("CREATE TABLE IF NOT EXISTS seen (id TEXT PRIMARY KEY, ts REAL NOT NULL) WITHOUT ROWID")
+        self._db.execute("CREATE INDEX IF NOT EXISTS seen_ts ON seen(ts)")
+        self._db.commit()
+
+    def __enter__(self) -> "SeenStore":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def __contains__(self, _id: str) -> bool:
+        with self._lock:
+            if _id in self._pending:
+                return True
+            return self._db.execute("SELECT 1 FROM seen WHERE id = ?", (_id,)).fetchone() is not None
+
+    def __len__(self) -> int:
+        with self._lock:
+            stored = self._db.execute("SELECT COUNT(*) FROM seen").fetchone()[0]
+            return stored + len(self._pending)
+
+    def add(self, _id: str, ts: Optional[float] = None) -> None:
+        with self._lock:
+            self._pending[_id] = time.time() if ts is None else ts
+
+    def discard(self, ids: Iterable[str]) -> None:
+        """Forget ids (pending or stored), e.g. for items whose processing was abandoned."""
+        ids = list(ids)
+        with self._lock:
+            for _id in ids:
+                self._pending.pop(_id, None)
+            with self._db:
+                self._db.executemany("DELETE FROM seen WHERE id = ?", ((_id,) for _id in ids))
+
+    def unseen(self, ids: Iterable[str]) -> Set[str]:
+        """Batched membership: the subset of `ids` not yet recorded."""
+        ids = set(ids)
+        with self._lock:
+            ids -= self._pending.keys()
+            found: Set[str] = set()
+            chunk = list(ids)
+            for i in range(0, len(chunk), 500):
+                part = chunk[i:i + 500]
+                q = "SELECT id FROM seen WHERE id IN (%s)" % ",".join("?" * len(part))
+                found.update(r[0] for r in self._db.execute(q, part))
+        return ids - found
+
+    def flush(self) -> None:
+        with self._lock:
+            if not self._pending:
+                return
+            with self._db:
+                self._db.executemany("INSERT OR IGNORE INTO seen (id, ts) VALUES (?, ?)", self._pending.items())
+            self._pending.clear()
+
+    def compact(self, now: Optional[float] = None) -> int:
+        """Drop ids older than ttl_s, then the oldest beyond max_items; returns rows removed."""
+        self.flush()
+        now = time.time() if now is None else now
+        removed = 0
+        with self._lock, self._db:
+            if self.ttl_s is not None:
+                removed += self._db.execute("DELETE FROM seen WHERE ts < ?", (now - self.ttl_s,)).rowcount
+            if self.max_items is not None:
+                removed += self._db.execute(
+                    "DELETE FROM seen WHERE id IN (SELECT id FROM seen ORDER BY ts DESC LIMIT -1 OFFSET ?)",
+                    (self.max_items,)).rowcount
+        return removed
+
+    def migrate_jsonl(self, path: str) -> int:
+        """Import ids from a legacy watch_cache.jsonl; the file itself is left in place as the triage log."""
+        n = 0
+        try:
+            mtime = os.path.getmtime(path)
+            with open(path, "r", encoding="utf-8") as f:
+                for line in f:
+                    if line.strip():
+                        _id = json.loads(line).get("_id", "")
+                        if _id:
+                            self.add(_id, mtime)
+                            n += 1
+        except FileNotFoundError:
+            return 0
+        self.flush()
+        return n
+
+    def close(self) -> None:
+        self.flush()
+        self._db.close()
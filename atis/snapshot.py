@@ -0,0 +1,155 @@
+"""Columnar on-disk snapshot of the data/*.csv tables.
+
+Layout under <root>/.snapshot/:
+    CURRENT                      name of the live build directory (swapped atomically)
+    <build>/manifest.json        format version, source fingerprints, column kinds
+    <build>/<table>/<col>.npy    numeric columns; datetimes as int64 ns
+    <build>/<table>/<col>.npy + <col>.categories.json   string columns, categorical-encoded
+    <build>/tariff_index/starts.npy   key-group offsets; tariffs are stored grouped by key, date-sorted
+    <build>/bom_index/<field>.npy|.json   pre-built BomIndex arrays (string arrays as JSON lists)
+
+Columns are loaded with np.load(mmap_mode="r"), so worker processes opening the
+same snapshot share page-cache pages instead of each parsing the CSVs.
+"""
+from __future__ import annotations
+import hashlib, json, os, shutil, tempfile
+from pathlib import Path
+from typing import Any, Dict, Tuple
+import numpy as np
+import pandas as pd
+from .bom_index import BomIndex
+from .data_loader import SOURCES, read_csv_tables
+from .tariff_index import TariffIndex
+
+FORMAT_VERSION = 2
+SNAPSHOT_DIR = ".snapshot"
+
+def _sha256(path: Path) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest()
+
+def _fingerprint(root: Path) -> Dict[str, Dict[str, Any]]:
+    out = {}
+    for name, fname in SOURCES.items():
+        st = (root / fname).stat()
+        out[name] = {"size": st.st_size, "mtime_ns": st.st_mtime_ns, "sha256": None}
+    return out
+
+def _current(root: Path) -> Path | None:
+    try:
+        return root / SNAPSHOT_DIR / (root / SNAPSHOT_DIR / "CURRENT").read_text().strip()
+    except FileNotFoundError:
+        return None
+
+def is_fresh(root: str) -> bool:
+    """True if the live snapshot matches the CSVs: same size+mtime, or else the same content hash."""
+    root_p = Path(root)
+    build = _current(root_p)
+    if build is None or not (build / "manifest.json").exists():
+        return False
+    manifest = json.loads((build / "manifest.json").read_text())
+    if manifest.get("version") != FORMAT_VERSION:
+        return False
+    for name, now in _fingerprint(root_p).items():
+        then = manifest["sources"].get(name)
+        if then is None:
+            return False
+        if (now["size"], now["mtime_ns"]) != (then["size"], then["mtime_ns"]):
+            if _sha256(root_p / SOURCES[name]) != then["sha256"]:    # touched but unchanged is still fresh
+                return False
+    return True
+
+def _write_column(dirpath: Path, name: str, col: pd.Series) -> Dict[str, str]:
+    if isinstance(col.dtype, pd.DatetimeTZDtype) or pd.api.types.is_datetime64_any_dtype(col):
+        np.save(dirpath / f"{name}.npy", col.to_numpy("datetime64[ns]").astype(np.int64))
+        return {"name": name, "kind": "datetime"}
+    if pd.api.types.is_numeric_dtype(col) or pd.api.types.is_bool_dtype(col):
+        np.save(dirpath / f"{name}.npy", col.to_numpy())
+        return {"name": name, "kind": "numeric"}
+    cat = pd.Categorical(col.astype(object))
+    np.save(dirpath / f"{name}.npy", cat.codes)        # pandas-chosen code width, so loading is zero-copy
+    (dirpath / f"{name}.categories.json").write_text(json.dumps([str(c) for c in cat.categories]))
+    return {"name": name, "kind": "category"}
+
+def build_snapshot(root: str) -> Path:
+    """Parse the CSVs once and write a new snapshot build; returns its directory."""
+    root_p = Path(root)
+    fingerprint = _fingerprint(root_p)
+    for name in fingerprint:
+        fingerprint[name]["sha256"] = _sha256(root_p / SOURCES[name])
+    tables = read_csv_tables(root)
+    tables["bom"]["hts_code"] = tables["bom"]["hts_code"].astype(str)
+    tables["tariffs"]["hs_code"] = tables["tariffs"]["hs_code"].astype(str)
+
+    # pre-built index layout: tariff rows grouped by key, dates ascending; NaT rows trail
+    order, starts = TariffIndex.sorted_layout(tables["tariffs"])
+    rest = np.setdiff1d(np.arange(len(tables["tariffs"])), order)
+    tables["tariffs"] = tables["tariffs"].iloc[np.r_[order, rest]].reset_index(drop=True)
+
+    base = root_p / SNAPSHOT_DIR
+    base.mkdir(exist_ok=True)
+    build = Path(tempfile.mkdtemp(prefix="build-", dir=base))
+    manifest: Dict[str, Any] = {"version": FORMAT_VERSION, "sources": fingerprint, "tables": {},
+                                "tariff_index_rows": int(len(order))}
+    for name, df in tables.items():
+        (build / name).mkdir()
+        manifest["tables"][name] = {"rows": len(df), "columns": [_write_column(build / name, c, df[c]) for c in df.columns]}
+    (build / "tariff_index").mkdir()
+    np.save(build / "tariff_index" / "starts.npy", starts.astype(np.int64))
+    (build / "bom_index").mkdir()
+    for field, arr in BomIndex.from_frame(tables["bom"]).arrays().items():
+        if arr.dtype == object:
+            (build / "bom_index" / f"{field}.json").write_text(json.dumps([str(v) for v in arr]))
+        else:
+            np.save(build / "bom_index" / f"{field}.npy", arr)
+    (build / "manifest.json").write_text(json.dumps(manifest, indent=1))
+
+    previous = _current(root_p)
+    tmp_ptr = base / f"CURRENT.{os.getpid()}"
+    tmp_ptr.write_text(build.name)
+    os.replace(tmp_ptr, base / "CURRENT")               # atomic swap; readers see the old or the new build
+    if previous is not None and previous != build:
+        shutil.rmtree(previous, ignore_errors=True)     # open mmaps stay valid after unlink on POSIX
+    return build
+
+def _read_column(dirpath: Path, spec: Dict[str, str]) -> pd.Series:
+    arr = np.load(dirpath / f"{spec['name']}.npy", mmap_mode="r")
+    if spec["kind"] == "datetime":
+        return pd.Series(arr.view("datetime64[ns]"), copy=False)
+    if spec["kind"] == "category":
+        cats = json.loads((dirpath / f"{spec['name']}.categories.json").read_text())
+        return pd.Series(pd.Categorical.from_codes(arr, dtype=pd.CategoricalDtype(cats), validate=False), copy=False)
+    return pd.Series(arr, copy=False)
+
+def _read_bom_index(dirpath: Path) -> BomIndex:
+    fields = {}
+    for field in BomIndex.FIELDS:
+        if (dirpath / f"{field}.npy").exists():
+            fields[field] = np.load(dirpath / f"{field}.npy", mmap_mode="r")
+        else:
+            fields[field] = np.array(json.loads((dirpath / f"{field}.json").read_text()), dtype=object)
+    return BomIndex(**fields)
+
+def load_snapshot(root: str) -> Tuple[Dict[str, pd.DataFrame], TariffIndex, BomIndex]:
+    """Load (rebuilding first if stale) the memory-mapped tables and the pre-built tariff/BOM indexes."""
+    if not is_fresh(root):
+        build_snapshot(root)
+    build = _current(Path(root))
+    manifest = json.loads((build / "manifest.json").read_text())
+    tables = {}
+    for name, meta in manifest["tables"].items():
+        cols = {spec["name"]: _read_column(build / name, spec) for spec in meta["columns"]}
+        tables[name] = pd.DataFrame(cols, copy=False)
+
+    t, n = tables["tariffs"], manifest["tariff_index_rows"]
+    starts = np.load(build / "tariff_index" / "starts.npy")
+    index = TariffIndex.from_sorted(
+        t["hs_code"].to_numpy(dtype=object)[:n], t["origin"].to_numpy(dtype=object)[:n],
+        t["destination"].to_numpy(dtype=object)[:n],
+        t["effective_date"].to_numpy("datetime64[ns]").astype(np.int64)[:n],
+        t["rate_pct"].to_numpy(dtype=float)[:n], starts,
+    )
+    return tables, index, _read_bom_index(build / "bom_index")
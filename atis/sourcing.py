@@ -1,11 +1,16 @@
 from __future__ import annotations
-from typing import List
-import json
+import os, weakref
+from typing import Dict, List, Optional, Tuple
+import numpy as np
 from .models import SourcingOption
 from .data_loader import DataStore
-from .cost_engine import compare_base_vs_option
+from .component_costs import compute_component_costs_batch
+from .cost_engine import cost_cache_for
 from yaml import safe_load
 
+# "sku": duties from each SKU's primary HS code (cached); "component": per-component HS code and origin
+DUTY_MODEL = os.environ.get("ATIS_DUTY_MODEL", "sku")
+
 def _load_weights(policy_yaml_path: str = "./data/policy.yaml"):
     try:
         with open(policy_yaml_path, "r") as f:
@@ -14,36 +19,94 @@ def _load_weights(policy_yaml_path: str = "./data/policy.yaml"):
     except Exception:
         return {"cost_delta":0.5,"lead_time_delta":0.25,"compliance_risk":0.25}
 
-def top3_options(ds: DataStore, sku: str, base_route: str, event, price_usd: float) -> List[SourcingOption]:
-    weights = _load_weights()
-    routes = ds.routes["route_id"].tolist()
-    candidates = [r for r in routes if r != base_route]
+def _top_k(score: np.ndarray, k: int) -> np.ndarray:
+    """Indices of the k lowest scores, ties broken by position (same order as a stable sort)."""
+    n = len(score)
+    if k >= n:
+        return np.argsort(score, kind="stable")
+    kth = np.partition(score, k - 1)[k - 1]
+    if np.isnan(kth):
+        return np.argsort(score, kind="stable")[:k]
+    cand = np.flatnonzero(score <= kth)
+    return cand[np.lexsort((cand, score[cand]))][:k]
 
-    out: List[SourcingOption] = []
-    for r in candidates:
-        cbd = compare_base_vs_option(ds, sku, base_route, r, price_usd, event)
-        # positive margin_pp_delta = better margin vs base (good).
-        # convert into a "penalty-like" cost_delta so LOW is better:
-        cost_delta = max(0.0, -cbd.margin_pp_delta)  # improvement => 0, worse => positive penalty
+class SourcingEngine:
+    """Scores every candidate route for a SKU in one array pass and keeps the top k.
 
-        legs = ds.routes.set_index("route_id").loc[r, "legs"]
-        if isinstance(legs, str): legs = json.loads(legs)
-        origin = legs[0].split("->")[0]
+    Weights are read once; per-route origin, compliance risk and lead time are precomputed.
+    Candidates are routes, each sourced from its origin country's supplier pool ("auto-<origin>").
+    With duty_model="component", route costs come from compute_component_costs_batch.
+    """
 
+    def __init__(self, ds: DataStore, weights: Optional[Dict[str, float]] = None,
+                 policy_yaml_path: str = "./data/policy.yaml", duty_model: Optional[str] = None):
+        self.ds = ds
+        self.duty_model = DUTY_MODEL if duty_model is None else duty_model
+        if self.duty_model not in ("sku", "component"):
+            raise ValueError(f"unknown duty_model {self.duty_model!r}")
+        self.weights = dict(weights) if weights else _load_weights(policy_yaml_path)
+        graph = ds.route_graph
+        self.route_ids: Tuple[str, ...] = graph.route_ids
+        self._pos = {r: i for i, r in enumerate(self.route_ids)}
+        self.origins = np.array([graph.origin[r] for r in self.route_ids], dtype=object)
         # demo compliance proxy
-        compliance_risk = 10 if origin in ("US","MX") else 25 if origin=="VN" else 35
+        self.risk = np.array([10.0 if o in ("US", "MX") else 25.0 if o == "VN" else 35.0 for o in self.origins])
+        # Lead-time proxy: use origin country’s mean lead time
+        lead_by_country = ds.suppliers.groupby("country")["lead_time_days"].mean()
+        self.lead = lead_by_country.reindex(self.origins).to_numpy(dtype=float)
+
+    def route_cogs(self, sku: str, route_ids: List[str], event) -> np.ndarray:
+        """COGS of sourcing `sku` along each route, as of the latest rates in the DataStore.
 
+        Both duty models read the event's rate from the tariff table (the pipeline writes it
+        there first) and never overlay it. The component model rates the first leg from the
+        route's origin, since a candidate route means sourcing every component there.
+        """
+        if self.duty_model == "component":
+            return compute_component_costs_batch(self.ds, [sku], route_ids, component_origin=False).cogs[0]
+        return cost_cache_for(self.ds).costs(self.ds, sku, route_ids, event)[:, 3]
+
+    def top_k(self, sku: str, base_route: str, event, price_usd: float, k: int = 3) -> List[SourcingOption]:
+        base = self._pos[base_route]
+        cand = np.array([i for i in range(len(self.route_ids)) if i != base], dtype=np.intp)
+        if not len(cand):
+            return []
+        route_ids = [self.route_ids[base]] + [self.route_ids[i] for i in cand]
+        cogs = self.route_cogs(sku, route_ids, event)
+
+        margin_base = (price_usd - cogs[0]) / price_usd
+        margin_opt  = (price_usd - cogs[1:]) / price_usd
+        margin_pp_delta = (margin_opt - margin_base) * 100.0
+        # positive margin_pp_delta = better margin vs base (good).
+        # convert into a "penalty-like" cost_delta so LOW is better (+0.0 folds -0.0 into 0.0)
+        cost_delta = np.maximum(0.0, -margin_pp_delta) + 0.0
+        eta_delta = self.lead[cand] - self.lead[base]
+        risk = self.risk[cand]
+
+        w = self.weights
         # normalized simple score (lower better)
-        score = (weights["cost_delta"] * cost_delta
-                 + weights["lead_time_delta"] * abs(cbd.eta_days_delta)
-                 + weights["compliance_risk"] * (compliance_risk/10.0))
-
-        out.append(SourcingOption(
-            sku=sku, supplier_id=f"auto-{origin}", route_id=r,
-            cost_delta=cost_delta, lead_time_delta=cbd.eta_days_delta,
-            risk_score=float(compliance_risk),
-            explanation=f"Cost penalty≈{cost_delta:.2f}pp, LeadΔ={cbd.eta_days_delta:.1f}d, Origin={origin}"
-        ))
-
-    out.sort(key=lambda o: (o.cost_delta*0.5) + (abs(o.lead_time_delta)*0.25) + ((o.risk_score/10.0)*0.25))
-    return out[:3]
+        score = (w["cost_delta"] * cost_delta
+                 + w["lead_time_delta"] * np.abs(eta_delta)
+                 + w["compliance_risk"] * (risk / 10.0))
+
+        out: List[SourcingOption] = []
+        for j in _top_k(score, k):
+            origin = self.origins[cand[j]]
+            cd, eta = float(cost_delta[j]), float(eta_delta[j])
+            out.append(SourcingOption(
+                sku=sku, supplier_id=f"auto-{origin}", route_id=self.route_ids[cand[j]],
+                cost_delta=cd, lead_time_delta=eta, risk_score=float(risk[j]),
+                explanation=f"Cost penalty≈{cd:.2f}pp, LeadΔ={eta:.1f}d, Origin={origin}"
+            ))
+        return out
+
+_ENGINES: "weakref.WeakKeyDictionary[DataStore, SourcingEngine]" = weakref.WeakKeyDictionary()
+
+def engine_for(ds: DataStore) -> SourcingEngine:
+    eng = _ENGINES.get(ds)
+    if eng is None:
+        eng = _ENGINES[ds] = SourcingEngine(ds)
+    return eng
+
+def top3_options(ds: DataStore, sku: str, base_route: str, event, price_usd: float, k: int = 3) -> List[SourcingOption]:
+    return engine_for(ds).top_k(sku, base_route, event, price_usd, k=k)
@@ -0,0 +1,94 @@
+from __future__ import annotations
+import json
+from pathlib import Path
+from typing import List
+import numpy as np
+import pandas as pd
+
+EXPORTERS = ["CN", "MX", "VN", "DE", "TH", "IN", "BR"]
+
+def _exporters(n: int) -> List[str]:
+    return (EXPORTERS + [f"X{i:02d}" for i in range(max(0, n - len(EXPORTERS)))])[:max(n, 1)]
+
+def generate(out_dir: str, n_skus: int = 1000, comps_per_sku: int = 3, n_hs: int = 200, n_countries: int = 8,
+             n_routes: int = 32, suppliers_per_country: int = 5, tariff_versions: int = 3, seed: int = 0) -> Path:
+    """Write a synthetic catalog in the data/*.csv layout; returns the directory.
+
+    Row counts scale as: bom = n_skus * comps_per_sku, tariffs ~ n_hs * leg pairs * tariff_versions.
+    The demo's base route R-CN-US always exists so handle_event defaults keep working.
+    """
+    rng = np.random.default_rng(seed)
+    out = Path(out_dir)
+    out.mkdir(parents=True, exist_ok=True)
+    exporters = _exporters(n_countries - 1)
+    countries = exporters + ["US"]
+    hs_codes = np.array([str(840000 + i * 37) for i in range(n_hs)])
+
+    # --- BOM ---
+    n_rows = n_skus * comps_per_sku
+    sku_ids = np.array([f"SKU-{i:07d}" for i in range(n_skus)])
+    bom_hs = hs_codes[rng.zipf(1.6, n_rows) % n_hs]     # a few HS codes touch many SKUs
+    pd.DataFrame({
+        "sku": np.repeat(sku_ids, comps_per_sku),
+        "component_id": [f"C-{i:08d}" for i in range(n_rows)],
+        "description": "synthetic part",
+        "hts_code": bom_hs,
+        "origin_country": rng.choice(exporters, n_rows),
+        "current_supplier": [f"SUP-{c}-{k:02d}" for c, k in
+                             zip(rng.choice(exporters, n_rows), rng.integers(1, suppliers_per_country + 1, n_rows))],
+        "qty_per": rng.integers(1, 5, n_rows),
+        "unit_cost_usd": np.round(rng.lognormal(2.5, 1.0, n_rows), 2),
+    }).to_csv(out / "bom.csv", index=False)
+
+    # --- Suppliers ---
+    sup_country = np.repeat(countries, suppliers_per_country)
+    n_sup = len(sup_country)
+    pd.DataFrame({
+        "supplier_id": [f"SUP-{c}-{k:02d}" for c, k in zip(sup_country, np.tile(np.arange(1, suppliers_per_country + 1), len(countries)))],
+        "country": sup_country,
+        "lead_time_days": rng.integers(5, 25, n_sup),
+        "quality_score": rng.integers(70, 95, n_sup),
+        "compliance_score": rng.integers(70, 95, n_sup),
+        "capacity_units_mo": rng.integers(5, 50, n_sup) * 1000,
+    }).to_csv(out / "suppliers.csv", index=False)
+
+    # --- Routes: every direct lane first, then two-leg lanes via a hub ---
+    routes = [("R-CN-US", ["CN->US"])]
+    routes += [(f"R-{c}-US", [f"{c}->US"]) for c in exporters if c != "CN"]
+    for o in exporters:
+        for hub in exporters:
+            if len(routes) >= n_routes:
+                break
+            if hub != o:
+                routes.append((f"R-{o}-{hub}-US", [f"{o}->{hub}", f"{hub}->US"]))
+    routes = routes[:max(n_routes, 1)]
+    pd.DataFrame({"route_id": [r for r, _ in routes], "legs": [json.dumps(l) for _, l in routes]}
+                 ).to_csv(out / "routes.csv", index=False)
+
+    # --- Tariffs: each HS on each leg used by a route, several effective dates ---
+    pairs = sorted({tuple(leg.split("->")) for _, legs in routes for leg in legs})
+    n_keys = n_hs * len(pairs)
+    key_hs = np.repeat(hs_codes, len(pairs))
+    key_pair = np.tile(np.arange(len(pairs)), n_hs)
+    rows = n_keys * tariff_versions
+    dates = pd.Timestamp("2024-01-01") + pd.to_timedelta(rng.integers(0, 730, rows), unit="D")
+    pd.DataFrame({
+        "hs_code": np.repeat(key_hs, tariff_versions),
+        "origin": [pairs[i][0] for i in np.repeat(key_pair, tariff_versions)],
+        "destination": [pairs[i][1] for i in np.repeat(key_pair, tariff_versions)],
+        "rate_pct": np.round(rng.uniform(0, 30, rows), 1),
+        "effective_date": dates.strftime("%Y-%m-%d"),
+    }).to_csv(out / "tariffs.csv", index=False)
+
+    # --- Scenarios: rate hikes on the most common HS codes ---
+    top_hs = pd.Series(bom_hs).value_counts().index[:5]
+    pd.DataFrame({
+        "id": range(1, len(top_hs) + 1),
+        "name": [f"Synthetic hike {h}" for h in top_hs],
+        "description": "synthetic",
+        "affected_hs": top_hs,
+        "origin": "CN",
+        "new_rate_pct": 25.0,
+        "start_date": "2025-09-01",
+    }).to_csv(out / "scenarios.csv", index=False)
+    return out
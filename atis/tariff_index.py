@@ -0,0 +1,166 @@
+from __future__ import annotations
+from bisect import bisect_right
+from collections import ChainMap
+from typing import Dict, List, Sequence, Tuple
+import numpy as np
+import pandas as pd
+from .models import TariffChangeEvent
+
+TariffKey = Tuple[str, str, str]    # (hs_code, origin, destination)
+
+def _to_ns(date) -> int:
+    return int(pd.Timestamp(date).value)
+
+class TariffIndex:
+    """Effective-dated tariff rates keyed by (hs_code, origin, destination).
+
+    Each key holds parallel, date-sorted arrays of effective dates (ns since epoch)
+    and rates, so "latest" is a dict hit and "as of" is a dict hit plus a bisect.
+    Rows sharing an effective date keep file order; the last one wins.
+    """
+
+    def __init__(self):
+        self._dates: Dict[TariffKey, List[int]] = {}
+        self._rates: Dict[TariffKey, List[float]] = {}
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame) -> "TariffIndex":
+        idx = cls()
+        idx.extend(df)
+        return idx
+
+    @classmethod
+    def from_sorted(cls, hs: np.ndarray, origin: np.ndarray, dest: np.ndarray, dates_ns: np.ndarray,
+                    rates: np.ndarray, starts: np.ndarray) -> "TariffIndex":
+        """Build from rows already grouped by key and date-sorted within a key (see sorted_layout)."""
+        idx = cls()
+        ends = np.r_[starts[1:], len(rates)]
+        for a, b in zip(starts.tolist(), ends.tolist()):
+            key = (str(hs[a]), str(origin[a]), str(dest[a]))
+            idx._dates[key] = dates_ns[a:b].tolist()
+            idx._rates[key] = rates[a:b].tolist()
+        return idx
+
+    @staticmethod
+    def sorted_layout(df: pd.DataFrame) -> Tuple[np.ndarray, np.ndarray]:
+        """Row order grouping df by key with dates ascending (ties in file order), plus group start offsets."""
+        keys = [pd.factorize(df[c].astype(str), sort=True)[0] for c in ("hs_code", "origin", "destination")]
+        dates = pd.to_datetime(df["effective_date"]).to_numpy("datetime64[ns]").astype(np.int64)
+        order = np.lexsort((np.arange(len(df)), dates, keys[2], keys[1], keys[0]))
+        order = order[dates[order] != np.iinfo(np.int64).min]          # NaT rows carry no effective date
+        h, o, d = (k[order] for k in keys)
+        new_key = np.r_[True, (h[1:] != h[:-1]) | (o[1:] != o[:-1]) | (d[1:] != d[:-1])] if len(order) else np.array([], bool)
+        return order, np.flatnonzero(new_key)
+
+    def __len__(self) -> int:
+        return len(self._dates)
+
+    def __contains__(self, key: TariffKey) -> bool:
+        return key in self._dates
+
+    def keys(self):
+        return self._dates.keys()
+
+    def extend(self, df: pd.DataFrame) -> List[TariffKey]:
+        """Merge tariff rows into the index; returns the keys that changed."""
+        if df.empty:
+            return []
+        dates = pd.to_datetime(df["effective_date"]).to_numpy("datetime64[ns]").astype(np.int64)
+        valid = dates != np.iinfo(np.int64).min      # NaT rows carry no effective date
+        sub = pd.DataFrame({
+            "hs_code": df["hs_code"].astype(str).to_numpy()[valid],
+            "origin": df["origin"].astype(str).to_numpy()[valid],
+            "destination": df["destination"].astype(str).to_numpy()[valid],
+            "date": dates[valid],
+            "rate": df["rate_pct"].to_numpy(dtype=float)[valid],
+        })
+        sub = sub.sort_values("date", kind="mergesort")     # stable: ties keep file order
+        all_dates, all_rates = sub["date"].to_numpy(), sub["rate"].to_numpy()
+        touched: List[TariffKey] = []
+        for key, pos in sub.groupby(["hs_code", "origin", "destination"], sort=False).indices.items():
+            d, r = all_dates[pos].tolist(), all_rates[pos].tolist()
+            if key not in self._dates:
+                self._dates[key], self._rates[key] = d, r
+            elif d[0] >= self._dates[key][-1]:
+                self._own(key)
+                self._dates[key].extend(d)
+                self._rates[key].extend(r)
+            else:
+                for di, ri in zip(d, r):
+                    self._insert(key, di, ri)
+            touched.append(key)
+        return touched
+
+    def add(self, hs_code: str, origin: str, dest: str, rate_pct: float, effective_date) -> TariffKey:
+        key = (str(hs_code), origin, dest)
+        if key not in self._dates:
+            self._dates[key], self._rates[key] = [], []
+        self._insert(key, _to_ns(effective_date), float(rate_pct))
+        return key
+
+    def _own(self, key: TariffKey) -> None:
+        """Hook for overlays: make `key`'s lists safe to mutate in place."""
+
+    def _insert(self, key: TariffKey, date_ns: int, rate: float) -> None:
+        self._own(key)
+        dates, rates = self._dates[key], self._rates[key]
+        i = bisect_right(dates, date_ns)
+        dates.insert(i, date_ns)
+        rates.insert(i, rate)
+
+    def overlay(self) -> "TariffOverlay":
+        return TariffOverlay(self)
+
+    def latest(self, hs_code: str, origin: str, dest: str = "US", default: float = 0.0) -> float:
+        rates = self._rates.get((hs_code, origin, dest))
+        return rates[-1] if rates else default
+
+    def as_of(self, hs_code: str, origin: str, dest: str, date, default: float = 0.0) -> float:
+        key = (hs_code, origin, dest)
+        dates = self._dates.get(key)
+        if not dates:
+            return default
+        i = bisect_right(dates, _to_ns(date))
+        return self._rates[key][i - 1] if i else default
+
+    def rate(self, hs_code: str, origin: str, dest: str, as_of=None, default: float = 0.0) -> float:
+        if as_of is None:
+            return self.latest(hs_code, origin, dest, default)
+        return self.as_of(hs_code, origin, dest, as_of, default)
+
+    def timeline(self, hs_code: str, origin: str, dest: str) -> List[Tuple[pd.Timestamp, float]]:
+        key = (hs_code, origin, dest)
+        return [(pd.Timestamp(d), r) for d, r in zip(self._dates.get(key, ()), self._rates.get(key, ()))]
+
+class TariffOverlay(TariffIndex):
+    """Copy-on-write view over a TariffIndex for what-if rates.
+
+    Reads fall through to the base; a key's date/rate lists are copied only when the
+    overlay first writes to it, so the base index (and its DataStore) is never modified.
+    """
+
+    def __init__(self, base: TariffIndex):
+        super().__init__()
+        self.base = base
+        self._dates = ChainMap({}, base._dates)
+        self._rates = ChainMap({}, base._rates)
+
+    def _own(self, key: TariffKey) -> None:
+        if key not in self._dates.maps[0]:
+            self._dates.maps[0][key] = list(self._dates.get(key, ()))
+            self._rates.maps[0][key] = list(self._rates.get(key, ()))
+
+    def changed_keys(self) -> List[TariffKey]:
+        return list(self._dates.maps[0])
+
+def event_effective_date(ev: TariffChangeEvent) -> pd.Timestamp:
+    # watcher events carry "(unknown)"; treat those as effective today
+    ts = pd.to_datetime(ev.effective_date, errors="coerce")
+    return pd.Timestamp.now().normalize() if pd.isna(ts) else ts
+
+def overlay_events(base: TariffIndex, events: Sequence[TariffChangeEvent]) -> TariffOverlay:
+    """A copy-on-write view of `base` with each event's rate added at its effective date."""
+    ov = base.overlay()
+    for ev in events:
+        ov.add(str(ev.hs_code), ev.origin, ev.destination, float(ev.new_rate_pct), event_effective_date(ev))
+    return ov
@@ -0,0 +1,247 @@
+"""Long-running watcher: every Source polled on its own adaptive schedule, events pushed to a bounded queue.
+
+Each source starts at its interval_s (or WatcherConfig.poll_interval_s). A poll that
+brings new items halves the interval, an unchanged feed (304 or nothing new) stretches
+it by adapt_factor, and a failed fetch doubles it; all within [min_interval_s,
+max_interval_s] and with +/- jitter so sources do not poll in lockstep.
+
+Backpressure: every emitted TariffChangeEvent is awaited into a bounded asyncio.Queue,
+so when consumers fall behind the scheduler stops polling until there is room again.
+A tick commits its seen ids and feed validators only once its events are queued; if
+it is cancelled while blocked (stop()), the ids of events still waiting are forgotten
+and their feeds' validators rolled back, so the next poll fetches and emits them again.
+"""
+from __future__ import annotations
+import asyncio, heapq, random, time
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Tuple
+import httpx
+
+from .metrics import REGISTRY
+from .models import TariffChangeEvent
+from .seen_store import SeenStore
+from .watcher import (Source, WatcherConfig, _commit, _fetch_source_async, _ingest, _load_validators,
+                      _open_seen, _save_validators)
+
+@dataclass
+class _Batch:
+    """One source's events from a tick, with their seen ids; `queued` counts those delivered."""
+    source: Source
+    health: "SourceHealth"
+    events: List[TariffChangeEvent] = field(default_factory=list)
+    ids: List[str] = field(default_factory=list)
+    queued: int = 0
+
+@dataclass
+class SourceHealth:
+    name: str
+    interval_s: float
+    next_due: float = 0.0
+    polls: int = 0
+    errors: int = 0
+    consecutive_errors: int = 0
+    not_modified: int = 0
+    items: int = 0                  # new (unseen) items ingested
+    events: int = 0
+    last_status: int = 0
+    last_poll: Optional[float] = None
+    last_change: Optional[float] = None
+    last_latency_ms: float = 0.0
+    max_latency_ms: float = 0.0
+    total_latency_ms: float = 0.0
+    blocked_ms: float = 0.0         # time spent waiting for room in the event queue
+
+    @property
+    def healthy(self) -> bool:
+        return self.consecutive_errors == 0
+
+    @property
+    def mean_latency_ms(self) -> float:
+        return self.total_latency_ms / self.polls if self.polls else 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {**self.__dict__, "healthy": self.healthy, "mean_latency_ms": self.mean_latency_ms}
+
+class WatcherService:
+    """Polls cfg.sources on per-source schedules; consumers read `queue` (or `await get()`).
+
+    `clock` drives the schedule only (pass a fake one and call tick() in tests); fetch
+    latency is always wall time.
+    """
+
+    def __init__(self, cfg: WatcherConfig, client: Optional[httpx.AsyncClient] = None,
+                 clock: Callable[[], float] = time.monotonic, rng: Optional[random.Random] = None):
+        self.cfg, self.clock = cfg, clock
+        self.rng = rng or random.Random()
+        self.queue: "asyncio.Queue[TariffChangeEvent]" = asyncio.Queue(maxsize=cfg.queue_size)
+        self._client, self._own_client = client, client is None
+        self._seen: Optional[SeenStore] = None
+        self._validators: Optional[Dict[str, Dict[str, str]]] = None
+        self._stop: Optional[asyncio.Event] = None
+        now = clock()
+        self.health: Dict[str, SourceHealth] = {}
+        self._due: List[Tuple[float, int]] = []
+        for k, src in enumerate(cfg.sources):
+            interval = self._clamp(src.interval_s if src.interval_s is not None else cfg.poll_interval_s)
+            h = self.health[src.name] = SourceHealth(src.name, interval)
+            h.next_due = now + self.rng.uniform(0.0, cfg.jitter * interval)     # spread the first polls
+            self._due.append((h.next_due, k))
+        heapq.heapify(self._due)
+
+    def _clamp(self, interval: float) -> float:
+        return min(self.cfg.max_interval_s, max(self.cfg.min_interval_s, interval))
+
+    def _open(self) -> None:
+        if self._client is None:
+            self._client = httpx.AsyncClient(limits=httpx.Limits(max_connections=self.cfg.max_connections),
+                                             follow_redirects=True)
+        if self._seen is None:
+            self._seen = _open_seen(self.cfg)
+        if self._validators is None:
+            self._validators = _load_validators(self.cfg.state_path)
+
+    async def aclose(self) -> None:
+        if self._own_client and self._client is not None:
+            await self._client.aclose()
+            self._client = None
+        if self._seen is not None:
+            self._seen.close()
+            self._seen = None
+
+    # --- scheduling ---
+    def next_due(self) -> float:
+        return self._due[0][0] if self._due else float("inf")
+
+    async def tick(self) -> float:
+        """Poll every source due now (concurrently), queue their events; returns seconds until the next due."""
+        self._open()
+        now = self.clock()
+        due: List[int] = []
+        while self._due and self._due[0][0] <= now:
+            due.append(heapq.heappop(self._due)[1])
+        if due:
+            srcs = [self.cfg.sources[k] for k in due]
+            validators_before = {src.name: self._validators.get(src.name) for src in srcs}
+            records: List[Dict[str, Any]] = []
+            batches: List[_Batch] = []
+            try:
+                results = await asyncio.gather(*(self._poll(src) for src in srcs))
+                for src, k, (items, status, latency_ms) in zip(srcs, due, results):    # source order: deterministic
+                    batch = _Batch(src, self.health[src.name])
+                    before = len(records)
+                    _ingest(src, items, self._seen, self.cfg, batch.events, records, batch.ids)
+                    self._record(batch.health, status, latency_ms, len(records) - before, len(batch.events), now)
+                    heapq.heappush(self._due, (batch.health.next_due, k))
+                    batches.append(batch)
+                for batch in batches:
+                    await self._emit(batch)
+            finally:
+                for k in due[len(batches):]:        # cancelled before ingesting: poll again next tick
+                    heapq.heappush(self._due, (now, k))
+                self._settle(batches, records, validators_before)
+        return max(0.0, self.next_due() - self.clock())
+
+    def _settle(self, batches: List["_Batch"], records: List[Dict[str, Any]],
+                validators_before: Dict[str, Optional[Dict[str, str]]]) -> None:
+        """Commit what was delivered; roll back the seen ids and validators of anything still unqueued.
+
+        Sources polled but never ingested (cancelled mid-fetch) get their validators back too.
+        """
+        dropped = set()
+        rollback = set(validators_before) - {batch.source.name for batch in batches}
+        for batch in batches:
+            undelivered = batch.ids[batch.queued:]
+            if undelivered:
+                dropped.update(undelivered)
+                self._seen.discard(undelivered)
+                rollback.add(batch.source.name)
+        for name in rollback:
+            if validators_before[name] is None:
+                self._validators.pop(name, None)
+            else:
+                self._validators[name] = validators_before[name]
+        _commit(self.cfg, self._seen, [r for r in records if r["_id"] not in dropped])
+        _save_validators(self.cfg.state_path, self._validators)
+
+    async def _poll(self, src: Source) -> Tuple[List[Dict[str, Any]], int, float]:
+        t0 = time.perf_counter()
+        items, status = await _fetch_source_async(self._client, src, self.cfg, self._validators)
+        return items, status, (time.perf_counter() - t0) * 1e3
+
+    def _record(self, h: SourceHealth, status: int, latency_ms: float, new_items: int, events: int,
+                now: float) -> None:
+        h.polls += 1
+        h.last_status, h.last_poll = status, now
+        h.last_latency_ms = latency_ms
+        h.total_latency_ms += latency_ms
+        h.max_latency_ms = max(h.max_latency_ms, latency_ms)
+        h.items += new_items
+        h.events += events
+        if status == 0:
+            h.errors += 1
+            h.consecutive_errors += 1
+            h.interval_s = self._clamp(h.interval_s * 2.0)
+        else:
+            h.consecutive_errors = 0
+            h.not_modified += status == 304
+            if new_items:
+                h.last_change = now
+                h.interval_s = self._clamp(h.interval_s / 2.0)
+            else:
+                h.interval_s = self._clamp(h.interval_s * self.cfg.adapt_factor)
+        h.next_due = now + h.interval_s * (1.0 + self.rng.uniform(-self.cfg.jitter, self.cfg.jitter))
+        REGISTRY.incr("watcher.polls")
+        if status == 0:
+            REGISTRY.incr("watcher.errors")
+
+    async def _emit(self, batch: "_Batch") -> None:
+        t0 = time.perf_counter()
+        try:
+            for ev in batch.events:
+                await self.queue.put(ev)
+                batch.queued += 1
+        finally:
+            batch.health.blocked_ms += (time.perf_counter() - t0) * 1e3
+            REGISTRY.incr("watcher.events", batch.queued)
+
+    # --- daemon ---
+    async def run(self) -> None:
+        """Poll until stop(); sleeps between ticks are real time regardless of `clock`."""
+        self._stop = asyncio.Event()
+        stopped = asyncio.ensure_future(self._stop.wait())
+        try:
+            while not self._stop.is_set():
+                tick = asyncio.ensure_future(self.tick())
+                await asyncio.wait({tick, stopped}, return_when=asyncio.FIRST_COMPLETED)
+                if not tick.done():                 # stopped while blocked on a full queue
+                    tick.cancel()
+                    await asyncio.gather(tick, return_exceptions=True)
+                    break
+                delay = tick.result()
+                await asyncio.wait({stopped}, timeout=delay)
+        finally:
+            stopped.cancel()
+            await self.aclose()
+
+    def stop(self) -> None:
+        if self._stop is not None:
+            self._stop.set()
+
+    async def get(self) -> TariffChangeEvent:
+        return await self.queue.get()
+
+    def health_report(self) -> Dict[str, Dict[str, Any]]:
+        return {name: h.to_dict() for name, h in self.health.items()}
+
+    def to_prometheus(self) -> str:
+        lines = ["# TYPE atis_watcher_source_polls_total counter", "# TYPE atis_watcher_source_errors_total counter",
+                 "# TYPE atis_watcher_source_latency_ms gauge", "# TYPE atis_watcher_source_interval_seconds gauge",
+                 "# TYPE atis_watcher_source_up gauge", "# TYPE atis_watcher_queue_depth gauge"]
+        for name, h in self.health.items():
+            lines.append(f'atis_watcher_source_polls_total{{source="{name}"}} {h.polls}')
+            lines.append(f'atis_watcher_source_errors_total{{source="{name}"}} {h.errors}')
+            lines.append(f'atis_watcher_source_latency_ms{{source="{name}"}} {h.last_latency_ms:.3f}')
+            lines.append(f'atis_watcher_source_interval_seconds{{source="{name}"}} {h.interval_s:.3f}')
+            lines.append(f'atis_watcher_source_up{{source="{name}"}} {int(h.healthy)}')
+        lines.append(f"atis_watcher_queue_depth {self.queue.qsize()}")
+        return "\n".join(lines) + "\n"
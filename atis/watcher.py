@@ -1,25 +1,39 @@
 from __future__ import annotations
-import hashlib, json, re, time
+import asyncio, hashlib, json, os, re, time
 from dataclasses import dataclass
-from typing import Iterable, List, Optional, Dict, Any
+from functools import cached_property
+from concurrent.futures import ProcessPoolExecutor
+from typing import Iterable, List, Optional, Dict, Any, Sequence, Tuple
 import httpx, feedparser
+import numpy as np
 
 from .models import TariffChangeEvent
+from .seen_store import SeenStore
 
 # --- Utilities ---
 def _hash(s: str) -> str:
     return hashlib.sha256(s.encode("utf-8")).hexdigest()[:16]
 
-def _save_jsonl(path: str, rec: Dict[str, Any]) -> None:
+def _save_jsonl_many(path: str, recs: List[Dict[str, Any]]) -> None:
+    if not recs:
+        return
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
     with open(path, "a", encoding="utf-8") as f:
-        f.write(json.dumps(rec, ensure_ascii=False) + "\n")
+        f.write("".join(json.dumps(rec, ensure_ascii=False) + "\n" for rec in recs))
 
-def _load_seen(path: str) -> set[str]:
+def _load_validators(path: str) -> Dict[str, Dict[str, str]]:
     try:
         with open(path, "r", encoding="utf-8") as f:
-            return {json.loads(line).get("_id","") for line in f if line.strip()}
-    except FileNotFoundError:
-        return set()
+            return json.load(f)
+    except (FileNotFoundError, ValueError):
+        return {}
+
+def _save_validators(path: str, validators: Dict[str, Dict[str, str]]) -> None:
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(validators, f)
+    os.replace(tmp, path)
 
 # --- Config ---
 @dataclass
@@ -28,14 +42,31 @@ class Source:
     kind: str            # "rss" | "json" | "html" (keep rss/json for demo)
     url: str
     hs_hint: Optional[str] = None
+    timeout_s: Optional[float] = None       # per-source override of WatcherConfig.timeout_s
+    interval_s: Optional[float] = None      # per-source override of WatcherConfig.poll_interval_s
 
 @dataclass
 class WatcherConfig:
     sources: List[Source]
     destination: str = "US"
-    cache_path: str = "./cache/watch_cache.jsonl"
+    cache_path: str = "./cache/watch_cache.jsonl"      # raw-record triage log (audit only)
     timeout_s: float = 2.0
     retries: int = 1
+    # async mode: ETag/Last-Modified per source, exponential backoff, pooled connections
+    state_path: str = "./cache/watch_state.json"
+    backoff_s: float = 0.2
+    max_connections: int = 20
+    # dedupe store; seeded from cache_path on first use
+    seen_path: str = "./cache/watch_seen.sqlite"
+    seen_ttl_s: Optional[float] = 90 * 24 * 3600
+    seen_max_items: Optional[int] = 1_000_000
+    # daemon (watch_service.WatcherService): adaptive per-source schedule, bounded event queue
+    poll_interval_s: float = 300.0
+    min_interval_s: float = 30.0
+    max_interval_s: float = 3600.0
+    adapt_factor: float = 1.5               # unchanged feed -> interval *= adapt_factor
+    jitter: float = 0.1                     # +/- fraction of the interval
+    queue_size: int = 1000
 
 # --- Parser: turn messy text into a candidate event ---
 HS_PAT = re.compile(r"\b(HS|HTS)\s*([0-9]{4,8})\b", re.IGNORECASE)
@@ -63,7 +94,7 @@ def normalize_to_event(text: str,
     pct_match = PCT_PAT.search(text)
     pct = float(pct_match.group(2)) if pct_match else None
     # crude heuristic: if text contains "increase", keep pct pos; if "decrease"/"cut", make negative (we still store positive in event.new_rate_pct)
-    change_type = "tariff_increase" if "increase" in text_l or "+" in (pct_match.group(1) if pct_match else "") else "tariff_decrease" if "decrease" in text_l or "cut" in text_l else "tariff_increase"
+    change_type = "tariff_increase" if "increase" in text_l or "+" in ((pct_match.group(1) or "") if pct_match else "") else "tariff_decrease" if "decrease" in text_l or "cut" in text_l else "tariff_increase"
 
     # origin/destination guesses
     # first country mention is origin; destination defaults to US for the workshop
@@ -100,9 +131,125 @@ def normalize_to_event(text: str,
     )
     return (ev, conf, meta)
 
+# --- Batch normalizer: one combined scan per text, columnar output ---
+# The three alternatives start on disjoint characters (H / sign,space,digit / country
+# letter), so the leftmost hit of each kind is the one the separate searches find.
+# The only hit a consumed match can hide is a percentage glued to an HS code
+# ("HS 870830%"); _PCT_TAIL spots that case and defers to PCT_PAT.
+_COMBINED_PAT = re.compile(
+    r"(?i:\b(?:HS|HTS)\s*(?P<hs>[0-9]{4,8})\b)"
+    r"|(?P<sign>\+|-)?\s*(?P<pct>[0-9]{1,2}(?:\.[0-9]+)?)\s?%"
+    r"|(?i:\b(?P<cty>China|CN|Vietnam|VN|Mexico|MX|United States|US|EU)\b)"
+)
+_PCT_TAIL = re.compile(r"(?:\.[0-9]+)?\s?%")
+
+@dataclass
+class NormalizedBatch:
+    hs_code: np.ndarray         # object; None where no code/hint
+    pct: np.ndarray             # float; NaN where no percentage
+    origin: np.ndarray          # object; None where no country
+    confidence: np.ndarray      # float
+    change_type: np.ndarray     # object
+    hs_found: np.ndarray        # bool
+    destination: str = "US"
+
+    def __len__(self) -> int:
+        return len(self.confidence)
+
+    @cached_property
+    def emit(self) -> np.ndarray:
+        """Rows for which normalize_to_event would return an event (computed once; the arrays are not reassigned)."""
+        return (self.hs_code != None) & ~np.isnan(self.pct) & (self.confidence >= 0.6)  # noqa: E711
+
+    def event(self, i: int) -> Optional[TariffChangeEvent]:
+        if not self.emit[i]:
+            return None
+        return TariffChangeEvent(
+            hs_code=str(self.hs_code[i]),
+            origin=self.origin[i] or "CN",
+            destination=self.destination,
+            new_rate_pct=abs(float(self.pct[i])),
+            effective_date="(unknown)",
+            regulatory_change_type=self.change_type[i],
+            source="watcher:normalized"
+        )
+
+    def to_events(self) -> List[Optional[TariffChangeEvent]]:
+        out: List[Optional[TariffChangeEvent]] = [None] * len(self)
+        for i in np.flatnonzero(self.emit):
+            out[i] = self.event(i)
+        return out
+
+def _normalize_chunk(args) -> Tuple[list, list, list, list, list, list]:
+    texts, hints = args
+    hs_out, pct_out, origin_out, conf_out, type_out, found_out = [], [], [], [], [], []
+    for text, hint in zip(texts, hints):
+        hs = sign = pct = origin = None
+        for m in _COMBINED_PAT.finditer(text):
+            kind = m.lastgroup
+            if kind == "hs":
+                if hs is None:
+                    hs = m.group("hs")
+                if pct is None and _PCT_TAIL.match(text, m.end()):
+                    pm = PCT_PAT.search(text, m.start())
+                    pct, sign = float(pm.group(2)), pm.group(1) or ""
+            elif kind == "pct":
+                if pct is None:
+                    pct, sign = float(m.group("pct")), m.group("sign") or ""
+            elif origin is None:
+                # same key as normalize_to_event, which looks up c[0] of each findall() hit
+                origin = COUNTRY_MAP.get(m.group("cty")[0].lower())
+            if hs is not None and pct is not None and origin is not None:
+                break
+
+        text_l = text.lower()
+        change_type = ("tariff_increase" if "increase" in text_l or "+" in (sign or "")
+                       else "tariff_decrease" if "decrease" in text_l or "cut" in text_l else "tariff_increase")
+        hs_code = hs if hs is not None else (hint if hint else None)
+        conf = 0.0
+        if hs_code: conf += 0.4
+        if pct is not None: conf += 0.3
+        if origin: conf += 0.2
+        if "tariff" in text_l or "duty" in text_l: conf += 0.1
+
+        hs_out.append(hs_code)
+        pct_out.append(pct)
+        origin_out.append(origin)
+        conf_out.append(min(conf, 0.99))
+        type_out.append(change_type)
+        found_out.append(hs is not None)
+    return hs_out, pct_out, origin_out, conf_out, type_out, found_out
+
+def normalize_batch(texts: Sequence[str], hs_hints: Optional[Sequence[Optional[str]] | str] = None,
+                    default_dest: str = "US", workers: int = 1, chunk_size: int = 20_000) -> NormalizedBatch:
+    """Columnar normalize_to_event over many texts; identical results, one regex pass per text."""
+    texts = list(texts)
+    if hs_hints is None or isinstance(hs_hints, str):
+        hints: Sequence[Optional[str]] = [hs_hints] * len(texts)
+    else:
+        hints = list(hs_hints)
+    chunks = [(texts[i:i + chunk_size], hints[i:i + chunk_size]) for i in range(0, len(texts), chunk_size)]
+
+    if workers > 1 and len(chunks) > 1:
+        with ProcessPoolExecutor(max_workers=workers) as ex:
+            parts = list(ex.map(_normalize_chunk, chunks))
+    else:
+        parts = [_normalize_chunk(c) for c in chunks]
+
+    cols = [[v for part in parts for v in part[k]] for k in range(6)]
+    return NormalizedBatch(
+        hs_code=np.array(cols[0], dtype=object),
+        pct=np.array([np.nan if v is None else v for v in cols[1]], dtype=float),
+        origin=np.array(cols[2], dtype=object),
+        confidence=np.array(cols[3], dtype=float),
+        change_type=np.array(cols[4], dtype=object),
+        hs_found=np.array(cols[5], dtype=bool),
+        destination=default_dest,
+    )
+
 # --- Fetchers ---
-def _fetch_rss(url: str, timeout: float) -> List[Dict[str, Any]]:
-    feed = feedparser.parse(url)
+def _rss_items(content) -> List[Dict[str, Any]]:
+    feed = feedparser.parse(content)
     out = []
     for e in feed.entries[:10]:
         title = getattr(e, "title", "")
@@ -110,28 +257,98 @@ def _fetch_rss(url: str, timeout: float) -> List[Dict[str, Any]]:
         out.append({"title": title, "summary": summary})
     return out
 
+def _json_items(data: Any) -> List[Dict[str, Any]]:
+    # expect a list of dicts with "title"/"summary" keys; adapt if needed
+    if isinstance(data, dict):  # try typical "items" key
+        data = data.get("items", [])
+    return data
+
+def _fetch_rss(url: str, timeout: float) -> List[Dict[str, Any]]:
+    with httpx.Client(timeout=timeout, follow_redirects=True) as client:
+        r = client.get(url)
+        r.raise_for_status()
+        return _rss_items(r.content)
+
 def _fetch_json(url: str, timeout: float) -> Any:
     with httpx.Client(timeout=timeout) as client:
         r = client.get(url)
         r.raise_for_status()
         return r.json()
 
+async def _fetch_source_async(client: httpx.AsyncClient, src: Source, cfg: WatcherConfig,
+                              validators: Dict[str, Dict[str, str]]) -> Tuple[List[Dict[str, Any]], int]:
+    """Conditional GET with per-source timeout and backoff; returns (items, http_status). 304 -> no items."""
+    if src.kind not in ("rss", "json"):
+        return [], 0
+    known = validators.get(src.name, {})
+    headers = {}
+    if known.get("etag"):
+        headers["If-None-Match"] = known["etag"]
+    if known.get("last_modified"):
+        headers["If-Modified-Since"] = known["last_modified"]
+    timeout = src.timeout_s if src.timeout_s is not None else cfg.timeout_s
+
+    for attempt in range(cfg.retries + 1):
+        try:
+            r = await client.get(src.url, headers=headers, timeout=timeout)
+            if r.status_code == 304:
+                return [], 304
+            r.raise_for_status()
+            items = _rss_items(r.content) if src.kind == "rss" else _json_items(r.json())
+            # only remember validators for a body we could parse, or the next poll 304s past it
+            fresh = {k: v for k, v in (("etag", r.headers.get("ETag")),
+                                       ("last_modified", r.headers.get("Last-Modified"))) if v}
+            if fresh:
+                validators[src.name] = fresh
+            return items, r.status_code
+        except Exception:
+            if attempt < cfg.retries:
+                await asyncio.sleep(cfg.backoff_s * (2 ** attempt))
+    return [], 0
+
 # --- Main watcher run ---
-def run_once(cfg: WatcherConfig) -> List[TariffChangeEvent]:
-    seen = _load_seen(cfg.cache_path)
-    emitted: List[TariffChangeEvent] = []
+def _open_seen(cfg: WatcherConfig) -> SeenStore:
+    store = SeenStore(cfg.seen_path, max_items=cfg.seen_max_items, ttl_s=cfg.seen_ttl_s)
+    if len(store) == 0:
+        store.migrate_jsonl(cfg.cache_path)
+    return store
 
+def _ingest(src: Source, data_items: Iterable[Dict[str, Any]], seen: SeenStore, cfg: WatcherConfig,
+            emitted: List[TariffChangeEvent], records: List[Dict[str, Any]],
+            emitted_ids: Optional[List[str]] = None) -> None:
+    for item in data_items:
+        text = (item.get("title","") + " " + item.get("summary","")).strip()
+        if not text:
+            continue
+        _id = _hash(src.name + "|" + text)
+        if _id in seen:
+            continue
+
+        ev, conf, meta = normalize_to_event(text, hs_hint=src.hs_hint, default_dest=cfg.destination)
+        records.append({"_id": _id, "source": src.name, "text": text, "confidence": conf, "meta": meta})
+        seen.add(_id)
+
+        # emit only if confident enough; otherwise your demo can show it in a triage list
+        if ev and conf >= 0.75:
+            emitted.append(ev)
+            if emitted_ids is not None:
+                emitted_ids.append(_id)
+
+def _commit(cfg: WatcherConfig, seen: SeenStore, records: List[Dict[str, Any]]) -> None:
+    _save_jsonl_many(cfg.cache_path, records)
+    seen.flush()
+    seen.compact()
+
+def _poll_sync(cfg: WatcherConfig, seen: SeenStore, emitted: List[TariffChangeEvent], records: List[Dict[str, Any]]) -> None:
     for src in cfg.sources:
         data_items = []
+        timeout = src.timeout_s if src.timeout_s is not None else cfg.timeout_s
         for attempt in range(cfg.retries + 1):
             try:
                 if src.kind == "rss":
-                    data_items = _fetch_rss(src.url, cfg.timeout_s)
+                    data_items = _fetch_rss(src.url, timeout)
                 elif src.kind == "json":
-                    data_items = _fetch_json(src.url, cfg.timeout_s)
-                    # expect a list of dicts with "title"/"summary" keys; adapt if needed
-                    if isinstance(data_items, dict):  # try typical "items" key
-                        data_items = data_items.get("items", [])
+                    data_items = _json_items(_fetch_json(src.url, timeout))
                 else:
                     data_items = []
                 break
@@ -141,22 +358,34 @@ def run_once(cfg: WatcherConfig) -> List[TariffChangeEvent]:
                 else:
                     time.sleep(0.2)
 
-        # normalize
-        for item in data_items:
-            text = (item.get("title","") + " " + item.get("summary","")).strip()
-            if not text:
-                continue
-            _id = _hash(src.name + "|" + text)
-            if _id in seen:
-                continue
+        _ingest(src, data_items, seen, cfg, emitted, records)
 
-            ev, conf, meta = normalize_to_event(text, hs_hint=src.hs_hint, default_dest=cfg.destination)
-            rec = {"_id": _id, "source": src.name, "text": text, "confidence": conf, "meta": meta}
-            _save_jsonl(cfg.cache_path, rec)
-            seen.add(_id)
+def run_once(cfg: WatcherConfig) -> List[TariffChangeEvent]:
+    emitted: List[TariffChangeEvent] = []
+    records: List[Dict[str, Any]] = []
+    with _open_seen(cfg) as seen:
+        _poll_sync(cfg, seen, emitted, records)
+        _commit(cfg, seen, records)
+    return emitted
 
-            # emit only if confident enough; otherwise your demo can show it in a triage list
-            if ev and conf >= 0.75:
-                emitted.append(ev)
+async def run_once_async(cfg: WatcherConfig, client: Optional[httpx.AsyncClient] = None) -> List[TariffChangeEvent]:
+    """Fetch every source concurrently over one pooled client; a slow feed only costs its own timeout."""
+    validators = _load_validators(cfg.state_path)
+    own_client = client is None
+    if own_client:
+        limits = httpx.Limits(max_connections=cfg.max_connections)
+        client = httpx.AsyncClient(limits=limits, follow_redirects=True)
+    try:
+        results = await asyncio.gather(*(_fetch_source_async(client, src, cfg, validators) for src in cfg.sources))
+    finally:
+        if own_client:
+            await client.aclose()
+    _save_validators(cfg.state_path, validators)
 
+    emitted: List[TariffChangeEvent] = []
+    records: List[Dict[str, Any]] = []
+    with _open_seen(cfg) as seen:
+        for src, (items, _status) in zip(cfg.sources, results):   # source order keeps output deterministic
+            _ingest(src, items, seen, cfg, emitted, records)
+        _commit(cfg, seen, records)
     return emitted
@@ -18,12 +18,9 @@ def next_demo_event(ds: DataStore, scenario_id: int = 1) -> TariffChangeEvent:
         source="demo:scenarios.csv"
     )
 
-def try_live_feed(dest: str = "US") -> Optional[TariffChangeEvent]:
-    """
-    Live-lite: poll a tiny whitelist of stable feeds (RSS/JSON). 
-    If nothing confident is found, return None (the app should fallback to the demo scenario).
-    """
-    cfg = WatcherConfig(
+def live_config(dest: str = "US") -> WatcherConfig:
+    """A tiny whitelist of stable feeds (RSS/JSON); also the config for a long-running WatcherService."""
+    return WatcherConfig(
         sources=[
             # Replace/augment with known-stable official feeds in your org
             Source(name="USTRPressRSS", kind="rss", url="https://ustr.gov/feeds/press-releases/rss.xml", hs_hint=None),
@@ -34,8 +31,18 @@ def try_live_feed(dest: str = "US") -> Optional[TariffChangeEvent]:
         timeout_s=2.0,
         retries=1
     )
+
+def poll_live_feed(dest: str = "US") -> List[TariffChangeEvent]:
+    """One synchronous pass over live_config(); every confident event, [] on any failure."""
     try:
-        events: List[TariffChangeEvent] = watcher_run_once(cfg)
-        return events[0] if events else None
+        return watcher_run_once(live_config(dest))
     except Exception:
-        return None
+        return []
+
+def try_live_feed(dest: str = "US") -> Optional[TariffChangeEvent]:
+    """
+    Live-lite: the first confident event from poll_live_feed().
+    If nothing confident is found, return None (the app should fallback to the demo scenario).
+    """
+    events = poll_live_feed(dest)
+    return events[0] if events else None
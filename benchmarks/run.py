@@ -0,0 +1,132 @@
+"""Benchmark harness for the decision pipeline.
+
+    python -m benchmarks.run --rows 100000 --out bench.json
+
+Generates a synthetic catalog (atis.synthetic) sized so the BOM has about --rows rows,
+times each stage, and writes one JSON document per run for cross-commit comparison.
+"""
+from __future__ import annotations
+import argparse, json, os, platform, random, subprocess, sys, tempfile, time
+from typing import Callable, Dict, List
+import numpy as np
+
+from atis.data_loader import DataStore
+from atis.policy import Policy
+from atis.cost_engine import compute_cost_for_route
+from atis.sourcing import top3_options
+from atis.audit_store import AuditStore
+from atis.orchestrator import handle_event, use_stores
+from atis.review_state import ReviewState
+from atis.watcher import normalize_batch, normalize_to_event
+from atis.watcher_demo import next_demo_event
+from atis.synthetic import generate
+
+SAMPLE_TEXTS = [
+    "US announces 25% tariff increase on HS 870830 for imports from China starting Sept.",
+    "Federal Register: duty cut to 7.5 % on HTS 731815 from Vietnam",
+    "Customs notice: +10% on HS 840991 (Mexico)",
+    "Press release: trade talks continue, no rate changes announced",
+]
+
+def _stats(samples_s: List[float], units: int = 1) -> Dict[str, float]:
+    ms = np.asarray(samples_s) * 1e3
+    total = float(np.sum(samples_s))
+    return {
+        "n": len(samples_s),
+        "total_s": round(total, 6),
+        "throughput_per_s": round(units * len(samples_s) / total, 3) if total else None,
+        "p50_ms": round(float(np.percentile(ms, 50)), 4),
+        "p90_ms": round(float(np.percentile(ms, 90)), 4),
+        "p99_ms": round(float(np.percentile(ms, 99)), 4),
+        "max_ms": round(float(ms.max()), 4),
+    }
+
+def _time(fn: Callable[[], object], repeat: int) -> List[float]:
+    out = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        out.append(time.perf_counter() - t0)
+    return out
+
+def _git_rev() -> str:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], text=True, stderr=subprocess.DEVNULL).strip()
+    except Exception:
+        return "unknown"
+
+STAGES = ("load", "cost_single_sku", "top3_options", "handle_event", "normalize_scalar", "normalize_batch")
+
+def run(rows: int, repeat: int = 20, seed: int = 0, data_dir: str | None = None,
+        stages: tuple = STAGES) -> Dict[str, object]:
+    """Without data_dir, the synthetic CSVs and throwaway stores live in a temp dir removed afterwards."""
+    if data_dir:
+        return _run(data_dir, rows, repeat, seed, stages)
+    with tempfile.TemporaryDirectory(prefix="atis-bench-") as root:
+        return _run(root, rows, repeat, seed, stages)
+
+def _run(root: str, rows: int, repeat: int, seed: int, stages: tuple) -> Dict[str, object]:
+    n_skus = max(rows // 3, 10)
+    params = dict(n_skus=n_skus, comps_per_sku=3, n_hs=max(50, rows // 500), seed=seed)
+    t0 = time.perf_counter()
+    generate(root, **params)
+    gen_s = time.perf_counter() - t0
+
+    rng = random.Random(seed)
+    results: Dict[str, object] = {}
+    ds, pol = DataStore(root), Policy("./data/policy.yaml")
+    skus = ds.bom["sku"].unique().tolist()
+    routes = ds.routes["route_id"].tolist()
+    event = next_demo_event(ds, 1)
+    n_hit = len(ds.get_skus_by_hs(event.hs_code))
+    corpus = SAMPLE_TEXTS * 2500
+
+    if "load" in stages:
+        results["load"] = _stats(_time(lambda: DataStore(root), max(1, repeat // 5)))
+    if "cost_single_sku" in stages:
+        results["cost_single_sku"] = _stats(_time(lambda: compute_cost_for_route(ds, rng.choice(skus), rng.choice(routes), None), repeat * 10))
+    if "top3_options" in stages:
+        results["top3_options"] = _stats(_time(lambda: top3_options(ds, rng.choice(skus), "R-CN-US", None, 25.0), repeat))
+    if "handle_event" in stages:
+        # decisions go to throwaway stores next to the synthetic data, not the app's ./cache
+        use_stores(AuditStore(os.path.join(root, "audit.sqlite")), ReviewState(os.path.join(root, "review.sqlite")))
+        try:
+            results["handle_event"] = _stats(_time(lambda: handle_event(ds, pol, event), max(1, repeat // 10)), units=n_hit)
+        finally:
+            use_stores()
+        results["handle_event"]["skus_per_event"] = n_hit
+    if "normalize_scalar" in stages:
+        results["normalize_scalar"] = _stats(_time(lambda: normalize_to_event(rng.choice(SAMPLE_TEXTS), None), repeat * 50))
+    if "normalize_batch" in stages:
+        results["normalize_batch"] = _stats(_time(lambda: normalize_batch(corpus), max(1, repeat // 10)), units=len(corpus))
+
+    return {
+        "meta": {
+            "git_rev": _git_rev(), "python": platform.python_version(), "platform": platform.platform(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"), "rows": rows, "params": params,
+            "bom_rows": len(ds.bom), "tariff_rows": len(ds.tariffs), "routes": len(routes),
+            "generate_s": round(gen_s, 3),
+        },
+        "stages": results,
+    }
+
+def main(argv: List[str] | None = None) -> int:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--rows", type=int, default=1000, help="approximate BOM rows (1e3 .. 1e7)")
+    ap.add_argument("--repeat", type=int, default=20)
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--data-dir", default=None, help="where to write the synthetic CSVs (default: temp dir)")
+    ap.add_argument("--stages", default=",".join(STAGES), help="comma-separated subset of: " + ", ".join(STAGES))
+    ap.add_argument("--out", default="-", help="JSON output path, '-' for stdout")
+    args = ap.parse_args(argv)
+    report = run(args.rows, args.repeat, args.seed, args.data_dir, tuple(args.stages.split(",")))
+    text = json.dumps(report, indent=2)
+    if args.out == "-":
+        print(text)
+    else:
+        with open(args.out, "w") as f:
+            f.write(text + "\n")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,11 @@
+import pytest
+from atis import orchestrator
+
+@pytest.fixture(autouse=True)
+def isolated_stores(tmp_path, monkeypatch):
+    """Keep handle_event's audit log and review state out of ./cache."""
+    monkeypatch.setenv("ATIS_AUDIT_DB", str(tmp_path / "audit.sqlite"))
+    monkeypatch.setenv("ATIS_REVIEW_DB", str(tmp_path / "review_state.sqlite"))
+    orchestrator.use_stores()
+    yield
+    orchestrator.use_stores()
@@ -0,0 +1,51 @@
+import itertools
+import numpy as np
+from atis.allocation import CapacityAllocator
+from atis.data_loader import DataStore
+from atis.synthetic import generate
+
+def _store(tmp_path, n_skus, capacity):
+    generate(str(tmp_path), n_skus=n_skus, comps_per_sku=2, n_hs=5, n_countries=4, n_routes=8, suppliers_per_country=2)
+    ds = DataStore(str(tmp_path))
+    ds.suppliers["capacity_units_mo"] = capacity
+    return ds
+
+def test_loose_capacity_matches_unconstrained_choice(tmp_path):
+    ds = _store(tmp_path, 40, 10**9)
+    al = CapacityAllocator(ds)
+    skus = list(ds.bom_index.sku_ids)
+    got = al.allocate(skus, default_demand=100.0)
+    np.testing.assert_allclose(got.score, al.score_matrix(skus).min(axis=1))
+    assert set(got.supplier_ids) <= set(ds.suppliers["supplier_id"])
+
+def test_tight_capacity_is_respected_and_near_optimal(tmp_path):
+    ds = _store(tmp_path, 5, 100)                         # every supplier fits exactly one SKU
+    al = CapacityAllocator(ds, weights={"cost_delta": 0.5, "lead_time_delta": 0.25, "compliance_risk": 0.25})
+    skus = list(ds.bom_index.sku_ids)
+    got = al.allocate(skus, default_demand=100.0, max_rounds=10_000)
+    assert not got.unassigned and got.placed_greedily == 0
+    assert all(got.load[s] <= got.capacity[s] for s in got.load)
+    assert len(set(got.supplier_ids)) == len(skus)
+
+    scores = al.score_matrix(skus)
+    optimum = min(scores[np.arange(len(skus)), list(p)].sum()
+                  for p in itertools.permutations(range(scores.shape[1]), len(skus)))
+    eps = 1e-2 * (np.ptp(scores[np.isfinite(scores)]) + 1.0)
+    assert optimum - 1e-9 <= got.total_score <= optimum + len(skus) * eps
+
+def test_warm_start_reuses_prices_and_assignment(tmp_path):
+    ds = _store(tmp_path, 60, 1000)
+    al = CapacityAllocator(ds)
+    skus = list(ds.bom_index.sku_ids)
+    first = al.allocate(skus, default_demand=100.0)
+    again = al.allocate(skus, default_demand=100.0, warm_start=first)
+    assert again.rounds <= 1 and list(again.supplier_ids) == list(first.supplier_ids)
+    opts = again.options()
+    assert [o.supplier_id for o in opts] == list(first.supplier_ids)
+
+def test_greedy_fallback_counts_only_what_it_placed(tmp_path):
+    ds = _store(tmp_path, 12, 100)                        # 8 suppliers x one SKU each: some SKUs cannot fit
+    al = CapacityAllocator(ds)
+    got = al.allocate(list(ds.bom_index.sku_ids), default_demand=100.0, max_rounds=0)     # all left to greedy
+    assert got.unassigned and 0 < got.placed_greedily == 12 - len(got.unassigned)
+    assert all(got.load[s] <= got.capacity[s] for s in got.load)
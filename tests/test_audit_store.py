@@ -0,0 +1,51 @@
+import sqlite3
+import pytest
+from atis.audit_store import AuditStore
+from atis.data_loader import DataStore
+from atis.policy import Policy
+from atis import orchestrator
+from atis.watcher_demo import next_demo_event
+
+def test_round_trip_and_queries(tmp_path):
+    path = str(tmp_path / "audit.sqlite")
+    orchestrator.use_stores(audit=AuditStore(path))
+    ds, pol = DataStore("./data"), Policy("./data/policy.yaml")
+    first = orchestrator.handle_event(ds, pol, next_demo_event(ds, 1))
+    second = orchestrator.handle_event(ds, pol, next_demo_event(ds, 3))
+    orchestrator.audit_log().close()
+
+    with AuditStore(path) as store:                      # survives a restart
+        assert len(store) == len(first) + len(second)
+        assert [store.record(e) for e in store.query()] == first + second
+        assert [e.sku for e in store.tail(2)] == [d.sku for d in (first + second)[-2:]]
+
+        eid = store.event_id(first[0].event)
+        assert [e.sku for e in store.query(event_id=eid)] == [d.sku for d in first]
+        assert store.event(eid) == first[0].event
+        assert len(store.query(sku=first[0].sku)) == sum(d.sku == first[0].sku for d in first + second)
+        assert len(store.query(auto_executed=False)) == sum(not d.auto_executed for d in first + second)
+        last = store.tail(1)[0]
+        assert store.query(since=last.ts + 1) == [] and len(store.query(until=last.ts + 1)) == len(store)
+
+def test_event_interned_once(tmp_path):
+    ds = DataStore("./data")
+    decisions = orchestrator._decide_many(ds, Policy("./data/policy.yaml"), ds.get_skus_by_hs("870830"), next_demo_event(ds, 1),
+                                          "R-CN-US", 25.0)
+    with AuditStore(str(tmp_path / "a.sqlite")) as store:
+        store.append([d for d, _ in decisions])
+        store.append([d for d, _ in decisions])
+        assert store._conn().execute("SELECT COUNT(*) FROM events").fetchone()[0] == 1
+        assert len(store) == 2 * len(decisions)
+
+def test_rolled_back_append_can_be_retried(tmp_path):
+    ds = DataStore("./data")
+    decisions = [d for d, _ in orchestrator._decide_many(ds, Policy("./data/policy.yaml"), ds.get_skus_by_hs("870830"),
+                                                         next_demo_event(ds, 1), "R-CN-US", 25.0)]
+    with AuditStore(str(tmp_path / "a.sqlite")) as store:
+        db = store._conn()
+        db.execute("CREATE TRIGGER fail BEFORE INSERT ON decisions BEGIN SELECT RAISE(ABORT, 'disk full'); END")
+        with pytest.raises(sqlite3.DatabaseError):
+            store.append(decisions)
+        db.execute("DROP TRIGGER fail")
+        assert store.append(decisions) == len(decisions)
+        assert [store.record(e) for e in store.query()] == decisions
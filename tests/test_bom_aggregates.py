@@ -0,0 +1,28 @@
+import pandas as pd
+from atis.data_loader import DataStore
+
+def test_aggregates_match_bom_scan():
+    ds = DataStore("./data")
+    bom = ds.bom
+    for sku, comps in bom.groupby("sku"):
+        assert ds.sku_materials(sku) == (comps["qty_per"] * comps["unit_cost_usd"]).sum()
+        assert ds.primary_hts(sku) == comps.iloc[0]["hts_code"]
+        assert ds.sku_agg.at[sku, "origins"] == frozenset(comps["origin_country"])
+        pd.testing.assert_frame_equal(ds.get_components(sku), comps)
+    for hs in bom["hts_code"].unique():
+        assert ds.get_skus_by_hs(hs) == bom[bom["hts_code"] == hs]["sku"].unique().tolist()
+
+def test_update_bom_invalidates():
+    ds = DataStore("./data")
+    bom = ds.bom.copy()
+    bom.loc[bom["component_id"] == "C-1001", "unit_cost_usd"] = 100.0
+    version = ds.bom_version
+    ds.update_bom(bom)
+    assert ds.bom_version == version + 1
+    assert ds.sku_materials("SKU-001") == 100.0 + 4 * 0.1
+
+def test_get_components_returns_a_copy():
+    ds = DataStore("./data")
+    comps = ds.get_components("SKU-001")
+    comps["unit_cost_usd"] = 0.0
+    assert (ds.get_components("SKU-001")["unit_cost_usd"] > 0).all()
@@ -0,0 +1,60 @@
+from concurrent.futures import ThreadPoolExecutor
+from atis import orchestrator
+from atis.classifier import CachedClassifier, ClassifyRequest, NaiveClassifier, classify_requests
+from atis.data_loader import DataStore
+
+class _Counting(NaiveClassifier):
+    def __init__(self):
+        self.batches = []
+
+    def classify_batch(self, items):
+        self.batches.append(len(items))
+        return super().classify_batch(items)
+
+class _Clock:
+    t = 0.0
+
+    def __call__(self):
+        return self.t
+
+def test_cache_keyed_by_sku_and_bom_hash():
+    ds = DataStore("./data")
+    inner = _Counting()
+    cached = CachedClassifier(inner, batch_size=2, executor=ThreadPoolExecutor(2))
+    skus = list(ds.bom_index.sku_ids)
+    first = cached.classify(classify_requests(ds, skus))
+    assert first == NaiveClassifier().classify_batch(classify_requests(ds, skus))
+    assert inner.batches == [2] * (len(skus) // 2) + [len(skus) % 2] * (len(skus) % 2)
+
+    assert cached.classify(classify_requests(ds, skus)) == first
+    assert cached.stats() == {"entries": len(skus), "hits": len(skus), "misses": len(skus)}
+
+    bom = ds.bom.copy()
+    bom.loc[bom["sku"] == "SKU-001", "description"] = "Brake rotor (cast iron)"
+    ds.update_bom(bom)
+    calls = len(inner.batches)
+    cached.classify(classify_requests(ds, skus))
+    assert sum(inner.batches[calls:]) == 1                # only the edited SKU is reclassified
+
+def test_lru_and_ttl_eviction():
+    clock = _Clock()
+    cached = CachedClassifier(_Counting(), maxsize=2, ttl_s=10, clock=clock)
+    a, b, c = (ClassifyRequest(s, "870830", "") for s in "abc")
+    cached.classify([a, b])
+    cached.classify([a])                                  # a is now most recent
+    cached.classify([c])                                  # evicts b
+    assert cached.misses == 3
+    cached.classify([a, c])
+    assert cached.misses == 3
+    cached.classify([b])
+    assert cached.misses == 4
+    clock.t = 11
+    cached.classify([b])
+    assert cached.misses == 5
+
+def test_approvals_override_cached_results():
+    ds = DataStore("./data")
+    before = orchestrator.classify_skus(ds, ["SKU-001"])[0]
+    orchestrator.approve_hts("SKU-001", 0.99)
+    assert orchestrator.classify_skus(ds, ["SKU-001"])[0].confidence == 0.99
+    assert orchestrator.CLASSIFIER.classify(classify_requests(ds, ["SKU-001"]))[0] == before
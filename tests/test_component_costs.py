@@ -0,0 +1,76 @@
+import subprocess, sys
+import numpy as np
+from atis.component_costs import compute_component_costs_batch
+from atis.cost_engine import compute_costs_batch
+from atis.data_loader import DataStore
+from atis.sourcing import SourcingEngine
+from atis.synthetic import generate
+from atis.watcher_demo import next_demo_event
+
+def _reference(ds, sku, route, component_origin=True):
+    total = 0.0
+    for _, c in ds.get_components(sku).iterrows():
+        line = c["qty_per"] * c["unit_cost_usd"]
+        value = line + 0.05 * line
+        for j, (o, d) in enumerate(ds.route_graph.legs[route]):
+            origin = c["origin_country"] if j == 0 and component_origin else o
+            duty = value * (ds.latest_tariff(c["hts_code"], origin, d) / 100.0)
+            total += duty
+            value += duty
+    return total
+
+def test_matches_per_component_loop(tmp_path):
+    generate(str(tmp_path), n_skus=30, comps_per_sku=4, n_hs=6, n_routes=10)
+    ds = DataStore(str(tmp_path))
+    skus, routes = list(ds.bom_index.sku_ids), list(ds.route_graph.route_ids)
+    for component_origin in (True, False):
+        cm = compute_component_costs_batch(ds, skus, routes, component_origin=component_origin)
+        expected = [[_reference(ds, s, r, component_origin) for r in routes] for s in skus]
+        np.testing.assert_allclose(cm.duties, expected, rtol=1e-12)
+
+def test_single_component_route_origin_matches_sku_model():
+    ds = DataStore("./data")
+    skus = [s for s in ds.bom_index.sku_ids if len(ds.get_components(s)) == 1] or ["SKU-001"]
+    routes = list(ds.route_graph.route_ids)
+    comp = compute_component_costs_batch(ds, skus, routes, component_origin=False)
+    sku_level = compute_costs_batch(ds, skus, routes)
+    single = [i for i, s in enumerate(skus) if len(ds.get_components(s)) == 1]
+    np.testing.assert_allclose(comp.cogs[single], sku_level.cogs[single], rtol=1e-12)
+
+def test_event_is_an_overlay_not_a_global_hs_swap():
+    ds = DataStore("./data")
+    event = next_demo_event(ds, 1).model_copy(update={"new_rate_pct": 80.0, "effective_date": "2099-01-01"})
+    routes = list(ds.route_graph.route_ids)
+    skus = list(ds.bom_index.sku_ids)
+    base = compute_component_costs_batch(ds, skus, routes)
+    hiked = compute_component_costs_batch(ds, skus, routes, event=event)
+    touched = {s for s in ds.get_skus_by_hs(event.hs_code)}
+    changed = {s for s, row in zip(skus, hiked.duties - base.duties) if np.any(row != 0)}
+    assert changed and changed <= touched
+    assert ds.tariff_index.latest("870830", "CN", "US") != 80.0
+
+def test_component_duty_model_feeds_sourcing(tmp_path):
+    generate(str(tmp_path), n_skus=20, comps_per_sku=3, n_hs=5, n_routes=8)
+    ds = DataStore(str(tmp_path))
+    eng = SourcingEngine(ds, duty_model="component")
+    sku, base = ds.bom_index.sku_ids[0], "R-CN-US"
+    routes = [base] + [r for r in ds.route_graph.route_ids if r != base]
+    cogs = compute_component_costs_batch(ds, [sku], routes, component_origin=False).cogs[0]
+    penalty = dict(zip(routes[1:], np.maximum(0.0, (cogs[1:] - cogs[0]) / 25.0 * 100.0)))
+    for opt in eng.top_k(sku, base, None, 25.0):
+        assert abs(opt.cost_delta - penalty[opt.route_id]) < 1e-9
+
+def test_component_sourcing_rates_each_route_from_its_origin():
+    ds = DataStore("./data")
+    eng = SourcingEngine(ds, duty_model="component")
+    routes = ["R-CN-US", "R-VN-US", "R-MX-US", "R-DE-US"]
+    duties = eng.route_cogs("SKU-001", routes, None) - eng.route_cogs("SKU-001", ["R-MX-US"], None)[0]
+    np.testing.assert_allclose(duties, [3.31275, 0.65625, 0.0, 0.0])
+    event = next_demo_event(ds, 1).model_copy(update={"new_rate_pct": 80.0})     # not applied: same as "sku"
+    assert [o.model_dump() for o in eng.top_k("SKU-001", "R-VN-US", event, 25.0)] == \
+        [o.model_dump() for o in eng.top_k("SKU-001", "R-VN-US", None, 25.0)]
+    assert {o.route_id: o.cost_delta for o in eng.top_k("SKU-001", "R-VN-US", None, 25.0, k=99)}["R-CN-US"] > 0
+
+def test_costing_does_not_import_the_orchestrator():
+    code = "import sys, atis.component_costs, atis.scenario; print('atis.orchestrator' in sys.modules)"
+    assert subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True).stdout.strip() == "False"
@@ -0,0 +1,24 @@
+import numpy as np
+from atis.data_loader import DataStore
+from atis.cost_engine import compute_cost_for_route, compute_costs_batch
+from atis.watcher_demo import next_demo_event
+
+def test_batch_matches_per_route_costing():
+    ds = DataStore("./data")
+    skus = ds.bom["sku"].unique().tolist()
+    routes = ds.routes["route_id"].tolist()
+    for event in (None, next_demo_event(ds, 2)):
+        cm = compute_costs_batch(ds, skus, routes, event)
+        assert cm.duties.shape == (len(skus), len(routes))
+        for sku in skus:
+            for r in routes:
+                expected = compute_cost_for_route(ds, sku, r, event)
+                got = cm.row(sku, r)
+                assert np.allclose([got[k] for k in expected], list(expected.values()), rtol=0, atol=1e-9)
+
+def test_batch_frame_layout():
+    ds = DataStore("./data")
+    cm = compute_costs_batch(ds, ["SKU-001", "SKU-002"], ["R-CN-US", "R-CN-VN-US"])
+    df = cm.to_frame()
+    assert list(df.columns) == ["sku", "route_id", "materials", "freight", "duties", "cogs"]
+    assert len(df) == 4
@@ -0,0 +1,70 @@
+import numpy as np
+import pandas as pd
+from atis.data_loader import DataStore
+from atis.cost_engine import compute_costs_batch, cost_cache_for
+from atis.watcher_demo import next_demo_event
+
+def test_event_invalidates_only_dependent_cells():
+    ds = DataStore("./data")
+    cache = cost_cache_for(ds)
+    event = next_demo_event(ds, 1)                       # HS 870830
+    routes = list(ds.route_graph.route_ids)
+    for sku in ds.get_skus_by_hs(event.hs_code):
+        cache.costs(ds, sku, routes, event)
+    assert cache.stats()["misses"] == len(cache) == 3 * len(routes)
+
+    cache.costs(ds, "SKU-001", routes, event)
+    assert cache.hits == len(routes)
+
+    ds.append_tariffs(pd.DataFrame([{"hs_code": "870830", "origin": "CN", "destination": "US",
+                                     "rate_pct": 40.0, "effective_date": "2026-01-01"}]))
+    uses_cn_us = ds.route_graph.routes_with_leg("CN", "US")
+    assert cache.invalidations == 3 * len(uses_cn_us)
+
+    got = cache.costs(ds, "SKU-001", routes, event)
+    assert cache.misses == 3 * len(routes) + len(uses_cn_us)
+    expected = compute_costs_batch(ds, ["SKU-001"], routes, event)
+    assert np.array_equal(got[:, 3], expected.cogs[0])
+
+def test_bom_change_clears_cache():
+    ds = DataStore("./data")
+    cache = cost_cache_for(ds)
+    cache.costs(ds, "SKU-001", ["R-CN-US"], None)
+    ds.update_bom(ds.bom)
+    assert len(cache) == 0 and cache.invalidations == 1
+
+def test_invalidation_during_pricing_is_not_undone(monkeypatch):
+    from atis import cost_engine
+    ds = DataStore("./data")
+    cache = cost_engine.CostCache()
+    routes = list(ds.route_graph.route_ids)
+    original = cost_engine.compute_costs_batch
+
+    def racing(*args, **kwargs):
+        cm = original(*args, **kwargs)          # priced with the old rates...
+        cache.invalidate([("870830", "CN", "US")])  # ...while a tariff update lands
+        return cm
+
+    monkeypatch.setattr(cost_engine, "compute_costs_batch", racing)
+    cache.costs(ds, "SKU-001", routes, None)
+    assert len(cache) == 0 and cache.misses == len(routes)
+    monkeypatch.setattr(cost_engine, "compute_costs_batch", original)
+    cache.costs(ds, "SKU-001", routes, None)
+    assert len(cache) == len(routes)
+
+def test_size_cap_evicts_least_recently_used_and_prunes_deps():
+    from atis.cost_engine import CostCache
+    ds = DataStore("./data")
+    routes = list(ds.route_graph.route_ids)
+    skus = list(ds.bom_index.sku_ids)[:4]
+    cache = CostCache(maxsize=2 * len(routes))
+    for sku in skus[:2]:
+        cache.costs(ds, sku, routes, None)
+    cache.costs(ds, skus[0], routes, None)              # skus[0] is now the most recently used
+    cache.costs(ds, skus[2], routes, None)
+    assert len(cache) == 2 * len(routes) and cache.evictions == len(routes)
+    assert {k[0] for k in cache._cells} == {skus[0], skus[2]}
+    assert all(k[0] in (skus[0], skus[2]) for dependents in cache._deps.values() for k in dependents)
+
+    cache.invalidate(list(cache._deps))
+    assert len(cache) == 0 and cache.stats()["dep_keys"] == 0
@@ -0,0 +1,56 @@
+import json, threading, time
+from atis import metrics, orchestrator
+from atis.data_loader import DataStore
+from atis.policy import Policy
+from atis.watcher_demo import next_demo_event
+
+def test_disabled_is_a_no_op():
+    original = DataStore.get_skus_by_hs
+    assert not metrics.REGISTRY.enabled
+    assert metrics.stage("x") is metrics.trace("y") is metrics._NULL
+    metrics.REGISTRY.enable()
+    metrics.REGISTRY.disable()
+    assert DataStore.get_skus_by_hs is original
+
+def test_per_event_stage_breakdown_and_export():
+    ds, pol = DataStore("./data"), Policy("./data/policy.yaml")
+    reg = metrics.REGISTRY
+    reg.reset()
+    reg.enable()
+    try:
+        decisions = orchestrator.handle_event(ds, pol, next_demo_event(ds, 1))
+    finally:
+        reg.disable()
+
+    (tr,) = reg.traces
+    assert tr["label"].startswith("870830 CN->US")
+    assert {"classify", "source", "policy", "record", "datastore.get_skus_by_hs", "sourcing.top_k"} <= set(tr["stages"])
+    assert tr["total_ms"] >= tr["stages"]["source"]
+    snap = json.loads(reg.to_json())
+    assert snap["timers"]["sourcing.top_k"]["calls"] == len(decisions)
+    assert snap["counters"]["decisions"] == len(decisions)
+    prom = reg.to_prometheus()
+    assert 'atis_stage_calls_total{stage="policy"} 1' in prom
+    assert f"# TYPE atis_decisions_total counter\natis_decisions_total {len(decisions)}" in prom
+    assert "atis_events_total 1" in prom
+
+def test_sampling_profiler_sees_busy_thread():
+    stop = threading.Event()
+
+    def spin():
+        while not stop.is_set():
+            sum(range(1000))
+
+    t = threading.Thread(target=spin)
+    t.start()
+    prof = metrics.SamplingProfiler(interval_s=0.001)
+    prof.start()
+    deadline = time.monotonic() + 0.1
+    while time.monotonic() < deadline:          # readers iterate while the sampler keeps adding
+        prof.top(5)
+        prof.collapsed()
+    prof.stop()
+    stop.set()
+    t.join()
+    assert any(f.startswith("spin ") for f, _ in prof.top(50))
+    assert "spin (test_metrics.py" in prof.collapsed()
@@ -0,0 +1,81 @@
+import threading
+from atis import orchestrator
+from atis.cost_engine import cost_cache_for
+from atis.data_loader import DataStore
+from atis.models import TariffChangeEvent
+from atis.pipeline import apply_events
+from atis.policy import Policy
+from atis.synthetic import generate
+from atis.watcher_demo import next_demo_event
+
+def test_parallel_matches_serial(monkeypatch):
+    ds, pol = DataStore("./data"), Policy("./data/policy.yaml")
+    event = next_demo_event(ds, 1)
+    serial = orchestrator.handle_event(ds, pol, event, workers=1)
+
+    monkeypatch.setattr(orchestrator, "PARALLEL_MIN_SKUS", 1)
+    parallel = orchestrator.handle_event(ds, pol, event, workers=2)
+
+    assert [d.model_dump() for d in parallel] == [d.model_dump() for d in serial]
+    assert [d.sku for d in parallel] == ds.get_skus_by_hs(event.hs_code)
+
+def test_workers_see_tariffs_appended_after_load(monkeypatch):
+    ds, pol = DataStore("./data"), Policy("./data/policy.yaml")
+    event = next_demo_event(ds, 1)
+    apply_events(ds, [event.model_copy(update={"origin": "VN", "new_rate_pct": 60.0})])
+    serial = orchestrator.handle_event(ds, pol, event, workers=1)
+
+    monkeypatch.setattr(orchestrator, "PARALLEL_MIN_SKUS", 1)
+    parallel = orchestrator.handle_event(ds, pol, event, workers=2)
+    assert [d.model_dump() for d in parallel] == [d.model_dump() for d in serial]
+
+def test_concurrent_parallel_calls_keep_their_own_state(tmp_path, monkeypatch):
+    generate(str(tmp_path), n_skus=120, comps_per_sku=2, n_hs=4, n_routes=8)
+    stores = [DataStore("./data"), DataStore(str(tmp_path))]
+    pol = Policy("./data/policy.yaml")
+    events = [next_demo_event(stores[0], 1),
+              TariffChangeEvent(hs_code=str(stores[1].bom["hts_code"].iloc[0]), origin="CN", new_rate_pct=30.0,
+                                effective_date="2025-09-01")]
+    serial = [[d.model_dump() for d in orchestrator.handle_event(ds, pol, ev, workers=1)]
+              for ds, ev in zip(stores, events)]
+
+    monkeypatch.setattr(orchestrator, "PARALLEL_MIN_SKUS", 1)
+    results = [None] * 2 * len(stores)
+
+    def run(i):
+        ds, ev = stores[i % 2], events[i % 2]
+        results[i] = [d.model_dump() for d in orchestrator.handle_event(ds, pol, ev, workers=2)]
+
+    threads = [threading.Thread(target=run, args=(i,)) for i in range(len(results))]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert results == serial * 2
+
+def test_fan_out_while_another_thread_holds_the_cost_cache(monkeypatch):
+    ds, pol = DataStore("./data"), Policy("./data/policy.yaml")
+    event = next_demo_event(ds, 1)
+    serial = [d.model_dump() for d in orchestrator.handle_event(ds, pol, event, workers=1)]
+    monkeypatch.setattr(orchestrator, "PARALLEL_MIN_SKUS", 1)
+
+    cache = cost_cache_for(ds)
+    held, done = threading.Event(), threading.Event()
+
+    def pricing():                      # another session, stuck mid-lookup with the cache lock held
+        with cache._lock:
+            held.set()
+            done.wait(60)
+
+    other = threading.Thread(target=pricing)
+    other.start()
+    held.wait()
+    result = []
+    call = threading.Thread(target=lambda: result.append(orchestrator.handle_event(ds, pol, event, workers=4)),
+                            daemon=True)
+    call.start()
+    call.join(timeout=60)
+    done.set()
+    other.join()
+    assert not call.is_alive(), "pool workers inherited the held cache lock"
+    assert [d.model_dump() for d in result[0]] == serial
@@ -0,0 +1,35 @@
+import asyncio
+from atis.data_loader import DataStore
+from atis.policy import Policy
+from atis.models import TariffChangeEvent
+from atis.pipeline import EventPipeline, coalesce
+
+def _ev(hs, origin, rate, date="2026-01-01"):
+    return TariffChangeEvent(hs_code=hs, origin=origin, new_rate_pct=rate, effective_date=date)
+
+def test_coalesce_keeps_last_per_key():
+    out = coalesce([_ev("870830", "CN", 20), _ev("731815", "CN", 9), _ev("870830", "CN", 30)])
+    assert [(e.hs_code, e.new_rate_pct) for e in out] == [("870830", 30), ("731815", 9)]
+
+def test_run_sync_applies_rates_and_streams_decisions():
+    ds, pol = DataStore("./data"), Policy("./data/policy.yaml")
+    pipe = EventPipeline(ds, pol, max_batch=10)
+    decisions = list(pipe.run_sync([_ev("870830", "CN", 20), _ev("870830", "CN", 40)]))
+    assert ds.latest_tariff("870830", "CN", "US") == 40.0
+    assert [d.sku for d in decisions] == ds.get_skus_by_hs("870830")
+    assert pipe.stats.events_in == 2 and pipe.stats.events_coalesced == 1
+
+def test_async_queue_window():
+    ds, pol = DataStore("./data"), Policy("./data/policy.yaml")
+    pipe = EventPipeline(ds, pol, window_s=0.05)
+
+    async def main():
+        q = asyncio.Queue()
+        for ev in (_ev("870830", "CN", 20), _ev("870830", "CN", 35), _ev("731815", "CN", 9), None):
+            q.put_nowait(ev)
+        return [d async for d in pipe.run(q)]
+
+    decisions = asyncio.run(main())
+    assert {d.event.hs_code for d in decisions} == {"870830", "731815"}
+    assert all(d.event.new_rate_pct == 35 for d in decisions if d.event.hs_code == "870830")
+    assert pipe.stats.batches == 1
@@ -0,0 +1,65 @@
+import os, shutil
+import numpy as np
+from atis.policy import Policy
+
+def test_batch_matches_scalar():
+    pol = Policy("./data/policy.yaml")
+    rng = np.random.default_rng(0)
+    n = 500
+    margin, lead = rng.uniform(-1, 1, n), rng.uniform(-3, 3, n)
+    risk, conf = rng.choice([10.0, 25.0, 35.0], n), rng.choice([0.82, 0.93, np.nan], n)
+    ctype = rng.choice(["tariff_increase", "structural", "ambiguous", "tariff_decrease"], n)
+    allowed, codes = pol.check_batch(margin, lead, risk, conf, ctype)
+    for i in range(n):
+        out = pol.policy_check({
+            "delta_margin_pp": margin[i], "lead_time_days": lead[i], "risk_score": risk[i],
+            "hts_confidence": None if np.isnan(conf[i]) else conf[i], "regulatory_change_type": ctype[i],
+        })
+        assert out.allowed == allowed[i] and out.reason == pol.reasons[codes[i]]
+
+def test_hot_reload(tmp_path):
+    path = tmp_path / "policy.yaml"
+    shutil.copy("./data/policy.yaml", path)
+    pol = Policy(str(path), auto_reload=True, reload_interval_s=0.0)
+    action = {"delta_margin_pp": 0.0, "lead_time_days": 0.0, "risk_score": 25.0, "hts_confidence": 0.95,
+              "regulatory_change_type": "tariff_increase"}
+    assert not pol.policy_check(action).allowed
+
+    path.write_text(path.read_text().replace("supplier_switch_risk_score_lt: 20", "supplier_switch_risk_score_lt: 30"))
+    st = os.stat(path)
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000))
+    assert pol.policy_check(action).allowed
+
+def test_bad_reload_keeps_previous_rules(tmp_path, caplog):
+    path = tmp_path / "policy.yaml"
+    good = open("./data/policy.yaml").read()
+    path.write_text(good)
+    pol = Policy(str(path), auto_reload=True, reload_interval_s=0.0)
+    action = {"delta_margin_pp": 0.0, "lead_time_days": 0.0, "risk_score": 10.0, "hts_confidence": 0.95,
+              "regulatory_change_type": "tariff_increase"}
+    assert pol.policy_check(action).allowed
+
+    for k, broken in enumerate([good[:len(good) // 2] + "\n  - [", "", good.replace("auto_execute_if", "auto_exec")]):
+        path.write_text(broken)                           # half-written, empty, missing a section
+        st = os.stat(path)
+        os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + (k + 1) * 1_000_000))
+        assert not pol.reload_if_changed()
+        assert pol.policy_check(action).allowed
+    assert "keeping previous rules" in caplog.text
+
+def test_review_routing_follows_yaml_threshold(tmp_path):
+    from atis import orchestrator
+    from atis.data_loader import DataStore
+    from atis.watcher_demo import next_demo_event
+    path = tmp_path / "policy.yaml"
+    shutil.copy("./data/policy.yaml", path)
+    ds = DataStore("./data")
+    ev = next_demo_event(ds, 1)
+    skus = ds.get_skus_by_hs(ev.hs_code)                  # all classified at 0.93
+    pol = Policy(str(path))
+    assert all(r is None for _, r in orchestrator._decide_many(ds, pol, skus, ev, "R-CN-US", 25.0))
+
+    path.write_text(path.read_text().replace("hts_confidence_lt: 0.9", "hts_confidence_lt: 0.95"))
+    pol.reload()
+    assert pol.hts_confidence_lt == 0.95
+    assert [r.sku for _, r in orchestrator._decide_many(ds, pol, skus, ev, "R-CN-US", 25.0)] == skus
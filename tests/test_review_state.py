@@ -0,0 +1,64 @@
+import threading
+from atis import orchestrator
+from atis.classifier import CachedClassifier
+from atis.data_loader import DataStore
+from atis.models import HTSClassification, TariffChangeEvent
+from atis.policy import Policy
+from atis.review_state import ReviewState, event_scope
+from atis.synthetic import generate
+
+class _LowConfidenceForOddSkus:
+    def classify_batch(self, items):
+        return [HTSClassification(sku=it.sku, hts_code=it.hts_code, confidence=0.8 if int(it.sku[-1]) % 2 else 0.95)
+                for it in items]
+
+def test_concurrent_events_keep_their_own_review_items(tmp_path, monkeypatch):
+    generate(str(tmp_path / "data"), n_skus=200, comps_per_sku=2, n_hs=12, n_routes=8)
+    ds, pol = DataStore(str(tmp_path / "data")), Policy("./data/policy.yaml")
+    state = ReviewState(str(tmp_path / "review.sqlite"))
+    orchestrator.use_stores(review=state)
+    monkeypatch.setattr(orchestrator, "CLASSIFIER", CachedClassifier(_LowConfidenceForOddSkus()))
+
+    events = [TariffChangeEvent(hs_code=hs, origin="CN", new_rate_pct=25.0, effective_date="2025-09-01")
+              for hs in ds.bom["hts_code"].unique()[:8]]
+    approved = sorted(ds.bom["sku"].unique())[1:40:4]
+    errors = []
+
+    def handler(ev):
+        try:
+            for _ in range(5):
+                orchestrator.handle_event(ds, pol, ev, workers=1)
+        except Exception as e:          # pragma: no cover - surfaced below
+            errors.append(e)
+
+    def approver():
+        for sku in approved:
+            orchestrator.approve_hts(sku)
+            orchestrator.get_review_queue()
+
+    threads = [threading.Thread(target=handler, args=(ev,)) for ev in events] + [threading.Thread(target=approver)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert not errors
+
+    for ev in events:
+        expected = {s for s in ds.get_skus_by_hs(ev.hs_code) if int(s[-1]) % 2 and s not in approved}
+        assert {i.sku for i in state.queue(event_scope(ev))} == expected
+    assert not {i.sku for i in state.queue()} & set(approved)
+
+    reopened = ReviewState(str(tmp_path / "review.sqlite"))       # approvals are durable
+    assert set(reopened.approved) == set(approved)
+
+def test_replace_is_scoped_and_empty_closes():
+    state = ReviewState(":memory:")
+    a, b = ("870830", "CN", "US"), ("731815", "CN", "US")
+    item = HTSClassification(sku="SKU-1", hts_code="870830", confidence=0.8)
+    state.replace(a, {"SKU-1": item})
+    state.replace(b, {"SKU-1": item.model_copy(update={"hts_code": "731815"})})
+    assert [i.hts_code for i in state.queue()] == ["870830"]
+    state.replace(a, {})
+    assert state.scopes() == [b]
+    state.approve("SKU-1", 0.97)
+    assert state.queue() == [] and state.approved_confidence("SKU-1") == 0.97
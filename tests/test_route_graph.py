@@ -0,0 +1,15 @@
+from atis.data_loader import DataStore
+
+def test_route_graph_compiled_once():
+    g = DataStore("./data").route_graph
+    assert g.legs["R-CN-VN-US"] == (("CN", "VN"), ("VN", "US"))
+    assert g.origin["R-MX-CN-US"] == "MX"
+    assert set(g.routes_with_leg("CN", "US")) == {"R-CN-US", "R-MX-CN-US", "R-DE-CN-US"}
+    assert g.routes_with_leg("US", "CN") == ()
+
+def test_candidate_paths_include_unlisted_routes():
+    g = DataStore("./data").route_graph
+    paths = g.candidate_paths("CN", "US", max_hops=2)
+    assert paths[0] == (("CN", "US"),)
+    assert (("CN", "VN"), ("VN", "US")) in paths
+    assert all(p[0][0] == "CN" and p[-1][1] == "US" and len(p) <= 2 for p in paths)
@@ -0,0 +1,69 @@
+import numpy as np
+import pandas as pd
+from atis.data_loader import DataStore
+from atis.cost_engine import compute_costs_batch
+from atis.pipeline import apply_events
+from atis.scenario import ScenarioEngine, Scenario, rate_sweep, scenarios_from_frame
+from atis.watcher_demo import next_demo_event
+
+def test_overlay_leaves_base_index_untouched():
+    ds = DataStore("./data")
+    before = ds.tariff_index.timeline("870830", "CN", "US")
+    ov = ScenarioEngine(ds).overlay([next_demo_event(ds, 1).model_copy(update={"new_rate_pct": 99.0})])
+    assert ov.latest("870830", "CN", "US") == 99.0
+    assert ds.tariff_index.timeline("870830", "CN", "US") == before
+    assert ov.changed_keys() == [("870830", "CN", "US")]
+
+def test_scenario_matches_applying_events():
+    engine = ScenarioEngine(DataStore("./data"))
+    scenario = Scenario("hike", [next_demo_event(engine.ds, 1).model_copy(update={"new_rate_pct": 40.0})])
+    impact = engine.evaluate(scenario)
+    assert impact.skus and (impact.cogs_delta > 0).all()
+
+    applied = DataStore("./data")
+    apply_events(applied, scenario.events)
+    expected = compute_costs_batch(applied, impact.skus, ["R-CN-US"]).cogs[:, 0]
+    assert np.array_equal(impact.cogs_new, expected)
+
+def test_sweep_is_monotone_and_parallel_matches_serial():
+    engine = ScenarioEngine(DataStore("./data"))
+    sweep = rate_sweep(next_demo_event(engine.ds, 1), np.linspace(0, 50, 21))
+    serial = engine.run(sweep)
+    assert serial["cogs_delta_usd"].is_monotonic_increasing
+    pd.testing.assert_frame_equal(engine.run(sweep, workers=2), serial)
+    assert len(engine.run(scenarios_from_frame(engine.ds.scenarios))) == len(engine.ds.scenarios)
+
+def test_stacked_sweep_matches_one_at_a_time():
+    engine = ScenarioEngine(DataStore("./data"))
+    engine.chunk_cells = 5                                # force several stacked chunks
+    sweep = rate_sweep(next_demo_event(engine.ds, 3), [0.0, 7.5, 12.5, 30.0])
+    assert engine.summaries(sweep) == [engine.evaluate(s).summary() for s in sweep]
+
+def test_earlier_dated_event_is_costed_at_its_own_date():
+    engine = ScenarioEngine(DataStore("./data"))
+    (row15,) = [s for s in scenarios_from_frame(engine.ds.scenarios) if s.name == "Compliance risk assessment"]
+    assert row15.events[0].effective_date == "2025-01-10"        # a later 25% row exists for the same key
+    sweep = engine.run(rate_sweep(row15.events[0], [0.0, 10.0, 20.0]))
+    assert list(sweep["as_of"]) == ["2025-01-10"] * 3
+    assert sweep["cogs_delta_usd"].tolist()[1] == 0.0               # 10% is the rate in force on that date
+    assert sweep["cogs_delta_usd"].tolist()[0] < 0 < sweep["cogs_delta_usd"].tolist()[2]
+
+    pinned = ScenarioEngine(engine.ds, as_of="2025-12-31")         # explicit date: the 25% row shadows it
+    impact = pinned.evaluate(Scenario("x", row15.events))
+    assert len(impact.rows) and not impact.cogs_delta.any()
+
+def test_skus_affected_counts_only_changed_costs():
+    engine = ScenarioEngine(DataStore("./data"))
+    event = next_demo_event(engine.ds, 1)
+    on_route, off_route = engine.evaluate(Scenario("cn", [event.model_copy(update={"new_rate_pct": 40.0})])), \
+        engine.evaluate(Scenario("vn", [event.model_copy(update={"origin": "VN", "new_rate_pct": 40.0})]))
+    assert on_route.summary()["skus_affected"] == len(on_route.rows) > 0
+    assert len(off_route.rows) and off_route.summary()["skus_affected"] == 0     # VN leg is not on R-CN-US
+
+def test_parallel_sweep_sees_tariffs_appended_after_load():
+    ds = DataStore("./data")
+    event = next_demo_event(ds, 1)
+    apply_events(ds, [event.model_copy(update={"new_rate_pct": 33.0, "effective_date": "2030-01-01"})])
+    engine = ScenarioEngine(ds)             # the sweep's baseline is the appended 33% row
+    sweep = rate_sweep(event.model_copy(update={"effective_date": "2030-06-01"}), np.linspace(0, 50, 8))
+    pd.testing.assert_frame_equal(engine.run(sweep, workers=2), engine.run(sweep))
@@ -0,0 +1,21 @@
+import json
+from atis.seen_store import SeenStore
+
+def test_membership_batching_and_compaction(tmp_path):
+    with SeenStore(str(tmp_path / "seen.sqlite"), max_items=3, ttl_s=100) as store:
+        for i, ts in enumerate([10, 20, 150, 160, 170]):
+            store.add(f"id{i}", ts)
+        assert "id0" in store                     # visible before flush
+        store.flush()
+        assert store.unseen(["id1", "new"]) == {"new"}
+        assert store.compact(now=200) == 2          # id0/id1 expired by TTL
+        store.max_items = 2
+        assert store.compact(now=200) == 1          # oldest beyond size bound
+        assert "id2" not in store and "id4" in store and len(store) == 2
+
+def test_migrates_legacy_jsonl(tmp_path):
+    legacy = tmp_path / "watch_cache.jsonl"
+    legacy.write_text("".join(json.dumps({"_id": f"x{i}", "text": "t"}) + "\n" for i in range(5)))
+    with SeenStore(str(tmp_path / "seen.sqlite")) as store:
+        assert store.migrate_jsonl(str(legacy)) == 5
+        assert "x3" in store and len(store) == 5
@@ -0,0 +1,45 @@
+import os
+import numpy as np
+import pandas as pd
+from atis.data_loader import DataStore, shared_datastore
+from atis.cost_engine import compute_costs_batch
+from atis.snapshot import _current, is_fresh
+from atis.synthetic import generate
+
+def test_snapshot_matches_csv_load(tmp_path):
+    generate(str(tmp_path), n_skus=50, comps_per_sku=3, n_hs=12, n_routes=10)
+    csv, snap = DataStore(str(tmp_path)), DataStore(str(tmp_path), snapshot=True)
+    assert is_fresh(str(tmp_path))
+    assert csv.tariff_index.keys() == snap.tariff_index.keys()
+    for key in csv.tariff_index.keys():
+        assert csv.tariff_index.timeline(*key) == snap.tariff_index.timeline(*key)
+    for sku in csv.bom["sku"].unique():
+        assert csv.sku_materials(sku) == snap.sku_materials(sku)
+        assert csv.primary_hts(sku) == snap.primary_hts(sku)
+        assert csv.get_components(sku)["component_id"].tolist() == snap.get_components(sku)["component_id"].tolist()
+    for hs in csv.bom["hts_code"].unique():
+        assert csv.get_skus_by_hs(hs) == snap.get_skus_by_hs(hs)
+    skus, routes = list(csv.bom_index.sku_ids), list(csv.route_graph.route_ids)
+    assert np.array_equal(compute_costs_batch(csv, skus, routes).cogs, compute_costs_batch(snap, skus, routes).cogs)
+
+def test_snapshot_rebuilds_only_on_content_change(tmp_path):
+    generate(str(tmp_path), n_skus=10, n_hs=4, n_routes=4)
+    DataStore(str(tmp_path), snapshot=True)
+    build = _current(tmp_path)
+    os.utime(tmp_path / "bom.csv")                       # touched, same bytes
+    assert is_fresh(str(tmp_path))
+    bom = pd.read_csv(tmp_path / "bom.csv")
+    bom.loc[0, "unit_cost_usd"] = 999.0
+    bom.to_csv(tmp_path / "bom.csv", index=False)
+    assert not is_fresh(str(tmp_path))
+    ds = DataStore(str(tmp_path), snapshot=True)
+    assert _current(tmp_path) != build and not build.exists()
+    assert ds.bom["unit_cost_usd"].iloc[0] == 999.0
+
+def test_shared_datastore_is_reused_until_csv_changes(tmp_path):
+    generate(str(tmp_path), n_skus=10, n_hs=4, n_routes=4)
+    ds = shared_datastore(str(tmp_path))
+    assert shared_datastore(str(tmp_path)) is ds
+    st = (tmp_path / "routes.csv").stat()
+    os.utime(tmp_path / "routes.csv", ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000))
+    assert shared_datastore(str(tmp_path)) is not ds
@@ -0,0 +1,20 @@
+import numpy as np
+from atis.data_loader import DataStore
+from atis.sourcing import SourcingEngine, _top_k
+from atis.watcher_demo import next_demo_event
+
+def test_top_k_matches_stable_sort_with_ties():
+    rng = np.random.default_rng(1)
+    for _ in range(200):
+        score = rng.choice([0.5, 1.0, 1.5, 2.0], size=rng.integers(1, 30))
+        k = int(rng.integers(1, 6))
+        assert list(_top_k(score, k)) == list(np.argsort(score, kind="stable")[:k])
+
+def test_engine_uses_its_weights_and_k():
+    ds = DataStore("./data")
+    event = next_demo_event(ds, 1)
+    risk_only = SourcingEngine(ds, weights={"cost_delta": 0.0, "lead_time_delta": 0.0, "compliance_risk": 1.0})
+    opts = risk_only.top_k("SKU-001", "R-CN-US", event, 25.0, k=5)
+    assert len(opts) == 5
+    assert [o.risk_score for o in opts] == sorted(o.risk_score for o in opts)
+    assert opts[0].route_id == "R-MX-US"     # first low-risk route in file order
@@ -0,0 +1,26 @@
+from atis.data_loader import DataStore
+from atis.policy import Policy
+from atis.orchestrator import handle_event
+from atis.synthetic import generate
+from atis.watcher_demo import next_demo_event
+from benchmarks.run import run
+
+def test_generated_catalog_runs_end_to_end(tmp_path):
+    generate(str(tmp_path), n_skus=40, comps_per_sku=2, n_hs=10, n_routes=12)
+    ds = DataStore(str(tmp_path))
+    assert len(ds.bom) == 80 and len(ds.routes) == 12
+    assert "R-CN-US" in ds.route_graph.route_ids
+    decisions = handle_event(ds, Policy("./data/policy.yaml"), next_demo_event(ds, 1))
+    assert decisions and all(d.chosen is not None for d in decisions)
+
+def test_benchmark_report_shape(tmp_path):
+    report = run(rows=60, repeat=2, data_dir=str(tmp_path), stages=("load", "cost_single_sku"))
+    assert report["meta"]["bom_rows"] == 60
+    assert set(report["stages"]) == {"load", "cost_single_sku"}
+    assert report["stages"]["load"]["p50_ms"] > 0
+
+def test_benchmark_removes_its_temp_dir(tmp_path, monkeypatch):
+    import tempfile
+    monkeypatch.setattr(tempfile, "tempdir", str(tmp_path))
+    run(rows=60, repeat=2, stages=("load", "handle_event"))
+    assert list(tmp_path.iterdir()) == []
@@ -0,0 +1,33 @@
+import pandas as pd
+from atis.data_loader import DataStore
+
+def test_latest_and_as_of():
+    ds = DataStore("./data")
+    assert ds.latest_tariff("870830", "CN", "US") == 25.0
+    assert ds.tariff_as_of("870830", "CN", "US", "2025-06-01") == 10.0
+    assert ds.tariff_as_of("870830", "CN", "US", "2024-01-01") == 0.0
+    assert ds.latest_tariff("999999", "CN", "US") == 0.0
+
+def test_append_updates_index_incrementally():
+    ds = DataStore("./data")
+    rows = pd.DataFrame([
+        {"hs_code": "870830", "origin": "CN", "destination": "US", "rate_pct": 30.0, "effective_date": "2026-01-01"},
+        {"hs_code": "870830", "origin": "CN", "destination": "US", "rate_pct": 12.0, "effective_date": "2025-03-01"},
+    ])
+    touched = ds.append_tariffs(rows)
+    assert touched == [("870830", "CN", "US")]
+    assert ds.latest_tariff("870830", "CN", "US") == 30.0
+    assert ds.tariff_as_of("870830", "CN", "US", "2025-04-01") == 12.0
+    assert ds.tariff_as_of("870830", "CN", "US", "2025-09-15") == 25.0
+    assert len(ds.tariffs) == 31
+
+def test_appends_are_buffered_until_the_table_is_read():
+    ds = DataStore("./data")
+    table = ds.tariffs
+    for k in range(100):
+        ds.append_tariffs(pd.DataFrame([{"hs_code": "870830", "origin": "CN", "destination": "US",
+                                         "rate_pct": float(k), "effective_date": pd.Timestamp("2030-01-01") + pd.Timedelta(days=k)}]))
+        assert ds._tariffs is table                       # the full table is never re-concatenated per batch
+    assert ds.latest_tariff("870830", "CN", "US") == 99.0
+    assert len(ds.tariffs) == len(table) + 100
+    assert ds.tariffs["rate_pct"].tolist()[-100:] == [float(k) for k in range(100)]
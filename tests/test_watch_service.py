@@ -0,0 +1,164 @@
+import asyncio, json, random, threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from atis.watch_service import WatcherService
+from atis.watcher import Source, WatcherConfig
+
+def _item(n):
+    return {"title": f"US sets 25% tariff increase on HS 8708{n:02d} from China", "summary": ""}
+
+class _Feed(BaseHTTPRequestHandler):
+    hits = {}
+
+    def do_GET(self):
+        n = _Feed.hits[self.path] = _Feed.hits.get(self.path, 0) + 1
+        if self.path == "/missing":
+            self.send_response(404)
+            self.end_headers()
+            return
+        etag = {"/static": '"s1"', "/burst": '"b1"'}.get(self.path)
+        if etag and self.headers.get("If-None-Match") == etag:
+            self.send_response(304)
+            self.end_headers()
+            return
+        items = {"/changing": [_item(n)], "/static": [_item(99)], "/burst": [_item(50 + i) for i in range(3)]}
+        body = json.dumps({"items": items[self.path]}).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        if etag:
+            self.send_header("ETag", etag)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+def _serve():
+    _Feed.hits = {}
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _Feed)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_port}"
+
+def _cfg(tmp_path, sources, **kw):
+    return WatcherConfig(sources=sources, cache_path=str(tmp_path / "cache.jsonl"),
+                         state_path=str(tmp_path / "state.json"), seen_path=str(tmp_path / "seen.sqlite"),
+                         retries=0, jitter=0.0, min_interval_s=10, max_interval_s=400, **kw)
+
+def test_per_source_schedules_adapt_to_feed_changes(tmp_path):
+    server, base = _serve()
+    clock = FakeClock()
+    cfg = _cfg(tmp_path, [Source("changing", "json", base + "/changing", interval_s=100),
+                          Source("static", "json", base + "/static", interval_s=100),
+                          Source("down", "json", base + "/missing", interval_s=100)])
+
+    async def scenario():
+        svc = WatcherService(cfg, clock=clock, rng=random.Random(0))
+        try:
+            assert await svc.tick() == 50.0                  # all three polled; new items halve the interval
+            h = svc.health
+            assert [h[n].polls for n in h] == [1, 1, 1]
+            assert (h["changing"].interval_s, h["static"].interval_s, h["down"].interval_s) == (50, 50, 200)
+            clock.now += 50
+            await svc.tick()                                 # the failing feed has backed off
+            assert _Feed.hits == {"/changing": 2, "/static": 2, "/missing": 1}
+            assert (h["changing"].interval_s, h["static"].interval_s) == (25, 75)   # 304 stretches
+            for _ in range(6):
+                clock.now = svc.next_due()
+                await svc.tick()
+            assert h["changing"].interval_s == 10            # clamped at min_interval_s
+            assert h["static"].not_modified >= 1 and h["static"].interval_s > 75
+            assert not h["down"].healthy and h["down"].errors >= 1 and h["down"].last_status == 0
+            assert h["changing"].max_latency_ms > 0 and 'atis_watcher_source_up{source="down"} 0' in svc.to_prometheus()
+            return [svc.queue.get_nowait().hs_code for _ in range(svc.queue.qsize())]
+        finally:
+            await svc.aclose()
+
+    try:
+        hs = asyncio.run(scenario())
+    finally:
+        server.shutdown()
+    assert hs[:3] == ["870801", "870899", "870802"] and len(hs) == len(set(hs)) == _Feed.hits["/changing"] + 1
+
+def test_full_queue_blocks_polling_until_consumed(tmp_path):
+    server, base = _serve()
+    clock = FakeClock()
+    cfg = _cfg(tmp_path, [Source("burst", "json", base + "/burst", interval_s=10)], queue_size=1)
+
+    async def scenario():
+        svc = WatcherService(cfg, clock=clock)
+        try:
+            tick = asyncio.ensure_future(svc.tick())
+            await asyncio.sleep(0.3)
+            assert not tick.done() and svc.queue.full()      # producer parked on the bounded queue
+            got = [(await svc.get()).hs_code for _ in range(3)]
+            await tick
+            clock.now += 5
+            await svc.tick()                                 # not due yet: no extra fetch while we were blocked
+            return got, svc.health["burst"]
+        finally:
+            await svc.aclose()
+
+    try:
+        got, health = asyncio.run(scenario())
+    finally:
+        server.shutdown()
+    assert got == ["870850", "870851", "870852"]              # every event, not just the first
+    assert _Feed.hits == {"/burst": 1} and health.events == 3 and health.blocked_ms > 100
+
+def test_stop_while_blocked_keeps_undelivered_events(tmp_path):
+    server, base = _serve()
+    cfg = _cfg(tmp_path, [Source("burst", "json", base + "/burst", interval_s=10)], queue_size=1)
+
+    async def first_run():
+        svc = WatcherService(cfg)
+        task = asyncio.ensure_future(svc.run())
+        while not svc.queue.full():
+            await asyncio.sleep(0.01)
+        await asyncio.sleep(0.05)                            # parked on the second event
+        svc.stop()
+        await asyncio.wait_for(task, 2.0)
+        return [svc.queue.get_nowait().hs_code]
+
+    async def restart():
+        svc = WatcherService(cfg, clock=FakeClock())
+        try:
+            await svc.tick()
+            return [svc.queue.get_nowait().hs_code for _ in range(svc.queue.qsize())]
+        finally:
+            await svc.aclose()
+
+    try:
+        delivered = asyncio.run(first_run())
+        cfg.queue_size = 10
+        redelivered = asyncio.run(restart())
+    finally:
+        server.shutdown()
+    assert delivered == ["870850"]
+    assert redelivered == ["870851", "870852"]               # refetched (no 304), and not emitted twice
+    assert _Feed.hits == {"/burst": 2}
+
+def test_run_until_stopped(tmp_path):
+    server, base = _serve()
+    cfg = _cfg(tmp_path, [Source("changing", "json", base + "/changing", interval_s=0.05)])
+    cfg.min_interval_s = 0.02
+
+    async def scenario():
+        svc = WatcherService(cfg)
+        task = asyncio.ensure_future(svc.run())
+        got = [await asyncio.wait_for(svc.get(), 2.0) for _ in range(3)]
+        svc.stop()
+        await asyncio.wait_for(task, 2.0)
+        return got
+
+    try:
+        got = asyncio.run(scenario())
+    finally:
+        server.shutdown()
+    assert [e.hs_code for e in got] == ["870801", "870802", "870803"]
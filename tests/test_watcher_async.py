@@ -0,0 +1,86 @@
+import asyncio, json, threading, time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from atis.watcher import Source, WatcherConfig, run_once_async
+
+ITEMS = {"items": [{"title": "US sets 25% tariff increase on HS 870830 from China", "summary": ""}]}
+
+class _Stub(BaseHTTPRequestHandler):
+    hits = {}
+    not_modified = 0
+
+    def do_GET(self):
+        _Stub.hits[self.path] = _Stub.hits.get(self.path, 0) + 1
+        if self.path == "/slow":
+            time.sleep(1.0)
+        if self.headers.get("If-None-Match") == '"v1"':
+            _Stub.not_modified += 1
+            self.send_response(304)
+            self.end_headers()
+            return
+        body = json.dumps(ITEMS).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("ETag", '"v1"')
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+def test_concurrent_conditional_fetch(tmp_path):
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _Stub)
+    server.handle_error = lambda *args: None      # the slow source's client hangs up on purpose
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base = f"http://127.0.0.1:{server.server_port}"
+    try:
+        cfg = WatcherConfig(
+            sources=[Source("fast", "json", base + "/feed"),
+                     Source("slow", "json", base + "/slow", timeout_s=0.2)],
+            cache_path=str(tmp_path / "cache.jsonl"), state_path=str(tmp_path / "state.json"),
+            seen_path=str(tmp_path / "seen.sqlite"),
+            retries=0,
+        )
+        t0 = time.monotonic()
+        events = asyncio.run(run_once_async(cfg))
+        assert time.monotonic() - t0 < 0.9          # slow source only costs its own timeout
+        assert [e.hs_code for e in events] == ["870830"]
+        assert json.loads((tmp_path / "state.json").read_text()) == {"fast": {"etag": '"v1"'}}
+
+        # second poll: the validator turns the fast feed into a 304
+        assert asyncio.run(run_once_async(cfg)) == []
+        assert _Stub.hits["/feed"] == 2 and _Stub.not_modified == 1
+    finally:
+        server.shutdown()
+
+class _Flaky(BaseHTTPRequestHandler):
+    hits = 0
+
+    def do_GET(self):
+        _Flaky.hits += 1
+        if self.headers.get("If-None-Match") == '"v2"':
+            self.send_response(304)
+            self.end_headers()
+            return
+        body = b"{truncated" if _Flaky.hits == 1 else json.dumps(ITEMS).encode()
+        self.send_response(200)
+        self.send_header("ETag", '"v2"')
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+def test_unparseable_body_does_not_store_validators(tmp_path):
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _Flaky)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        cfg = WatcherConfig(sources=[Source("flaky", "json", f"http://127.0.0.1:{server.server_port}/feed")],
+                            cache_path=str(tmp_path / "cache.jsonl"), state_path=str(tmp_path / "state.json"),
+                            seen_path=str(tmp_path / "seen.sqlite"), retries=0)
+        assert asyncio.run(run_once_async(cfg)) == []
+        assert json.loads((tmp_path / "state.json").read_text()) == {}
+        assert [e.hs_code for e in asyncio.run(run_once_async(cfg))] == ["870830"]   # refetched in full, not a 304
+    finally:
+        server.shutdown()
@@ -0,0 +1,37 @@
+import itertools
+import numpy as np
+from atis.watcher import normalize_batch, normalize_to_event
+
+PARTS = [
+    ["US announces", "Notice:", "", "EU and Mexico:"],
+    ["25% tariff increase", "duty cut to 7.5 %", "+ 10% on", "-3% decrease", "rate 12%", "no rate given"],
+    ["on HS 870830", "hts 731815", "HS 870830%", "for codes 8708", ""],
+    ["for imports from China", "from vn and MX", "united states origin", "from CN->VN", ""],
+]
+
+def _corpus():
+    return [" ".join(p for p in combo if p) for combo in itertools.product(*PARTS)]
+
+def test_batch_matches_scalar():
+    texts = _corpus()
+    hints = [None if i % 3 else "854430" for i in range(len(texts))]
+    batch = normalize_batch(texts, hints)
+    for i, (text, hint) in enumerate(zip(texts, hints)):
+        ev, conf, meta = normalize_to_event(text, hs_hint=hint)
+        got = batch.event(i)
+        assert (got.model_dump() if got else None) == (ev.model_dump() if ev else None), text
+        assert batch.confidence[i] == conf, text
+        assert bool(batch.hs_found[i]) == meta["hs_code_found"], text
+        assert np.isnan(batch.pct[i]) != meta["pct_found"], text
+
+def test_batch_process_pool_matches_serial():
+    texts = _corpus()
+    serial = normalize_batch(texts)
+    pooled = normalize_batch(texts, workers=2, chunk_size=100)
+    assert [e and e.model_dump() for e in pooled.to_events()] == [e and e.model_dump() for e in serial.to_events()]
+    assert np.array_equal(pooled.confidence, serial.confidence)
+
+def test_to_events_reads_the_emit_mask_once():
+    batch = normalize_batch(_corpus())
+    assert batch.emit is batch.emit
+    assert [e is not None for e in batch.to_events()] == batch.emit.tolist()